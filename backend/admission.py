@@ -0,0 +1,156 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from scraper.latency import LatencyWindow
+
+class OverloadedError(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, status_code: int, retry_after: int, message: str):
+        self.status_code = status_code
+        self.retry_after = retry_after
+        super().__init__(message)
+
+class AdmissionSlot:
+    """An admitted request's hold on an in-flight slot; release() is idempotent"""
+
+    def __init__(self, controller: 'AdmissionController'):
+        self._controller = controller
+        self.started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(time.monotonic() - self.started)
+
+class AdmissionController:
+    """
+    Bounds how many scraping requests the API works on at once
+
+    Up to max_in_flight requests run; up to max_queue more wait in FIFO
+    order for at most max_wait seconds. Anything beyond that is shed
+    immediately: 429 when the wait queue is full, 503 when a queued
+    request's wait runs out. Both carry a Retry-After estimate from recent
+    request durations. Shedding early keeps the latency of admitted
+    requests bounded under overload.
+    """
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 16, max_wait: float = 2.0):
+        """
+        Args:
+            max_in_flight: Requests allowed to scrape concurrently
+            max_queue: Requests allowed to wait for a slot
+            max_wait: Seconds a request may wait before it is shed with 503
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._waiting: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.exempted = 0
+        self.rejected_queue_full = 0
+        self.rejected_wait_timeout = 0
+        self.durations = LatencyWindow()
+        self.wait_ms = LatencyWindow()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the median request duration"""
+        typical = (self.durations.percentile(50) or 5000) / 1000
+        return max(1, math.ceil(typical * (len(self._waiting) + 1) / self.max_in_flight))
+
+    async def acquire(self, exempt: bool = False) -> Optional[AdmissionSlot]:
+        """
+        Wait for an in-flight slot
+
+        Args:
+            exempt: Skip admission entirely (e.g. the response comes from the cache)
+
+        Returns:
+            The slot to release when the request is done, or None when exempt
+
+        Raises:
+            OverloadedError: The wait queue is full (429) or the wait timed out (503)
+        """
+        if exempt:
+            self.exempted += 1
+            return None
+        if self.in_flight < self.max_in_flight and not self._waiting:
+            self.in_flight += 1
+            return self._admit(0.0)
+        if len(self._waiting) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise OverloadedError(429, self.retry_after(), "Too many requests in progress; try again shortly")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append(future)
+        queued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # A slot was handed over just as the wait ended; pass it on
+                self._release(None)
+            else:
+                future.cancel()
+                self._waiting.remove(future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_wait_timeout += 1
+            raise OverloadedError(503, self.retry_after(), "Server is at capacity; try again shortly")
+        return self._admit((time.monotonic() - queued_at) * 1000)
+
+    def _admit(self, waited_ms: float) -> AdmissionSlot:
+        # in_flight already counts this slot (taken directly or handed over by _release)
+        self.admitted += 1
+        self.wait_ms.add(waited_ms)
+        return AdmissionSlot(self)
+
+    def _release(self, duration: Optional[float]):
+        if duration is not None:
+            self.durations.add(duration * 1000)
+        while self._waiting:
+            future = self._waiting.popleft()
+            if not future.done():
+                # Hand the slot straight to the next waiter
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, exempt: bool = False) -> AsyncIterator[Optional[AdmissionSlot]]:
+        """
+        Hold an in-flight slot for the duration of the block
+
+        Args:
+            exempt: Skip admission entirely (e.g. the response comes from the cache)
+        """
+        slot = await self.acquire(exempt)
+        try:
+            yield slot
+        finally:
+            if slot is not None:
+                slot.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'queued': self.queued,
+            'max_queue': self.max_queue,
+            'max_wait_s': self.max_wait,
+            'admitted': self.admitted,
+            'exempted': self.exempted,
+            'rejected_queue_full': self.rejected_queue_full,
+            'rejected_wait_timeout': self.rejected_wait_timeout,
+            'wait': self.wait_ms.summary(),
+            'duration': self.durations.summary(),
+        }
@@ -0,0 +1,110 @@
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised when a site is skipped because its circuit breaker is open"""
+
+    def __init__(self, site: str, retry_after: float):
+        self.site = site
+        self.retry_after = retry_after
+        super().__init__(f"{site} is temporarily skipped after repeated failures; "
+                         f"retrying in {retry_after:.0f}s")
+
+class CircuitBreaker:
+    """
+    Fast-fails a site whose scrapes keep failing
+
+    Closed: requests pass; failures (errors, timeouts, empty results) are
+    counted over a sliding window. Open: entered once failure_threshold
+    failures fall within the window; requests are refused for cooldown
+    seconds. Half-open: one trial request is let through; its success
+    closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, window: float = 60.0, cooldown: float = 30.0,
+                 trial_timeout: float = 60.0):
+        """
+        Args:
+            failure_threshold: Failures within the window that open the breaker
+            window: Seconds failures are counted over
+            cooldown: Seconds the breaker stays open before a trial request
+            trial_timeout: Seconds after which a trial that never reported back is replaced
+        """
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.trial_timeout = trial_timeout
+        self.state = CLOSED
+        self._failures = deque()
+        self._opened_at: Optional[float] = None
+        self._trial_started_at: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+
+    def _prune(self, now: float):
+        while self._failures and self._failures[0] <= now - self.window:
+            self._failures.popleft()
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a trial request through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        Whether a request may go out now
+
+        In half-open state this claims the single trial slot, so call it
+        once per request and only when the request will actually be made.
+        """
+        now = time.monotonic()
+        if self.state == OPEN and now - self._opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self._trial_started_at = None
+        if self.state == HALF_OPEN:
+            if self._trial_started_at is None or now - self._trial_started_at >= self.trial_timeout:
+                self._trial_started_at = now
+                return True
+        elif self.state == CLOSED:
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.state = CLOSED
+        self._failures.clear()
+        self._opened_at = None
+        self._trial_started_at = None
+
+    def record_failure(self):
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            self._open(now)
+            return
+        self._failures.append(now)
+        self._prune(now)
+        if self.state == CLOSED and len(self._failures) >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self._opened_at = now
+        self._trial_started_at = None
+        self._failures.clear()
+        self.times_opened += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._prune(time.monotonic())
+        return {
+            'state': self.state,
+            'recent_failures': len(self._failures),
+            'retry_after_s': round(self.retry_after(), 1),
+            'times_opened': self.times_opened,
+            'rejected': self.rejected,
+        }
@@ -1,20 +1,107 @@
 import asyncio
-from typing import List, Dict, Any
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from scraper import flipkart, amazon, reliance
 from scraper.flipkart import scrape_flipkart
 from scraper.amazon import scrape_amazon
 from scraper.reliance import scrape_reliance
+from scraper.browser_pool import BrowserPool
+from scraper.http_fetch import HttpFetcher
+from scraper.metrics import (
+    BROWSERS_OPEN, PAGES_IDLE, PAGES_OPEN, PRODUCTS_RETURNED, SCRAPE_SECONDS, observe_phases
+)
+from scraper.report import ScrapeReport
+from scraper.tracing import activate, add_span, span, start_span
+from scraper.selector_stats import selector_stats
+from result_cache import ResultCache, normalize_query
+from single_flight import SingleFlight
+from health_prober import HealthProber
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from scrape_scheduler import RateLimit, ScrapeScheduler
+from retry_policy import DEFAULT_RETRY_POLICY, RetryPolicy, backoff_delay, is_transient
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _Attempt:
+    """One scraper run within a hedged, retried scrape"""
+    report: ScrapeReport
+    # perf_counter when the scheduler granted the attempt a slot; None while it is queued
+    started: Optional[float] = None
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds spent scraping, excluding the wait in the scheduler queue"""
+        return (time.perf_counter() - self.started) * 1000 if self.started is not None else 0.0
 
 class ComparisonService:
     """Service for comparing products across multiple e-commerce sites"""
     
-    def __init__(self):
+    def __init__(self, cache_ttl: float = 300.0, cache_max_entries: int = 512,
+                 cache_max_bytes: int = 32 * 1024 * 1024, default_deadline: Optional[float] = 60.0,
+                 probe_interval: float = 60.0, max_concurrent_scrapes: Optional[int] = None,
+                 rate_limits: Optional[Dict[str, RateLimit]] = None,
+                 retry_policies: Optional[Dict[str, RetryPolicy]] = None):
+        """
+        Args:
+            default_deadline: Seconds a comparison may take when the caller gives no deadline
+            probe_interval: Seconds between background health probes of the sites
+            max_concurrent_scrapes: Scrapes running at once across all sites (default: browser pool size)
+            rate_limits: Outbound RateLimit per site (default: scrape_scheduler.DEFAULT_RATE_LIMITS)
+            retry_policies: Hedging and retry RetryPolicy per site (default: DEFAULT_RETRY_POLICY)
+            cache_ttl: Seconds a site's scraped results stay fresh
+            cache_max_entries: Maximum number of cached (site, query) results
+            cache_max_bytes: Approximate memory budget of the result cache
+        """
         self.scrapers = {
             'flipkart': scrape_flipkart,
             'amazon': scrape_amazon,
             'reliance': scrape_reliance
         }
+        self.browser_pool = BrowserPool()
+        self.http = HttpFetcher()
+        self.selector_stats = selector_stats
+        self.result_cache = ResultCache(ttl=cache_ttl, max_entries=cache_max_entries,
+                                        max_bytes=cache_max_bytes)
+        self.single_flight = SingleFlight()
+        self.default_deadline = default_deadline
+        self.health = HealthProber(self.http, {
+            'flipkart': flipkart.BASE_URL,
+            'amazon': amazon.BASE_URL,
+            'reliance': reliance.BASE_URL
+        }, interval=probe_interval)
+        self.breakers = {site: CircuitBreaker() for site in self.scrapers}
+        self.scheduler = ScrapeScheduler(max_concurrent_scrapes or self.browser_pool.max_pages, rate_limits)
+        # Scrapes cancelled because nobody waited for them any more (client gone, deadline hit)
+        self.scrapes_cancelled = 0
+        self.queued_scrapes_cancelled = 0
+        self.browser_seconds_saved = 0.0
+        self.retry_policies = dict(retry_policies or {})
+        self.retries = 0
+        self.hedges_started = 0
+        self.hedges_won = 0
+        BROWSERS_OPEN.set_function(lambda: int(self.browser_pool.is_running))
+        PAGES_OPEN.set_function(lambda: self.browser_pool.open_pages)
+        PAGES_IDLE.set_function(lambda: self.browser_pool.stats()['idle_pages'])
+    
+    async def start(self):
+        """Launch the shared browser pool, HTTP client and health prober"""
+        await self.browser_pool.start()
+        await self.http.start()
+        await self.health.start()
+    
+    async def close(self):
+        """Shut down the health prober, browser pool and HTTP client and persist selector stats"""
+        await self.health.close()
+        await self.browser_pool.close()
+        await self.http.close()
+        self.selector_stats.save()
     
-    async def compare_products(self, query: str, max_results_per_site: int = 10, sites: List[str] = None) -> Dict[str, Any]:
+    async def compare_products(self, query: str, max_results_per_site: int = 10, sites: List[str] = None,
+                               deadline: Optional[float] = None,
+                               site_budgets: Optional[Dict[str, float]] = None,
+                               on_site_result: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         Compare products across multiple sites
         
@@ -22,30 +109,284 @@ class ComparisonService:
             query: Search query string
             max_results_per_site: Maximum results per site
             sites: List of sites to search (default: all)
+            deadline: Seconds the whole comparison may take (default: self.default_deadline)
+            site_budgets: Optional per-site budgets in seconds, capped by the deadline
+            on_site_result: Optional callback called with (site, SiteResult dictionary)
+                as each site finishes, e.g. to publish partial results
         
         Returns:
-            Dictionary with comparison results
+            Dictionary with comparison results. Sites that miss their budget are
+            cancelled and reported with status 'timeout'.
         """
         if sites is None:
             sites = list(self.scrapers.keys())
         
-        # Create tasks for concurrent scraping
+        site_results = {}
+        async for site_name, site_result in self.iter_site_results(query, max_results_per_site, sites,
+                                                                   deadline, site_budgets):
+            site_results[site_name] = site_result
+            if on_site_result is not None:
+                on_site_result(site_name, site_result)
+        
+        # Keep the sites in the order they were requested
+        ordered = {site: site_results[site] for site in sites if site in site_results}
+        return self.build_comparison(query, ordered)
+    
+    async def compare_products_stream(self, query: str, max_results_per_site: int = 10,
+                                      sites: List[str] = None, deadline: Optional[float] = None,
+                                      site_budgets: Optional[Dict[str, float]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Compare products across multiple sites, yielding each site as soon as it finishes
+        
+        Args:
+            query: Search query string
+            max_results_per_site: Maximum results per site
+            sites: List of sites to search (default: all)
+            deadline: Seconds the whole comparison may take (default: self.default_deadline)
+            site_budgets: Optional per-site budgets in seconds, capped by the deadline
+        
+        Yields:
+            One {'event': 'site', ...} event per site in completion order, then a
+            final {'event': 'summary', ...} event with best deals and statistics
+        """
+        site_results = {}
+        async for site_name, site_result in self.iter_site_results(query, max_results_per_site, sites,
+                                                                   deadline, site_budgets):
+            site_results[site_name] = site_result
+            yield {'event': 'site', 'site': site_name, 'result': site_result}
+        
+        comparison_data = self.build_comparison(query, site_results)
+        yield {
+            'event': 'summary',
+            'query': query,
+            'best_deals': comparison_data['best_deals'],
+            'statistics': comparison_data['statistics']
+        }
+    
+    async def compare_batch_stream(self, queries: List[str], max_results_per_site: int = 10,
+                                   sites: List[str] = None, deadline: Optional[float] = None,
+                                   site_budgets: Optional[Dict[str, float]] = None,
+                                   concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Compare many queries, yielding each one as soon as it finishes
+        
+        Queries that normalize to the same text are compared once. Up to
+        concurrency queries run at a time (default and maximum: the
+        scheduler's global scrape limit), so the scheduler stays busy
+        without queries sitting on their deadlines in its queue.
+        
+        Args:
+            queries: Search queries, possibly with repeats
+            max_results_per_site: Maximum results per site
+            sites: List of sites to search (default: all)
+            deadline: Seconds each query may take, counted from when it starts
+            site_budgets: Optional per-site budgets in seconds, capped by the deadline
+            concurrency: Queries compared at the same time, at least 1
+        
+        Yields:
+            One {'event': 'query', ...} event per unique query in completion
+            order, then a final {'event': 'summary', ...} event
+        """
+        unique: Dict[str, List[str]] = {}
+        for query in queries:
+            unique.setdefault(normalize_query(query), []).append(query)
+        # More queries at once than the scheduler can run would only queue them behind each other
+        semaphore = asyncio.Semaphore(min(concurrency or self.scheduler.max_concurrency,
+                                          self.scheduler.max_concurrency))
+        batch_started = time.monotonic()
+        
+        async def run(originals: List[str]) -> Dict[str, Any]:
+            async with semaphore:
+                started = time.monotonic()
+                event = {
+                    'event': 'query',
+                    'query': originals[0],
+                    'duplicates': len(originals) - 1,
+                    'status': 'success',
+                    'error': None,
+                    'queued_ms': round((started - batch_started) * 1000, 1),
+                    'result': None
+                }
+                try:
+                    result = await self.compare_products(originals[0], max_results_per_site, sites,
+                                                         deadline, site_budgets)
+                    event['result'] = result
+                    # 'partial' when some sites timed out, errored or were skipped
+                    if any(r['status'] != 'success' for r in result['sites'].values()):
+                        event['status'] = 'partial'
+                except Exception as e:
+                    event['status'] = 'error'
+                    event['error'] = str(e)
+                event['elapsed_ms'] = round((time.monotonic() - started) * 1000, 1)
+                return event
+        
+        tasks = [asyncio.create_task(run(originals)) for originals in unique.values()]
+        counts = {'success': 0, 'partial': 0, 'error': 0}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                event = await next_done
+                counts[event['status']] += 1
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        elapsed = time.monotonic() - batch_started
+        yield {
+            'event': 'summary',
+            'queries': len(queries),
+            'unique_queries': len(unique),
+            'succeeded': counts['success'],
+            'partial': counts['partial'],
+            'failed': counts['error'],
+            'elapsed_ms': round(elapsed * 1000, 1),
+            'queries_per_second': round(len(unique) / elapsed, 2) if elapsed else None
+        }
+    
+    async def iter_site_results(self, query: str, max_results_per_site: int = 10,
+                                sites: List[str] = None, deadline: Optional[float] = None,
+                                site_budgets: Optional[Dict[str, float]] = None
+                                ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Scrape the requested sites concurrently and yield (site, site result) pairs
+        in completion order. Fresh cached sites are yielded first without scraping,
+        and sites still running when their budget runs out are cancelled and
+        yielded with status 'timeout'. Sites whose circuit breaker is open are
+        yielded with status 'circuit_open' without scraping.
+        """
+        if sites is None:
+            sites = list(self.scrapers.keys())
+        if deadline is None:
+            deadline = self.default_deadline
+        
+        started_at = time.monotonic()
+        reports = {}
+        budgets = {}
         tasks = []
+        # Not made current: this generator's context belongs to its consumer between yields
+        compare_span = start_span('compare', query=query, sites=list(sites))
         for site in sites:
-            if site in self.scrapers:
+            if site not in self.scrapers or site in reports:
+                continue
+            reports[site] = ScrapeReport(site=site)
+            cached = self._cached_products(site, query, max_results_per_site)
+            if cached is not None:
+                reports[site].cached = True
+                add_span('site', time.perf_counter(), parent=compare_span, site=site, cached=True)
+                yield site, self._site_result(cached, reports[site])
+                continue
+            if not self.breakers[site].allow():
+                add_span('site', time.perf_counter(), parent=compare_span, site=site, circuit_open=True)
+                yield site, self._circuit_open_result(site)
+                continue
+            candidates = [b for b in (deadline, (site_budgets or {}).get(site)) if b is not None]
+            budgets[site] = min(candidates) if candidates else None
+            deadline_at = started_at + budgets[site] if budgets[site] is not None else None
+            with activate(compare_span):
                 task = asyncio.create_task(
-                    self.scrapers[site](query, max_results_per_site),
+                    self._scrape_site(site, query, max_results_per_site, reports[site], deadline_at),
                     name=site
                 )
-                tasks.append(task)
+            tasks.append(task)
+        
+        def expires_at(task):
+            budget = budgets[task.get_name()]
+            return started_at + budget if budget is not None else None
+        
+        pending = set(tasks)
+        try:
+            while pending:
+                expiries = [e for e in map(expires_at, pending) if e is not None]
+                timeout = max(0.0, min(expiries) - time.monotonic()) if expiries else None
+                done, pending = await asyncio.wait(pending, timeout=timeout,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    site_name = task.get_name()
+                    report = reports[site_name]
+                    result = task.exception() or task.result()
+                    logger.info("%s: container selector %r matched after %.0fms",
+                                site_name, report.container_selector, report.container_wait_ms or 0)
+                    yield site_name, self._site_result(result, report)
+                
+                # Cancel every site that has used up its budget
+                now = time.monotonic()
+                expired = {task for task in pending
+                           if expires_at(task) is not None and expires_at(task) <= now}
+                pending -= expired
+                for task in expired:
+                    task.cancel()
+                    site_name = task.get_name()
+                    # The shared scrape records the timeout itself, once for all its waiters
+                    logger.warning("%s: cancelled after exceeding its %.1fs budget", site_name, budgets[site_name])
+                    yield site_name, self._timeout_result(budgets[site_name], reports[site_name])
+        finally:
+            # The consumer went away early; stop waiting on the remaining sites
+            for task in pending:
+                task.cancel()
+            if compare_span is not None:
+                compare_span.finish()
+    
+    def _timeout_result(self, budget: float, report: ScrapeReport) -> Dict[str, Any]:
+        """Build the SiteResult dictionary for a site cancelled at its budget"""
+        return {
+            'status': 'timeout',
+            'error': f"Exceeded its {budget * 1000:.0f}ms budget",
+            'products': [],
+            'diagnostics': report.to_dict()
+        }
+    
+    def _circuit_open_result(self, site: str) -> Dict[str, Any]:
+        """Build the SiteResult dictionary for a site skipped by its circuit breaker"""
+        breaker = self.breakers[site]
+        return {
+            'status': 'circuit_open',
+            'error': str(CircuitOpenError(site, breaker.retry_after())),
+            'products': [],
+            'diagnostics': {'circuit': breaker.snapshot()}
+        }
+    
+    def _site_result(self, result: Any, report: ScrapeReport) -> Dict[str, Any]:
+        """Build the SiteResult dictionary for a scraper outcome"""
+        if isinstance(result, BaseException):
+            return {
+                'status': 'error',
+                'error': str(result),
+                'products': [],
+                'diagnostics': report.to_dict()
+            }
+        
+        products = result if isinstance(result, list) else []
+        if report.error and not products:
+            # The scraper swallowed a failure (after any retries); don't pass it off as "no results"
+            return {
+                'status': 'error',
+                'error': report.error,
+                'products': [],
+                'diagnostics': report.to_dict()
+            }
+        return {
+            'status': 'success',
+            'count': len(products),
+            'products': products,
+            'cached': report.cached,
+            'source': report.source,
+            'diagnostics': report.to_dict()
+        }
+    
+    def build_comparison(self, query: str, site_results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge per-site results into the comparison response data
         
-        # Wait for all tasks to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        Args:
+            query: Search query string
+            site_results: SiteResult dictionaries keyed by site name
         
-        # Process results
+        Returns:
+            Dictionary with comparison results
+        """
         comparison_data = {
             'query': query,
-            'sites': {},
+            'sites': site_results,
             'all_products': [],
             'best_deals': {
                 'cheapest_overall': None,
@@ -62,25 +403,10 @@ class ComparisonService:
         total_products = 0
         all_prices = []
         
-        for i, result in enumerate(results):
-            site_name = sites[i] if i < len(sites) else f"site_{i}"
+        for site_result in site_results.values():
+            products = site_result.get('products', [])
             
-            if isinstance(result, Exception):
-                comparison_data['sites'][site_name] = {
-                    'status': 'error',
-                    'error': str(result),
-                    'products': []
-                }
-                continue
-            
-            products = result if isinstance(result, list) else []
-            comparison_data['sites'][site_name] = {
-                'status': 'success',
-                'count': len(products),
-                'products': products
-            }
-            
-            # Add site name to each product and collect all products
+            # Collect all products
             for product in products:
                 comparison_data['all_products'].append(product)
                 if isinstance(product.get('price'), (int, float)):
@@ -103,6 +429,245 @@ class ComparisonService:
         
         return comparison_data
     
+    async def search_site(self, site: str, query: str, max_results: int = 20) -> List[Dict[str, Any]]:
+        """
+        Search a single site, answering from the result cache when possible
+        
+        Args:
+            site: Site name (one of self.scrapers)
+            query: Search query string
+            max_results: Maximum number of results
+        
+        Returns:
+            List of product dictionaries
+        
+        Raises:
+            CircuitOpenError: The site's circuit breaker is open
+        """
+        if site not in self.scrapers:
+            raise ValueError(f"Unsupported site: {site}")
+        cached = self._cached_products(site, query, max_results)
+        if cached is not None:
+            return cached
+        breaker = self.breakers[site]
+        if not breaker.allow():
+            raise CircuitOpenError(site, breaker.retry_after())
+        deadline_at = time.monotonic() + self.default_deadline if self.default_deadline is not None else None
+        return await self._scrape_site(site, query, max_results, ScrapeReport(site=site), deadline_at)
+    
+    def is_cached(self, query: str, max_results: int, sites: List[str] = None) -> bool:
+        """Whether every requested site can be answered from the result cache"""
+        if sites is None:
+            sites = list(self.scrapers.keys())
+        sites = [site for site in sites if site in self.scrapers]
+        return bool(sites) and all(self._cache_key(site, query, max_results) in self.result_cache
+                                   for site in sites)
+    
+    def _cache_key(self, site: str, query: str, max_results: int):
+        return (site, normalize_query(query), max_results)
+    
+    def _cached_products(self, site: str, query: str, max_results: int):
+        return self.result_cache.get(self._cache_key(site, query, max_results))
+    
+    async def _scrape_site(self, site: str, query: str, max_results: int, report: ScrapeReport,
+                           deadline_at: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Scrape a site, joining an identical scrape that is already running
+        
+        Concurrent callers with the same (site, normalized query, max_results)
+        share one scraper run; cancelling one of them leaves the run alive
+        for the others.
+        """
+        key = self._cache_key(site, query, max_results)
+        report.coalesced = key in self.single_flight
+        with span('site', site=site, coalesced=report.coalesced) as site_span:
+            products, shared_report = await self.single_flight.run(
+                key, lambda: self._run_scraper(site, query, max_results, deadline_at)
+            )
+            report.merge_from(shared_report)
+            if site_span is not None:
+                site_span.set(products=len(products), source=report.source, attempts=report.attempts,
+                              hedged=report.hedged, error=report.error)
+        return products
+    
+    async def _run_scraper(self, site: str, query: str, max_results: int, deadline_at: Optional[float] = None):
+        """
+        Run a site's scraper with hedging and retries, and cache non-empty results
+        
+        A backup attempt starts when the first has been scraping (not queued
+        for a scheduler slot) past the site's recent p90 latency, and
+        whichever succeeds first wins. Transient failures are retried with
+        jittered backoff while deadline_at (time.monotonic()) allows.
+        
+        Returns:
+            Tuple of (products, report of the deciding attempt). Failures the
+            scraper swallowed are returned as [] with report.error set.
+        """
+        run_started = time.monotonic()
+        policy = self.retry_policies.get(site, DEFAULT_RETRY_POLICY)
+        attempts: Dict[asyncio.Task, _Attempt] = {}
+        # Set whenever an attempt gets its scheduler slot, so the hedge clock can start
+        slot_granted = asyncio.Event()
+        failures = 0
+        launched = 0
+        hedge = None
+        
+        def launch() -> asyncio.Task:
+            nonlocal launched
+            launched += 1
+            attempt = _Attempt(ScrapeReport(site=site))
+            task = asyncio.create_task(self._attempt(site, query, max_results, attempt, slot_granted.set))
+            attempts[task] = attempt
+            return task
+        
+        try:
+            launch()
+            while True:
+                timeout = None
+                waiting_for_slot = None
+                hedge_at = self._hedge_delay(site, policy) if hedge is None else None
+                if hedge_at is not None:
+                    started = [attempt.started for attempt in attempts.values() if attempt.started is not None]
+                    if started:
+                        timeout = max(0.0, min(started) + hedge_at - time.perf_counter())
+                    else:
+                        # Time queued behind other scrapes is not slowness; hedging it would only add load
+                        slot_granted.clear()
+                        waiting_for_slot = asyncio.create_task(slot_granted.wait())
+                waits = set(attempts)
+                if waiting_for_slot is not None:
+                    waits.add(waiting_for_slot)
+                try:
+                    done, _ = await asyncio.wait(waits, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    if waiting_for_slot is not None:
+                        waiting_for_slot.cancel()
+                done.discard(waiting_for_slot)
+                if not done:
+                    if timeout is None:
+                        # An attempt got its slot; its hedge clock starts now
+                        continue
+                    # Running past the site's usual latency: race a backup attempt (only once)
+                    if deadline_at is not None and time.monotonic() >= deadline_at:
+                        hedge = False
+                    else:
+                        hedge = launch()
+                        self.hedges_started += 1
+                    continue
+                
+                for task in done:
+                    attempt = attempts.pop(task)
+                    report = attempt.report
+                    elapsed_ms = attempt.elapsed_ms()
+                    error = task.exception()
+                    products = task.result() if error is None else []
+                    if error is None and (products or not report.error):
+                        self._cancel_attempts(attempts)
+                        self.hedges_won += task is hedge
+                        report.attempts = launched
+                        report.hedged = bool(hedge)
+                        self._record_outcome(site, 'success' if products else 'empty', elapsed_ms)
+                        # Empty lists are not cached; the site may just be blocking us for a moment
+                        if products:
+                            PRODUCTS_RETURNED.inc(len(products), site=site, source=report.source or 'unknown')
+                            self.result_cache.set(self._cache_key(site, query, max_results), products)
+                        return products, report
+                    last_error, last_report, last_ms = error, report, elapsed_ms
+                
+                if attempts:
+                    # The hedge is still running and may yet succeed
+                    continue
+                failures += 1
+                message = str(last_error) if last_error is not None else last_report.error
+                delay = backoff_delay(policy, failures)
+                retry = (failures < policy.max_attempts and is_transient(last_error or message)
+                         and (deadline_at is None or time.monotonic() + delay < deadline_at))
+                if not retry:
+                    last_report.attempts = launched
+                    last_report.hedged = bool(hedge)
+                    self._record_outcome(site, 'error', last_ms, message)
+                    if last_error is not None:
+                        raise last_error
+                    return [], last_report
+                logger.info("%s: retrying in %.2fs after transient failure: %s", site, delay, message)
+                self.retries += 1
+                await asyncio.sleep(delay)
+                launch()
+        except asyncio.CancelledError:
+            # Cancelled once every waiter has gone; past the deadline that means it timed out,
+            # which counts as one failure however many requests were waiting on this scrape
+            if deadline_at is not None and time.monotonic() >= deadline_at:
+                self._record_outcome(site, 'timeout', (time.monotonic() - run_started) * 1000)
+            for attempt in attempts.values():
+                self._record_cancelled(site, attempt)
+            self._cancel_attempts(attempts)
+            raise
+    
+    async def _attempt(self, site: str, query: str, max_results: int, attempt: '_Attempt',
+                       on_start: Optional[Callable[[], None]] = None) -> List[Dict[str, Any]]:
+        """One scraper run, once the scheduler grants the site a slot"""
+        report = attempt.report
+        with span('attempt') as attempt_span:
+            async with self.scheduler.slot(site) as queue_wait_ms:
+                attempt.started = time.perf_counter()
+                report.queue_wait_ms = round(queue_wait_ms, 1)
+                if on_start is not None:
+                    on_start()
+                if attempt_span is not None:
+                    attempt_span.set(queue_wait_ms=report.queue_wait_ms)
+                try:
+                    return await self.scrapers[site](query, max_results, pool=self.browser_pool,
+                                                     report=report, http=self.http)
+                finally:
+                    observe_phases(site, report)
+    
+    def _hedge_delay(self, site: str, policy: RetryPolicy) -> Optional[float]:
+        """Seconds after which a backup attempt is started, or None when the site is not hedged"""
+        window = self.health.sites[site].scrape_latency if site in self.health.sites else None
+        if not policy.hedge or window is None or len(window) < policy.hedge_min_samples:
+            return None
+        return max(policy.min_hedge_delay, window.percentile(policy.hedge_percentile) / 1000)
+    
+    def _cancel_attempts(self, attempts: Dict[asyncio.Task, Any]):
+        for task in attempts:
+            task.cancel()
+        attempts.clear()
+    
+    def _record_outcome(self, site: str, outcome: str, latency_ms: float, error: Optional[str] = None):
+        """Feed a scrape outcome to the site's health view, circuit breaker and metrics"""
+        SCRAPE_SECONDS.observe(latency_ms / 1000, site=site, outcome=outcome)
+        self.health.record_scrape(site, outcome, latency_ms, error)
+        if outcome == 'success':
+            self.breakers[site].record_success()
+        else:
+            self.breakers[site].record_failure()
+    
+    def _record_cancelled(self, site: str, attempt: '_Attempt'):
+        """Count a cancelled scrape attempt and the browser time it would still have taken"""
+        if attempt.started is None:
+            # Still waiting in the scheduler queue; no page was held yet
+            self.queued_scrapes_cancelled += 1
+            return
+        self.scrapes_cancelled += 1
+        elapsed_ms = attempt.elapsed_ms()
+        typical_ms = self.health.sites[site].scrape_latency.percentile(50) if site in self.health.sites else None
+        if typical_ms is not None:
+            self.browser_seconds_saved += max(0.0, typical_ms - elapsed_ms) / 1000
+    
+    def cancellation_stats(self) -> Dict[str, Any]:
+        return {
+            'scrapes_cancelled': self.scrapes_cancelled,
+            'queued_scrapes_cancelled': self.queued_scrapes_cancelled,
+            'browser_seconds_saved': round(self.browser_seconds_saved, 1),
+        }
+    
+    def retry_stats(self) -> Dict[str, int]:
+        return {
+            'retries': self.retries,
+            'hedges_started': self.hedges_started,
+            'hedges_won': self.hedges_won,
+        }
+    
     def _find_best_deals(self, products: List[Dict]) -> Dict[str, Any]:
         """Find the best deals from all products"""
         if not products:
@@ -142,18 +707,16 @@ class ComparisonService:
         }
     
     async def get_site_status(self) -> Dict[str, str]:
-        """Check the status of all scraping sites"""
-        status = {}
-        
-        for site_name in self.scrapers:
-            try:
-                # Try a quick test search
-                result = await self.scrapers[site_name]("test", 1)
-                status[site_name] = "online" if isinstance(result, list) else "offline"
-            except Exception as e:
-                status[site_name] = f"error: {str(e)[:50]}..."
-        
-        return status
+        """
+        Status of all scraping sites from the background health prober
+        
+        Returns:
+            'online', 'degraded', 'offline' or 'unknown' per site. Sites not
+            probed yet are probed once first.
+        """
+        if self.health.rounds == 0 and self.http.can_probe:
+            await self.health.probe_all()
+        return self.health.statuses()
 
 # Create a global instance
 comparison_service = ComparisonService()
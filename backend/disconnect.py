@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Requests abandoned by their client since process start
+disconnect_stats: Dict[str, int] = {'requests_cancelled': 0}
+
+class CancelOnDisconnectMiddleware:
+    """
+    ASGI middleware that cancels a request's handler when its client disconnects
+
+    Without it a /compare handler keeps scraping every site to completion
+    after the user closed the tab. Cancellation propagates down to the
+    scraper tasks; scrapes shared with other callers keep running for them.
+    Only a disconnect before the last body message counts: after it the
+    handler is left to finish, e.g. to run the response's background task.
+    """
+
+    def __init__(self, app, paths: Tuple[str, ...] = ('/search', '/compare')):
+        """
+        Args:
+            app: The wrapped ASGI application
+            paths: Path prefixes of the endpoints worth cancelling
+        """
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        messages = asyncio.Queue()
+        response_sent = False
+
+        async def pump():
+            # Forward every message to the app and stop at the disconnect
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message['type'] == 'http.disconnect':
+                    return
+
+        async def send_watching_for_end(message):
+            nonlocal response_sent
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                # Servers report a disconnect once the response is complete; that one is not the client leaving
+                response_sent = True
+            await send(message)
+
+        handler = asyncio.create_task(self.app(scope, messages.get, send_watching_for_end))
+        watcher = asyncio.create_task(pump())
+        try:
+            done, _ = await asyncio.wait({handler, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if handler not in done and not response_sent:
+                handler.cancel()
+                disconnect_stats['requests_cancelled'] += 1
+                logger.info("Client disconnected; cancelled %s %s", scope['method'], scope['path'])
+                try:
+                    await handler
+                except (asyncio.CancelledError, Exception):
+                    # Nobody is left to receive the response or the error
+                    pass
+                return
+            await handler
+        finally:
+            watcher.cancel()
+            if not handler.done():
+                handler.cancel()
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from scraper.http_fetch import HttpFetcher
+from scraper.latency import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+class SiteHealth:
+    """Recent probe and scrape outcomes for one site"""
+
+    def __init__(self, window: int = 50):
+        # (ok, source) of the most recent probes and real scrapes
+        self.outcomes = deque(maxlen=window)
+        self.probe_latency = LatencyWindow(size=window)
+        self.scrape_latency = LatencyWindow(size=window)
+        self.last_probe: Optional[Dict[str, Any]] = None
+        self.last_success_at: Optional[float] = None
+        self.last_error_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def record(self, ok: bool, source: str, error: Optional[str] = None):
+        now = time.time()
+        self.outcomes.append((ok, source))
+        if ok:
+            self.last_success_at = now
+        else:
+            self.last_error_at = now
+            self.last_error = error
+
+    @property
+    def error_rate(self) -> Optional[float]:
+        if not self.outcomes:
+            return None
+        return sum(1 for ok, _ in self.outcomes if not ok) / len(self.outcomes)
+
+class HealthProber:
+    """
+    Keeps a per-site health view that /status can answer from instantly
+
+    A background task sends one cheap HTTP request to every site's home page
+    on a fixed interval, all sites concurrently. Real scrape outcomes are
+    recorded into the same view, so the error rate reflects both.
+    """
+
+    def __init__(self, http: HttpFetcher, targets: Dict[str, str], interval: float = 60.0,
+                 probe_timeout: float = 5.0, window: int = 50, degraded_error_rate: float = 0.25):
+        """
+        Args:
+            http: Shared HttpFetcher the probes are sent with
+            targets: URL to probe for each site name
+            interval: Seconds between probe rounds
+            probe_timeout: Seconds a single probe may take
+            window: Number of recent outcomes the error rate is computed over
+            degraded_error_rate: Error rate at which an otherwise reachable site is 'degraded'
+        """
+        self.http = http
+        self.targets = dict(targets)
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self.degraded_error_rate = degraded_error_rate
+        self.sites = {site: SiteHealth(window) for site in self.targets}
+        self.rounds = 0
+        self.last_round_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the background probe loop"""
+        if self._task is None and self.http.can_probe:
+            self._task = asyncio.create_task(self._loop(), name='health-prober')
+
+    async def close(self):
+        """Stop the background probe loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.warning("Health probe round failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def probe_all(self):
+        """Probe every site concurrently and record the results"""
+        await asyncio.gather(*(self._probe(site, url) for site, url in self.targets.items()))
+        self.rounds += 1
+        self.last_round_at = time.time()
+
+    async def _probe(self, site: str, url: str):
+        health = self.sites[site]
+        started = time.perf_counter()
+        status_code = None
+        error = None
+        try:
+            status_code = await asyncio.wait_for(self.http.probe(url), self.probe_timeout)
+            # 4xx (typically bot walls) still means the site is up and answering
+            if status_code >= 500:
+                error = f"HTTP {status_code}"
+        except asyncio.TimeoutError:
+            error = f"No response within {self.probe_timeout:.0f}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        health.probe_latency.add(latency_ms)
+        health.record(error is None, 'probe', error)
+        health.last_probe = {
+            'ok': error is None,
+            'status_code': status_code,
+            'latency_ms': round(latency_ms, 1),
+            'error': error,
+            'at': _iso(time.time()),
+        }
+
+    def record_scrape(self, site: str, outcome: str, latency_ms: float, error: Optional[str] = None):
+        """
+        Feed a real scrape outcome into the site's health
+
+        Args:
+            site: Site name
+            outcome: 'success', 'empty', 'error' or 'timeout'
+            latency_ms: Time the scrape took (or its budget, for timeouts)
+            error: Error message for failed scrapes
+        """
+        health = self.sites.get(site)
+        if health is None:
+            return
+        health.scrape_latency.add(latency_ms)
+        # Scrapers swallow most errors and return nothing, so empty counts as a failure
+        health.record(outcome == 'success', 'scrape', error or (None if outcome == 'success' else outcome))
+
+    def status(self, site: str) -> str:
+        """'online', 'degraded', 'offline' or 'unknown' for one site"""
+        health = self.sites[site]
+        if not health.outcomes:
+            return 'unknown'
+        probe_ok = health.last_probe['ok'] if health.last_probe else True
+        if not probe_ok and (health.last_success_at is None or health.last_success_at < health.last_error_at):
+            return 'offline'
+        if health.error_rate >= self.degraded_error_rate:
+            return 'degraded'
+        return 'online'
+
+    def statuses(self) -> Dict[str, str]:
+        return {site: self.status(site) for site in self.sites}
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Detailed per-site health for /status"""
+        snapshot = {}
+        for site, health in self.sites.items():
+            error_rate = health.error_rate
+            snapshot[site] = {
+                'status': self.status(site),
+                'error_rate': round(error_rate, 3) if error_rate is not None else None,
+                'samples': len(health.outcomes),
+                'last_success': _iso(health.last_success_at),
+                'last_error': _iso(health.last_error_at),
+                'last_error_message': health.last_error,
+                'probe': health.last_probe,
+                'probe_latency': health.probe_latency.summary(),
+                'scrape_latency': health.scrape_latency.summary(),
+            }
+        return snapshot
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from admission import OverloadedError
+
+logger = logging.getLogger(__name__)
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+@dataclass
+class Job:
+    """One asynchronous comparison and its progress"""
+    id: str
+    query: str
+    max_results_per_site: int
+    sites: Optional[List[str]] = None
+    deadline: Optional[float] = None
+    site_budgets: Optional[Dict[str, float]] = None
+    status: str = 'queued'
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # SiteResult dictionaries of the sites finished so far
+    site_results: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def to_dict(self, retention: float) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'query': self.query,
+            'created_at': _iso(self.created_at),
+            'started_at': _iso(self.started_at),
+            'finished_at': _iso(self.finished_at),
+            'expires_at': _iso(self.finished_at + retention) if self.finished_at else None,
+            'sites': self.site_results,
+            'result': self.result,
+            'error': self.error,
+        }
+
+class JobManager:
+    """
+    Runs comparisons in the background for callers that cannot hold a connection open
+
+    Submitted jobs wait in a bounded queue for one of max_workers worker
+    tasks, which run ComparisonService.compare_products and record each
+    site's result as it finishes. Finished jobs are kept for retention
+    seconds and then dropped; beyond max_finished of them the oldest go first.
+    """
+
+    def __init__(self, service, max_workers: int = 4, max_pending: int = 100,
+                 retention: float = 3600.0, max_finished: int = 1000, default_deadline: float = 300.0):
+        """
+        Args:
+            service: The ComparisonService jobs are run with
+            max_workers: Jobs running at once
+            max_pending: Jobs allowed to wait for a worker before submissions are refused
+            retention: Seconds a finished job stays retrievable
+            max_finished: Finished jobs kept at most; the oldest are dropped early to stay under it
+            default_deadline: Seconds a job may take when the caller gives no deadline
+        """
+        self.service = service
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self.max_finished = max_finished
+        self.default_deadline = default_deadline
+        self._jobs: Dict[str, Job] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+        self.evicted = 0
+
+    async def start(self):
+        """Start the worker tasks"""
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker(), name=f'job-worker-{i}')
+                             for i in range(self.max_workers)]
+
+    async def close(self):
+        """Stop the workers; running jobs are cancelled"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, query: str, max_results_per_site: int = 10, sites: Optional[List[str]] = None,
+               deadline: Optional[float] = None, site_budgets: Optional[Dict[str, float]] = None) -> Job:
+        """
+        Queue a comparison and return its job right away
+
+        Raises:
+            OverloadedError: Too many jobs are already waiting (429)
+        """
+        self._purge()
+        if self._queue.qsize() >= self.max_pending:
+            raise OverloadedError(429, 30, "Too many comparison jobs are queued; try again later")
+        job = Job(
+            id=uuid.uuid4().hex,
+            query=query,
+            max_results_per_site=max_results_per_site,
+            sites=sites,
+            deadline=deadline if deadline is not None else self.default_deadline,
+            site_budgets=site_budgets
+        )
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job with this ID, or None if unknown or expired"""
+        self._purge()
+        return self._jobs.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = await self.service.compare_products(
+                job.query,
+                job.max_results_per_site,
+                job.sites,
+                job.deadline,
+                job.site_budgets,
+                on_site_result=job.site_results.__setitem__
+            )
+            job.status = 'completed'
+            self.completed += 1
+        except asyncio.CancelledError:
+            job.status = 'failed'
+            job.error = 'Cancelled during shutdown'
+            self.failed += 1
+            raise
+        except Exception as e:
+            logger.exception("Comparison job %s failed", job.id)
+            job.status = 'failed'
+            job.error = str(e)
+            self.failed += 1
+        finally:
+            job.finished_at = time.time()
+
+    def _purge(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+            self.expired += 1
+        finished = [job for job in self._jobs.values() if job.finished]
+        if len(finished) > self.max_finished:
+            finished.sort(key=lambda job: job.finished_at)
+            for job in finished[:len(finished) - self.max_finished]:
+                del self._jobs[job.id]
+                self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        self._purge()
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            'workers': self.max_workers,
+            'queued': self._queue.qsize(),
+            'max_pending': self.max_pending,
+            'retention_s': self.retention,
+            'max_finished': self.max_finished,
+            'jobs': statuses,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'expired': self.expired,
+            'evicted': self.evicted,
+        }
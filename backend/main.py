@@ -1,19 +1,53 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import os
+import secrets
+import time
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 import uvicorn
 
 from models import (
     ProductResponse, SearchRequest, SearchResponse, 
-    ComparisonRequest, ComparisonResponse
+    ComparisonRequest, ComparisonResponse, BatchComparisonRequest,
+    SiteResult, BestDeals, Statistics, JobResponse
 )
-from scraper.flipkart import scrape_flipkart
 from comparison_service import comparison_service
+from circuit_breaker import CircuitOpenError
+from admission import AdmissionController, OverloadedError
+from disconnect import CancelOnDisconnectMiddleware, disconnect_stats
+from job_manager import JobManager
+from request_tracing import TRACE_HEADER, SlowRequestStore, TracingMiddleware
+from profiler import LoopProfiler, ProfilerBusyError
+from scraper.resource_blocking import blocking_totals
+from scraper.readiness import readiness_stats
+from scraper.http_fetch import fast_path_stats
+from scraper.metrics import metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the shared browser pool and job workers on startup and close them on shutdown
+    """
+    await comparison_service.start()
+    await jobs.start()
+    try:
+        yield
+    finally:
+        await jobs.close()
+        await comparison_service.close()
 
 # FastAPI app setup
 app = FastAPI(
     title="Compareason - Multi-Site Product Comparison API",
     version="2.0.0",
-    description="A comprehensive FastAPI application for comparing products across multiple e-commerce sites"
+    description="A comprehensive FastAPI application for comparing products across multiple e-commerce sites",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -23,8 +57,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TRACE_HEADER, "Server-Timing"],
 )
 
+# Stop scraping for clients that have gone away
+app.add_middleware(CancelOnDisconnectMiddleware)
+
+# Trace IDs, span trees and slow-request capture; outermost so cancelled requests are traced too
+slow_requests = SlowRequestStore()
+app.add_middleware(TracingMiddleware, store=slow_requests)
+
+# Bounds concurrent scraping requests; cache-served requests bypass it
+admission = AdmissionController()
+
+# Background comparisons for callers that cannot hold a connection open
+jobs = JobManager(comparison_service)
+
+# On-demand CPU and event-loop profiling; idle until /admin/profile is called
+profiler = LoopProfiler()
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+# Opt-in for local development only: behind a reverse proxy on the same host every client is loopback
+ADMIN_ALLOW_LOOPBACK = os.environ.get('ADMIN_ALLOW_LOOPBACK', '') == '1'
+
+metrics.gauge('compareason_requests_in_flight', 'Scraping requests admitted and running').set_function(
+    lambda: admission.in_flight)
+metrics.gauge('compareason_requests_queued', 'Scraping requests waiting for admission').set_function(
+    lambda: admission.queued)
+
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    """Shed requests fast with a Retry-After hint instead of letting them time out"""
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)},
+                        headers={"Retry-After": str(exc.retry_after)})
+
+def _admitted(query: str, max_results: int, sites=None):
+    """Admission for a request; exempt when every requested site is served from the cache"""
+    return admission.admit(exempt=comparison_service.is_cached(query, max_results, sites))
+
+def _seconds(milliseconds):
+    """Convert an optional millisecond value from a request to seconds"""
+    return milliseconds / 1000 if milliseconds is not None else None
+
+def _site_budgets(site_budgets_ms):
+    """Convert optional per-site budgets from milliseconds to seconds"""
+    if not site_budgets_ms:
+        return None
+    return {site: _seconds(budget) for site, budget in site_budgets_ms.items()}
+
 @app.get("/")
 async def root():
     """
@@ -40,7 +119,19 @@ async def root():
             "GET /search/{query}": "Search products on single site with query parameter",
             "POST /compare": "Compare products across multiple sites",
             "GET /compare/{query}": "Compare products across multiple sites with query parameter",
-            "GET /status": "Check status of all supported sites"
+            "POST /compare/stream": "Stream per-site comparison results as NDJSON as each site finishes",
+            "GET /compare/stream/{query}": "Stream per-site comparison results as NDJSON with query parameter",
+            "POST /compare/batch": "Compare many queries in one request, streamed as NDJSON",
+            "POST /jobs/compare": "Start a comparison in the background and get a job ID",
+            "GET /jobs/{job_id}": "Status, partial results and final result of a comparison job",
+            "GET /status": "Check status of all supported sites",
+            "GET /selectors/stats": "Selector hit/miss statistics per site",
+            "GET /cache/stats": "Result cache usage and hit/miss counters",
+            "GET /admission/stats": "In-flight and queued requests and how many were shed",
+            "GET /scraper/stats": "Browser pool usage, scrape queue depth and waits, blocked/allowed page requests and time-to-ready per site",
+            "GET /traces/slow": "Slow requests captured with their span trees and page snapshots",
+            "GET /metrics": "Prometheus metrics: per-site phase histograms, product and selector counters, browser and page gauges",
+            "POST /admin/profile": "Sample the API process for a few seconds: collapsed stacks, event-loop lag and the longest blocking callbacks"
         }
     }
 
@@ -55,15 +146,19 @@ async def search_products(request: SearchRequest):
     Returns:
         SearchResponse with products list and metadata
     """
-    try:
-        products = await scrape_flipkart(request.query, request.max_results)
-        return SearchResponse(
-            products=products,
-            total_found=len(products),
-            query=request.query
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error scraping products: {str(e)}")
+    async with _admitted(request.query, request.max_results, ['flipkart']):
+        try:
+            products = await comparison_service.search_site('flipkart', request.query, request.max_results)
+            return SearchResponse(
+                products=products,
+                total_found=len(products),
+                query=request.query
+            )
+        except CircuitOpenError as e:
+            raise HTTPException(status_code=503, detail=str(e),
+                                headers={"Retry-After": str(max(1, round(e.retry_after)))})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error scraping products: {str(e)}")
 
 @app.get("/search/{query}")
 async def search_products_get(query: str, max_results: int = 20):
@@ -77,15 +172,19 @@ async def search_products_get(query: str, max_results: int = 20):
     Returns:
         SearchResponse with products list and metadata
     """
-    try:
-        products = await scrape_flipkart(query, max_results)
-        return SearchResponse(
-            products=products,
-            total_found=len(products),
-            query=query
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error scraping products: {str(e)}")
+    async with _admitted(query, max_results, ['flipkart']):
+        try:
+            products = await comparison_service.search_site('flipkart', query, max_results)
+            return SearchResponse(
+                products=products,
+                total_found=len(products),
+                query=query
+            )
+        except CircuitOpenError as e:
+            raise HTTPException(status_code=503, detail=str(e),
+                                headers={"Retry-After": str(max(1, round(e.retry_after)))})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error scraping products: {str(e)}")
 
 @app.post("/compare", response_model=ComparisonResponse)
 async def compare_products(request: ComparisonRequest):
@@ -98,18 +197,22 @@ async def compare_products(request: ComparisonRequest):
     Returns:
         ComparisonResponse with products from all sites and comparison data
     """
-    try:
-        comparison_data = await comparison_service.compare_products(
-            request.query, 
-            request.max_results_per_site, 
-            request.sites
-        )
-        return ComparisonResponse(**comparison_data)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error comparing products: {str(e)}")
+    async with _admitted(request.query, request.max_results_per_site, request.sites):
+        try:
+            comparison_data = await comparison_service.compare_products(
+                request.query, 
+                request.max_results_per_site, 
+                request.sites,
+                _seconds(request.deadline_ms),
+                _site_budgets(request.site_budgets_ms)
+            )
+            return ComparisonResponse(**comparison_data)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error comparing products: {str(e)}")
 
 @app.get("/compare/{query}")
-async def compare_products_get(query: str, max_results_per_site: int = 10, sites: str = None):
+async def compare_products_get(query: str, max_results_per_site: int = 10, sites: str = None,
+                               deadline_ms: int = None):
     """
     Compare products across multiple e-commerce sites using GET request
     
@@ -117,39 +220,313 @@ async def compare_products_get(query: str, max_results_per_site: int = 10, sites
         query: Search query string
         max_results_per_site: Maximum results per site (default: 10)
         sites: Comma-separated list of sites to search (default: all)
+        deadline_ms: Overall deadline in milliseconds; late sites are reported as 'timeout'
         
     Returns:
         ComparisonResponse with products from all sites and comparison data
     """
+    sites_list = sites.split(',') if sites else None
+    async with _admitted(query, max_results_per_site, sites_list):
+        try:
+            comparison_data = await comparison_service.compare_products(
+                query, 
+                max_results_per_site, 
+                sites_list,
+                _seconds(deadline_ms)
+            )
+            return ComparisonResponse(**comparison_data)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error comparing products: {str(e)}")
+
+async def _ndjson_events(query: str, max_results_per_site: int, sites, deadline_ms=None, site_budgets_ms=None,
+                         slot=None):
+    """
+    Serialize comparison stream events as newline-delimited JSON, releasing
+    the request's admission slot once the stream ends
+    """
     try:
-        sites_list = sites.split(',') if sites else None
-        comparison_data = await comparison_service.compare_products(
-            query, 
-            max_results_per_site, 
-            sites_list
-        )
-        return ComparisonResponse(**comparison_data)
+        async for event in comparison_service.compare_products_stream(
+            query, max_results_per_site, sites, _seconds(deadline_ms), _site_budgets(site_budgets_ms)
+        ):
+            if event['event'] == 'site':
+                event['result'] = SiteResult(**event['result'])
+            else:
+                event['best_deals'] = BestDeals(**event['best_deals'])
+                event['statistics'] = Statistics(**event['statistics'])
+            yield json.dumps(jsonable_encoder(event)) + "\n"
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error comparing products: {str(e)}")
+        yield json.dumps({"event": "error", "error": f"Error comparing products: {str(e)}"}) + "\n"
+    finally:
+        if slot is not None:
+            slot.release()
+
+@app.post("/compare/stream")
+async def compare_products_stream(request: ComparisonRequest):
+    """
+    Compare products across multiple sites, streaming each site's result as it finishes
+    
+    Args:
+        request: ComparisonRequest containing query, max_results_per_site, and sites
+        
+    Returns:
+        NDJSON stream of {"event": "site"} lines followed by one {"event": "summary"} line
+    """
+    # The slot is held until the stream has been sent, not just until this returns;
+    # the background task covers streams that end before the generator starts
+    slot = await admission.acquire(
+        comparison_service.is_cached(request.query, request.max_results_per_site, request.sites)
+    )
+    return StreamingResponse(
+        _ndjson_events(request.query, request.max_results_per_site, request.sites,
+                       request.deadline_ms, request.site_budgets_ms, slot),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(slot.release) if slot else None
+    )
+
+@app.get("/compare/stream/{query}")
+async def compare_products_stream_get(query: str, max_results_per_site: int = 10, sites: str = None,
+                                      deadline_ms: int = None):
+    """
+    Compare products across multiple sites using GET request, streaming each site's result
+    
+    Args:
+        query: Search query string
+        max_results_per_site: Maximum results per site (default: 10)
+        sites: Comma-separated list of sites to search (default: all)
+        deadline_ms: Overall deadline in milliseconds; late sites are reported as 'timeout'
+        
+    Returns:
+        NDJSON stream of {"event": "site"} lines followed by one {"event": "summary"} line
+    """
+    sites_list = sites.split(',') if sites else None
+    slot = await admission.acquire(comparison_service.is_cached(query, max_results_per_site, sites_list))
+    return StreamingResponse(
+        _ndjson_events(query, max_results_per_site, sites_list, deadline_ms, slot=slot),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(slot.release) if slot else None
+    )
+
+# Largest number of queries accepted in one batch
+MAX_BATCH_QUERIES = 1000
+
+async def _ndjson_batch_events(request: BatchComparisonRequest, slot=None):
+    """
+    Serialize batch comparison events as newline-delimited JSON, releasing
+    the request's admission slot once the stream ends
+    """
+    try:
+        async for event in comparison_service.compare_batch_stream(
+            request.queries, request.max_results_per_site, request.sites, _seconds(request.deadline_ms),
+            _site_budgets(request.site_budgets_ms), request.concurrency
+        ):
+            if event.get('result') is not None:
+                event['result'] = ComparisonResponse(**event['result'])
+            yield json.dumps(jsonable_encoder(event)) + "\n"
+    except Exception as e:
+        yield json.dumps({"event": "error", "error": f"Error comparing products: {str(e)}"}) + "\n"
+    finally:
+        if slot is not None:
+            slot.release()
+
+@app.post("/compare/batch")
+async def compare_products_batch(request: BatchComparisonRequest):
+    """
+    Compare many queries in one request, streaming each query's result as it finishes
+    
+    Args:
+        request: BatchComparisonRequest with the queries; repeated queries are compared once
+        
+    Returns:
+        NDJSON stream of {"event": "query"} lines (status, timing and comparison per
+        unique query) followed by one {"event": "summary"} line
+    """
+    if not request.queries or len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"A batch needs 1 to {MAX_BATCH_QUERIES} queries")
+    # The whole batch counts as one request; the scrape scheduler bounds its actual load
+    slot = await admission.acquire()
+    return StreamingResponse(
+        _ndjson_batch_events(request, slot),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(slot.release)
+    )
+
+@app.post("/jobs/compare", response_model=JobResponse, status_code=202)
+async def submit_comparison_job(request: ComparisonRequest):
+    """
+    Start a comparison in the background and return its job right away
+    
+    Args:
+        request: ComparisonRequest; without deadline_ms a job may take up to 5 minutes
+        
+    Returns:
+        JobResponse with the job ID to poll at GET /jobs/{job_id}
+    """
+    job = jobs.submit(
+        request.query,
+        request.max_results_per_site,
+        request.sites,
+        _seconds(request.deadline_ms),
+        _site_budgets(request.site_budgets_ms)
+    )
+    return JobResponse(**job.to_dict(jobs.retention))
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_comparison_job(job_id: str):
+    """
+    Status of a comparison job, with the sites finished so far
+    
+    Args:
+        job_id: ID returned by POST /jobs/compare
+        
+    Returns:
+        JobResponse; result holds the full comparison once status is 'completed'
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return JobResponse(**job.to_dict(jobs.retention))
 
 @app.get("/status")
 async def get_site_status():
     """
-    Check the status of all supported scraping sites
+    Status of all supported scraping sites from the background health prober
     
     Returns:
-        Dictionary with status of each site
+        Dictionary with status of each site, plus per-site probe latency,
+        last success time and error rate over recent probes and scrapes
     """
     try:
         status = await comparison_service.get_site_status()
+        health = comparison_service.health
         return {
             "status": "success",
             "sites": status,
-            "timestamp": "2025-07-09T00:00:00Z"
+            "details": health.snapshot(),
+            "circuits": {site: breaker.snapshot() for site, breaker in comparison_service.breakers.items()},
+            "probe_interval_s": health.interval,
+            "timestamp": datetime.fromtimestamp(health.last_round_at or time.time(), timezone.utc).isoformat()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking site status: {str(e)}")
 
+@app.get("/selectors/stats")
+async def get_selector_stats():
+    """
+    Selector hit/miss statistics used to order fallback selectors
+    
+    Returns:
+        Dictionary of hit counts, miss counts and hit rates per site and selector group
+    """
+    return {
+        "status": "success",
+        "selectors": comparison_service.selector_stats.snapshot()
+    }
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Result cache usage, hit/miss counters and in-flight scrape deduplication
+    """
+    return {
+        "status": "success",
+        "cache": comparison_service.result_cache.stats(),
+        "single_flight": comparison_service.single_flight.stats()
+    }
+
+@app.get("/admission/stats")
+async def get_admission_stats():
+    """
+    Inbound admission control (in-flight and queued requests, shed counts and
+    wait times) and background comparison job counts
+    """
+    return {
+        "status": "success",
+        "admission": admission.stats(),
+        "jobs": jobs.stats()
+    }
+
+@app.get("/scraper/stats")
+async def get_scraper_stats():
+    """
+    Browser pool usage, scrape queue depth and wait times, blocked vs allowed
+    page requests, time-to-ready and how many scrapes were served over plain
+    HTTP vs the browser, per site
+    """
+    return {
+        "status": "success",
+        "browser_pool": comparison_service.browser_pool.stats(),
+        "scheduler": comparison_service.scheduler.stats(),
+        "cancellations": {**disconnect_stats, **comparison_service.cancellation_stats()},
+        "retries": comparison_service.retry_stats(),
+        "requests": {site: counters.to_dict() for site, counters in blocking_totals.items()},
+        "readiness": {site: window.summary() for site, window in readiness_stats.items()},
+        "sources": fast_path_stats
+    }
+
+def _require_admin(request: Request):
+    """
+    Admin endpoints need an X-Admin-Token header matching ADMIN_TOKEN, or a
+    loopback client when ADMIN_ALLOW_LOOPBACK=1; they are disabled otherwise
+    """
+    if ADMIN_TOKEN and secrets.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return
+    if ADMIN_ALLOW_LOOPBACK and request.client is not None and request.client.host in ('127.0.0.1', '::1'):
+        return
+    if not ADMIN_TOKEN and not ADMIN_ALLOW_LOOPBACK:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    raise HTTPException(status_code=403, detail="Missing or invalid X-Admin-Token")
+
+@app.get("/traces/slow")
+async def get_slow_traces(request: Request):
+    """
+    Slow requests kept in the on-disk ring buffer, newest first, each with
+    its span tree (trace.json) and any page HTML snapshots or Playwright
+    traces captured while it ran. Admin only: entries carry queries, page
+    HTML and paths on the server
+    """
+    _require_admin(request)
+    return {
+        "status": "success",
+        "store": slow_requests.stats(),
+        "traces": await asyncio.to_thread(slow_requests.list)
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus metrics: per-site phase and scrape duration histograms,
+    product, drop, selector and swallowed-exception counters, and browser,
+    page and request gauges
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.post("/admin/profile")
+async def profile_process(
+    request: Request,
+    seconds: float = Query(10.0, gt=0, le=60),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    threads: str = Query("loop", pattern="^(loop|all)$"),
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+):
+    """
+    Profile the running API for a bounded window and return where the time went
+
+    Samples the event loop thread's stack (and worker threads with
+    threads=all) every interval_ms and reports collapsed stacks ready for
+    flamegraph.pl or speedscope, the hottest functions, event-loop lag
+    percentiles and the longest stalls with the task and stack that blocked
+    the loop. format=collapsed returns only the collapsed stacks. Nothing is
+    sampled outside a profile; only one runs at a time.
+    """
+    _require_admin(request)
+    try:
+        report = await profiler.profile(seconds, interval_ms / 1000, all_threads=threads == "all")
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "collapsed":
+        return PlainTextResponse(report["collapsed"] + "\n")
+    return {"status": "success", **report}
+
 @app.get("/health")
 async def health_check():
     """
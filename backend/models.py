@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
 from typing import List, Optional, Dict, Any, Union
 
 class ProductResponse(BaseModel):
@@ -8,10 +8,16 @@ class ProductResponse(BaseModel):
     rating: Optional[str] = None
     site: str
 
+def _none_as_default(cls, value, info: ValidationInfo):
+    """Treat an explicit null like an omitted field, since the scrapers need a number"""
+    return cls.model_fields[info.field_name].default if value is None else value
+
 class SearchRequest(BaseModel):
     query: str
     max_results: Optional[int] = 20
 
+    _max_results_default = field_validator('max_results', mode='before')(_none_as_default)
+
 class SearchResponse(BaseModel):
     products: List[ProductResponse]
     total_found: int
@@ -21,12 +27,33 @@ class ComparisonRequest(BaseModel):
     query: str
     max_results_per_site: Optional[int] = 10
     sites: Optional[List[str]] = None
+    # Overall deadline for the comparison and optional tighter per-site budgets
+    deadline_ms: Optional[int] = None
+    site_budgets_ms: Optional[Dict[str, int]] = None
+
+    _max_results_default = field_validator('max_results_per_site', mode='before')(_none_as_default)
+
+class BatchComparisonRequest(BaseModel):
+    queries: List[str]
+    max_results_per_site: Optional[int] = 10
+    sites: Optional[List[str]] = None
+    # Deadline per query, counted from when that query starts
+    deadline_ms: Optional[int] = None
+    site_budgets_ms: Optional[Dict[str, int]] = None
+    # Queries compared at the same time (default and maximum: the global scrape limit)
+    concurrency: Optional[int] = Field(None, ge=1)
+
+    _max_results_default = field_validator('max_results_per_site', mode='before')(_none_as_default)
 
 class SiteResult(BaseModel):
     status: str
     count: Optional[int] = None
     products: List[ProductResponse] = []
     error: Optional[str] = None
+    cached: bool = False
+    # Which path served the site: 'http' (no browser) or 'browser'
+    source: Optional[str] = None
+    diagnostics: Optional[Dict[str, Any]] = None
 
 class PriceRange(BaseModel):
     min: float
@@ -49,3 +76,18 @@ class ComparisonResponse(BaseModel):
     all_products: List[ProductResponse]
     best_deals: BestDeals
     statistics: Optional[Statistics] = None
+
+class JobResponse(BaseModel):
+    job_id: str
+    # 'queued', 'running', 'completed' or 'failed'
+    status: str
+    query: str
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    # When a finished job stops being retrievable
+    expires_at: Optional[str] = None
+    # Sites finished so far, filled in while the job runs
+    sites: Dict[str, SiteResult] = {}
+    result: Optional[ComparisonResponse] = None
+    error: Optional[str] = None
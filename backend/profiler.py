@@ -0,0 +1,217 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from scraper.latency import LatencyWindow
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def _stack(frame) -> Tuple[str, ...]:
+    """Frame labels from the outermost call to the innermost"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+def _describe_task(loop) -> Optional[str]:
+    # Read from the sampler thread; the answer may be a moment stale, which is fine for a report
+    try:
+        task = asyncio.current_task(loop)
+    except RuntimeError:
+        return None
+    if task is None:
+        return None
+    coro = task.get_coro()
+    return f"{task.get_name()} ({getattr(coro, '__qualname__', type(coro).__name__)})"
+
+class _Session:
+    """State shared by one profile's heartbeat coroutine and sampler thread"""
+
+    def __init__(self, loop, loop_thread: int, interval: float, tick: float, block_threshold: float,
+                 all_threads: bool):
+        self.loop = loop
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.tick = tick
+        self.block_threshold = block_threshold
+        self.all_threads = all_threads
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.lag_ms = LatencyWindow(size=100000)
+        # perf_counter of the heartbeat's latest tick, written by the loop and read by the sampler
+        self.last_tick = time.perf_counter()
+        self.stalls: List[Dict[str, Any]] = []
+        self._stall: Optional[Dict[str, Any]] = None
+        self.started = time.perf_counter()
+        self.stop = threading.Event()
+
+    async def heartbeat(self):
+        """Measure how late the loop runs a callback that asked to run tick seconds from now"""
+        while True:
+            expected = time.perf_counter() + self.tick
+            await asyncio.sleep(self.tick)
+            now = time.perf_counter()
+            self.lag_ms.add(round(max(0.0, now - expected) * 1000, 2))
+            self.last_tick = now
+
+    def sample_forever(self):
+        while not self.stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frames = sys._current_frames()
+        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+        loop_stack = None
+        for ident, frame in frames.items():
+            if ident == threading.get_ident():
+                continue
+            if ident == self.loop_thread:
+                loop_stack = _stack(frame)
+                self.stacks[loop_stack] += 1
+            elif self.all_threads:
+                self.stacks[(f"thread:{threads.get(ident, ident)}",) + _stack(frame)] += 1
+        self.samples += 1
+        self._track_stall(loop_stack)
+
+    def _track_stall(self, loop_stack: Optional[Tuple[str, ...]]):
+        """Attribute the loop's stacks to a stall while its heartbeat is overdue"""
+        last_tick = self.last_tick
+        overdue = time.perf_counter() - last_tick - self.tick
+        stall = self._stall
+        if stall is not None and last_tick != stall['since']:
+            # The heartbeat ran again: the blocking callback has returned
+            self._stall = None
+            stall['duration_ms'] = round(max(0.0, last_tick - stall['since'] - self.tick) * 1000, 1)
+            self.stalls.append(stall)
+            stall = None
+        if overdue < self.block_threshold:
+            return
+        if stall is None:
+            stall = self._stall = {
+                'since': last_tick,
+                'at_s': round(last_tick - self.started, 3),
+                'task': _describe_task(self.loop),
+                'stacks': Counter(),
+            }
+        if loop_stack is not None:
+            stall['stacks'][loop_stack] += 1
+
+    def finish(self):
+        """Close a stall that is still open when the profile ends"""
+        if self._stall is not None:
+            stall, self._stall = self._stall, None
+            stall['duration_ms'] = round((time.perf_counter() - stall['since'] - self.tick) * 1000, 1)
+            stall['unfinished'] = True
+            self.stalls.append(stall)
+
+def collapsed(stacks: Counter) -> str:
+    """Stacks in the collapsed format read by flamegraph.pl, speedscope and inferno"""
+    return '\n'.join(f"{';'.join(stack)} {count}" for stack, count in stacks.most_common())
+
+class LoopProfiler:
+    """
+    On-demand sampling profiler and event-loop stall detector for the API process
+
+    Nothing runs between profiles. During one, a thread samples the event
+    loop thread's stack every interval, and a heartbeat coroutine measures how
+    late the loop runs it (event-loop lag). Whenever the heartbeat is overdue
+    by block_threshold the loop is stuck in one callback; the sampler records
+    that stall with the task that was running and the stacks it was stuck in.
+    Stall detection needs no loop hooks, so it works with uvloop too.
+    """
+
+    def __init__(self, max_seconds: float = 60.0, block_threshold: float = 0.05, tick: float = 0.01,
+                 max_stalls: int = 20):
+        """
+        Args:
+            max_seconds: Longest profile that may be requested
+            block_threshold: Seconds the heartbeat must be overdue to count as a stall
+            tick: Heartbeat period in seconds
+            max_stalls: Longest stalls included in a report
+        """
+        self.max_seconds = max_seconds
+        self.block_threshold = block_threshold
+        self.tick = tick
+        self.max_stalls = max_stalls
+        self.running = False
+        self.profiles = 0
+
+    async def profile(self, seconds: float = 10.0, interval: float = 0.005,
+                      all_threads: bool = False) -> Dict[str, Any]:
+        """
+        Profile the process for a bounded window
+
+        Args:
+            seconds: Window length, capped at max_seconds
+            interval: Seconds between stack samples
+            all_threads: Also sample worker threads (e.g. asyncio.to_thread parsing)
+
+        Returns:
+            Report with collapsed stacks, the hottest functions, event-loop lag
+            percentiles and the longest stalls
+
+        Raises:
+            ProfilerBusyError: Another profile is running
+        """
+        if self.running:
+            raise ProfilerBusyError("A profile is already running")
+        self.running = True
+        seconds = min(max(seconds, 0.1), self.max_seconds)
+        session = _Session(asyncio.get_running_loop(), threading.get_ident(), max(interval, 0.001),
+                           self.tick, self.block_threshold, all_threads)
+        sampler = threading.Thread(target=session.sample_forever, name='loop-profiler', daemon=True)
+        heartbeat = asyncio.create_task(session.heartbeat())
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            heartbeat.cancel()
+            session.stop.set()
+            await asyncio.to_thread(sampler.join)
+            session.finish()
+            self.running = False
+            self.profiles += 1
+        return self._report(session, seconds)
+
+    def _report(self, session: _Session, seconds: float) -> Dict[str, Any]:
+        # Self time on the event loop thread; worker threads appear only in the collapsed stacks
+        leaves: Counter = Counter()
+        for stack, count in session.stacks.items():
+            if not stack[0].startswith('thread:'):
+                leaves[stack[-1]] += count
+        loop_samples = sum(leaves.values())
+        stalls = sorted(session.stalls, key=lambda stall: stall['duration_ms'], reverse=True)[:self.max_stalls]
+        return {
+            'duration_s': round(seconds, 3),
+            'interval_ms': round(session.interval * 1000, 2),
+            'samples': session.samples,
+            'event_loop_lag': session.lag_ms.summary(),
+            'stalls': {
+                'threshold_ms': round(self.block_threshold * 1000, 1),
+                'count': len(session.stalls),
+                'blocked_ms': round(sum(stall['duration_ms'] for stall in session.stalls), 1),
+                'longest': [{
+                    'duration_ms': stall['duration_ms'],
+                    'at_s': stall['at_s'],
+                    'task': stall['task'],
+                    'stack': ';'.join(stall['stacks'].most_common(1)[0][0]) if stall['stacks'] else None,
+                    **({'unfinished': True} if stall.get('unfinished') else {}),
+                } for stall in stalls],
+            },
+            'top_functions': [
+                {'function': label, 'samples': count,
+                 'share': round(count / loop_samples, 3) if loop_samples else None}
+                for label, count in leaves.most_common(20)
+            ],
+            'collapsed': collapsed(session.stacks),
+        }
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from scraper.tracing import Trace, capture_config, end_trace, start_trace
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = 'X-Trace-Id'
+# Accept caller-supplied IDs only if they are safe to echo and use in file names
+_VALID_TRACE_ID = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+DEFAULT_CAPTURE_DIR = os.environ.get(
+    'TRACE_CAPTURE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'slow_traces')
+)
+
+# One JSON document per traced request, on stderr unless the app configures the logger itself
+trace_logger = logging.getLogger('compareason.trace')
+if not trace_logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    trace_logger.addHandler(_handler)
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+
+class SlowRequestStore:
+    """
+    Bounded on-disk ring buffer of slow requests
+
+    Each entry is a directory holding trace.json (the span tree and request
+    details) plus the page HTML snapshots and Playwright traces captured
+    while the request ran. Once max_entries are stored the oldest is deleted.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CAPTURE_DIR, max_entries: int = 50):
+        """
+        Args:
+            directory: Where entries are written
+            max_entries: Entries kept before the oldest are deleted
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.saved = 0
+        self.evicted = 0
+
+    def save(self, trace: Trace, record: Dict[str, Any]) -> str:
+        """Write a request's trace and artifacts (blocking; run it in a thread). Returns the entry path."""
+        millis = int(trace.started_at * 1000) % 1000
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(trace.started_at)) + f'{millis:03d}'
+        path = os.path.join(self.directory, f"{stamp}-{trace.trace_id}")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, 'trace.json'), 'w') as f:
+            json.dump(record, f, indent=2, default=str)
+        for artifact in trace.artifacts:
+            target = os.path.join(path, artifact.name)
+            if artifact.path is not None:
+                shutil.move(artifact.path, target)
+            elif artifact.content is not None:
+                with open(target, 'wb') as f:
+                    f.write(artifact.content)
+        self.saved += 1
+        self._evict()
+        return path
+
+    def _entries(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        # Names start with a UTC timestamp, so they sort oldest first
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+
+    def _evict(self):
+        entries = self._entries()
+        for name in entries[:max(0, len(entries) - self.max_entries)]:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            self.evicted += 1
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored entries, newest first"""
+        result = []
+        for name in reversed(self._entries()):
+            path = os.path.join(self.directory, name)
+            try:
+                with open(os.path.join(path, 'trace.json')) as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            result.append({
+                'trace_id': record.get('trace_id'),
+                'method': record.get('method'),
+                'path': record.get('path'),
+                'status': record.get('status'),
+                'duration_ms': record.get('duration_ms'),
+                'files': sorted(os.listdir(path)),
+                'location': path,
+            })
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'directory': self.directory,
+            'entries': len(self._entries()),
+            'max_entries': self.max_entries,
+            'slow_ms': capture_config.slow_ms,
+            'saved': self.saved,
+            'evicted': self.evicted,
+        }
+
+def _release_artifacts(trace: Trace):
+    # Temporary Playwright trace files of requests that are not kept
+    for artifact in trace.artifacts:
+        if artifact.path is not None:
+            try:
+                os.remove(artifact.path)
+            except OSError:
+                pass
+
+def _server_timing(trace: Trace) -> str:
+    """Server-Timing header value with the duration of each scraped site"""
+    entries = []
+    for node in trace.root.walk():
+        site = node.attributes.get('site')
+        if node.name == 'site' and site and node.end is not None:
+            entries.append(f"{site};dur={node.duration_ms}")
+    entries.append(f"total;dur={trace.root.duration_ms}")
+    return ', '.join(entries)
+
+class TracingMiddleware:
+    """
+    ASGI middleware that traces scraping requests
+
+    Every request to one of paths gets a trace ID (the caller's X-Trace-Id
+    if valid, otherwise a new one) returned in the X-Trace-Id header, plus a
+    Server-Timing header with per-site durations. When the request finishes
+    its span tree (request -> compare -> site -> attempt -> navigate, ready,
+    extract, ...) is logged as one JSON line, and requests slower than
+    capture_config.slow_ms are written to the SlowRequestStore.
+    """
+
+    def __init__(self, app, store: SlowRequestStore, paths: Tuple[str, ...] = ('/search', '/compare')):
+        """
+        Args:
+            app: The wrapped ASGI application
+            store: Ring buffer receiving slow requests
+            paths: Path prefixes of the endpoints to trace
+        """
+        self.app = app
+        self.store = store
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        requested_id = dict(scope.get('headers') or []).get(TRACE_HEADER.lower().encode(), b'').decode('latin-1')
+        trace_id = requested_id if _VALID_TRACE_ID.match(requested_id) else None
+        trace, token = start_trace('request', trace_id, method=scope['method'], path=scope['path'])
+        status: Optional[int] = None
+
+        async def send_with_trace_headers(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers = list(message.get('headers', []))
+                headers.append((TRACE_HEADER.lower().encode(), trace.trace_id.encode()))
+                headers.append((b'server-timing', _server_timing(trace).encode()))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace_headers)
+        finally:
+            end_trace(trace, token)
+            await self._finish(trace, scope, status)
+
+    async def _finish(self, trace: Trace, scope, status: Optional[int]):
+        duration_ms = trace.root.duration_ms
+        record = {
+            'trace_id': trace.trace_id,
+            'method': scope['method'],
+            'path': scope['path'],
+            'query': scope.get('query_string', b'').decode('latin-1'),
+            'status': status,
+            'duration_ms': duration_ms,
+            'slow': duration_ms >= capture_config.slow_ms,
+            **trace.to_dict(),
+        }
+        trace_logger.info(json.dumps(record, default=str))
+        if not record['slow']:
+            _release_artifacts(trace)
+            return
+        try:
+            # File writes stay off the event loop; the response has already been sent
+            path = await asyncio.to_thread(self.store.save, trace, record)
+            logger.info("Slow request %s (%.0f ms) saved to %s", trace.trace_id, duration_ms, path)
+        except Exception as e:
+            _release_artifacts(trace)
+            logger.warning("Could not save slow request %s: %s", trace.trace_id, e)
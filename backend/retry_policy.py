@@ -0,0 +1,49 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Union
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How a site's scrape is hedged and retried
+
+    A backup attempt starts once the first has run longer than the site's
+    recent hedge_percentile latency (never sooner than min_hedge_delay, and
+    only once hedge_min_samples scrapes have been seen). Transient failures
+    are retried up to max_attempts times with full-jitter exponential backoff.
+    """
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 4.0
+    hedge: bool = True
+    hedge_percentile: float = 90
+    hedge_min_samples: int = 20
+    min_hedge_delay: float = 2.0
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+# Fragments of error messages that are worth another attempt: navigation
+# timeouts, network resets and pages or browsers that went away mid-scrape
+TRANSIENT_ERROR_MARKERS = (
+    'timeout',
+    'net::err_',
+    'target page, context or browser has been closed',
+    'target closed',
+    'page crashed',
+    'navigation failed',
+    'connection reset',
+    'connection closed',
+    'econnreset',
+)
+
+def is_transient(error: Union[BaseException, str]) -> bool:
+    """Whether a scrape failure is likely to go away on retry"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in TRANSIENT_ERROR_MARKERS)
+
+def backoff_delay(policy: RetryPolicy, failures: int) -> float:
+    """Full-jitter delay in seconds before the next attempt after failures failed ones"""
+    return random.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** (failures - 1)))
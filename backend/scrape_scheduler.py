@@ -0,0 +1,193 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+from scraper.latency import LatencyWindow
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket settings for one site: sustained scrapes per second and burst size"""
+    rate: float = 1.0
+    burst: int = 3
+
+    def __post_init__(self):
+        # A zero rate would never refill the bucket, and a burst below 1 never holds a whole token
+        if not self.rate > 0:
+            raise ValueError(f"RateLimit rate must be positive, got {self.rate}")
+        if self.burst < 1:
+            raise ValueError(f"RateLimit burst must be at least 1, got {self.burst}")
+
+# Outbound limits per site; Amazon blocks aggressive clients soonest
+DEFAULT_RATE_LIMITS = {
+    'flipkart': RateLimit(rate=1.0, burst=4),
+    'amazon': RateLimit(rate=0.5, burst=3),
+    'reliance': RateLimit(rate=1.0, burst=4),
+}
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate tokens per second"""
+
+    def __init__(self, limit: RateLimit):
+        self.rate = limit.rate
+        self.burst = limit.burst
+        self.tokens = float(limit.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available"""
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+class _SiteQueue:
+    def __init__(self, limit: RateLimit):
+        self.bucket = TokenBucket(limit)
+        # (grant future, enqueued at) in arrival order
+        self.waiting: Deque[Tuple[asyncio.Future, float]] = deque()
+        self.running = 0
+        self.granted = 0
+        self.wait_ms = LatencyWindow()
+
+class ScrapeScheduler:
+    """
+    Gatekeeper between the comparison service and the scrapers
+
+    Every scrape first waits for a token from its site's bucket (outbound
+    rate limit) and for one of max_concurrency global slots (bounding the
+    Chromium pages open at once). Waiting scrapes are queued FIFO per site
+    and sites take turns round-robin, so a burst for one site cannot starve
+    the others. Cancelled waiters simply leave the queue.
+    """
+
+    def __init__(self, max_concurrency: int = 6, rate_limits: Optional[Dict[str, RateLimit]] = None,
+                 default_limit: RateLimit = RateLimit()):
+        """
+        Args:
+            max_concurrency: Scrapes allowed to run at once across all sites
+            rate_limits: RateLimit per site (default: DEFAULT_RATE_LIMITS)
+            default_limit: RateLimit for sites without their own entry
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        self.max_concurrency = max_concurrency
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.default_limit = default_limit
+        self._sites: Dict[str, _SiteQueue] = {}
+        self._turn = 0
+        self._active = 0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    def _site(self, site: str) -> _SiteQueue:
+        if site not in self._sites:
+            self._sites[site] = _SiteQueue(self.rate_limits.get(site, self.default_limit))
+        return self._sites[site]
+
+    @asynccontextmanager
+    async def slot(self, site: str) -> AsyncIterator[float]:
+        """
+        Hold a scrape slot for site for the duration of the block
+
+        Yields:
+            Milliseconds spent queued before the slot was granted
+        """
+        queue = self._site(site)
+        future = asyncio.get_running_loop().create_future()
+        enqueued_at = time.monotonic()
+        queue.waiting.append((future, enqueued_at))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted in the same tick the waiter was cancelled
+                self._release(queue)
+            else:
+                self._remove(queue, future)
+            raise
+        waited_ms = (time.monotonic() - enqueued_at) * 1000
+        try:
+            yield waited_ms
+        finally:
+            self._release(queue)
+
+    def _remove(self, queue: _SiteQueue, future: asyncio.Future):
+        for entry in queue.waiting:
+            if entry[0] is future:
+                queue.waiting.remove(entry)
+                break
+
+    def _release(self, queue: _SiteQueue):
+        queue.running -= 1
+        self._active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant free slots to waiting scrapes, one site at a time in turn"""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        while self._active < self.max_concurrency:
+            now = time.monotonic()
+            names = list(self._sites)
+            for queue in self._sites.values():
+                # Waiters cancelled earlier in this tick have not removed themselves yet
+                while queue.waiting and queue.waiting[0][0].done():
+                    queue.waiting.popleft()
+            waiting = [name for name in names if self._sites[name].waiting]
+            if not waiting:
+                return
+            granted = False
+            for offset in range(len(names)):
+                name = names[(self._turn + offset) % len(names)]
+                queue = self._sites[name]
+                if queue.waiting and queue.bucket.try_take(now):
+                    self._grant(queue, now)
+                    self._turn = (self._turn + offset + 1) % len(names)
+                    granted = True
+                    break
+            if not granted:
+                # Every waiting site is out of tokens; come back when the first refills
+                delay = min(self._sites[name].bucket.delay(now) for name in waiting)
+                self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+
+    def _grant(self, queue: _SiteQueue, now: float):
+        future, enqueued_at = queue.waiting.popleft()
+        queue.running += 1
+        queue.granted += 1
+        self._active += 1
+        queue.wait_ms.add((now - enqueued_at) * 1000)
+        future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        sites = {}
+        for name, queue in self._sites.items():
+            queue.bucket._refill(now)
+            sites[name] = {
+                'queued': len(queue.waiting),
+                'running': queue.running,
+                'granted': queue.granted,
+                'tokens': round(queue.bucket.tokens, 2),
+                'rate_per_s': queue.bucket.rate,
+                'burst': queue.bucket.burst,
+                'wait': queue.wait_ms.summary(),
+            }
+        return {
+            'active': self._active,
+            'max_concurrency': self.max_concurrency,
+            'queued': sum(len(queue.waiting) for queue in self._sites.values()),
+            'sites': sites,
+        }
@@ -2,5 +2,6 @@
 from .flipkart import scrape_flipkart
 from .amazon import scrape_amazon
 from .reliance import scrape_reliance
+from .browser_pool import BrowserPool
 
-__all__ = ["scrape_flipkart", "scrape_amazon", "scrape_reliance"]
+__all__ = ["scrape_flipkart", "scrape_amazon", "scrape_reliance", "BrowserPool"]
@@ -1,167 +1,160 @@
-import asyncio
-from playwright.async_api import async_playwright
-import time
+from .browser_pool import BrowserPool, acquire_page
+from .extraction import extract_records, parse_price, absolute_url
+from .metrics import SWALLOWED_EXCEPTIONS, record_dropped
+from .http_fetch import FastPathConfig, HttpFetcher, record_source, scrape_over_http
+from .report import ScrapeReport, timed_phase
+from .resource_blocking import BlockingPolicy, TRACKER_HOST_PATTERNS, install_request_blocking
+from .readiness import ReadinessStrategy, navigate_until_ready
+from .selector_stats import selector_stats
 import re
 
-async def scrape_amazon(query: str, max_results: int = 20):
+SITE = 'amazon'
+BASE_URL = "https://www.amazon.in"
+
+# Product container selectors, raced against each other on the results page
+# (reordered at runtime by their recorded hit rates)
+CONTAINER_SELECTORS = [
+    "[data-component-type='s-search-result']",
+    ".s-result-item",
+    "[data-cy='title-recipe-label']",
+    ".a-section.a-spacing-medium",
+    "[data-asin]"
+]
+
+# Extraction starts once the DOM is parsed and enough product cards are present,
+# instead of waiting for the network to go quiet
+READINESS = ReadinessStrategy(wait_until='domcontentloaded', min_cards=8)
+
+# Try a plain HTTP fetch of the server-rendered page before using a browser
+FAST_PATH = FastPathConfig(enabled=True, min_products=3)
+
+# Images, fonts, stylesheets and tracker hosts are not needed for extraction
+BLOCKING_POLICY = BlockingPolicy(host_patterns=TRACKER_HOST_PATTERNS + ("*amazon-adsystem.com",))
+
+# Fallback selectors for the fields of each product card, in priority order
+EXTRACTION_SPEC = {
+    "link_selectors": ["h2 a", "a"],
+    "title_selectors": [
+        "h2 a span",
+        "h2 span",
+        ".a-size-medium",
+        ".a-size-base-plus",
+        "[data-cy='title-recipe-label']",
+        ".s-size-mini"
+    ],
+    "price_selectors": [
+        ".a-price-whole",
+        ".a-price .a-offscreen",
+        ".a-price-range",
+        ".a-price",
+        ".a-offscreen"
+    ],
+    "rating_selectors": [
+        ".a-icon-alt",
+        ".a-star-medium",
+        "[aria-label*='star']"
+    ],
+}
+
+async def scrape_amazon(query: str, max_results: int = 20, pool: BrowserPool = None,
+                        report: ScrapeReport = None, http: HttpFetcher = None):
     """
     Scrape Amazon for products based on search query
     
     Args:
         query: Search query string
         max_results: Maximum number of results to return
+        pool: Shared browser pool (a one-off browser is used when omitted)
+        report: Optional ScrapeReport filled in with scrape diagnostics
+        http: Shared HttpFetcher for the browserless fast path (skipped when omitted)
     
     Returns:
         List of product dictionaries
     """
-    url = f"https://www.amazon.in/s?k={query.replace(' ', '+')}"
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        
-        # Set user agent to avoid bot detection
-        await page.set_extra_http_headers({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    url = f"{BASE_URL}/s?k={query.replace(' ', '+')}"
+    container_candidates = selector_stats.order(SITE, 'container', CONTAINER_SELECTORS)
+    spec = selector_stats.ordered_spec(SITE, EXTRACTION_SPEC)
+    phases = report.phases_ms if report is not None else None
+    
+    # Server-rendered results can be parsed without opening a browser page
+    with timed_phase(phases, 'http'):
+        fast_result = await scrape_over_http(http, SITE, url, FAST_PATH, container_candidates, spec,
+                                             max_results, _build_product)
+    if fast_result is not None:
+        products, source = fast_result
+        record_source(SITE, source, report)
+        return products
+    record_source(SITE, 'browser', report)
+    
+    async with acquire_page(pool, SITE, phases) as page:
+        requests = await install_request_blocking(page, SITE, BLOCKING_POLICY)
+        if report is not None:
+            report.requests = requests
         
         try:
-            await page.goto(url, timeout=30000)
-            await page.wait_for_load_state('networkidle')
-            
-            # Try different selectors for Amazon product containers
-            selectors_to_try = [
-                "[data-component-type='s-search-result']",
-                ".s-result-item",
-                "[data-cy='title-recipe-label']",
-                ".a-section.a-spacing-medium",
-                "[data-asin]"
-            ]
-            
-            products = []
-            product_cards = []
+            # Navigate and wait for whichever product container selector fills in first
+            container_selector, wait_ms, ready_ms = await navigate_until_ready(
+                page, SITE, url, container_candidates, READINESS, max_results, phases=phases
+            )
+            selector_stats.record(SITE, 'container', container_candidates, container_selector)
+            if report is not None:
+                report.container_selector = container_selector
+                report.container_wait_ms = wait_ms
+                report.ready_ms = ready_ms
             
-            for selector in selectors_to_try:
-                try:
-                    await page.wait_for_selector(selector, timeout=5000)
-                    product_cards = await page.query_selector_all(selector)
-                    if product_cards:
-                        break
-                except:
-                    continue
-            
-            if not product_cards:
-                await browser.close()
+            if not container_selector:
                 return []
 
-            for i, card in enumerate(product_cards[:max_results]):
+            # Pull every card's fields in a single round trip
+            with timed_phase(phases, 'extract'):
+                records = await extract_records(page, container_selector, spec, max_results)
+            selector_stats.record_extraction(SITE, spec, records)
+
+            products = []
+            for record in records:
                 try:
-                    # Extract product title
-                    title = None
-                    title_selectors = [
-                        "h2 a span",
-                        "h2 span",
-                        ".a-size-medium",
-                        ".a-size-base-plus",
-                        "[data-cy='title-recipe-label']",
-                        ".s-size-mini"
-                    ]
-                    
-                    for sel in title_selectors:
-                        title_el = await card.query_selector(sel)
-                        if title_el:
-                            title = await title_el.inner_text()
-                            if title and title.strip():
-                                title = title.strip()
-                                break
-                    
-                    # Extract price
-                    price_text = None
-                    price_selectors = [
-                        ".a-price-whole",
-                        ".a-price .a-offscreen",
-                        ".a-price-range",
-                        ".a-price",
-                        ".a-offscreen"
-                    ]
-                    
-                    for sel in price_selectors:
-                        price_el = await card.query_selector(sel)
-                        if price_el:
-                            price_text = await price_el.inner_text()
-                            if price_text and '₹' in price_text:
-                                break
-                    
-                    # If no price found, try regex on card text
-                    if not price_text:
-                        try:
-                            card_text = await card.inner_text()
-                            price_matches = re.findall(r'₹[\d,]+', card_text)
-                            if price_matches:
-                                price_text = price_matches[0]
-                        except:
-                            pass
-                    
-                    # Extract rating
-                    rating = None
-                    rating_selectors = [
-                        ".a-icon-alt",
-                        ".a-star-medium",
-                        "[aria-label*='star']"
-                    ]
-                    
-                    for sel in rating_selectors:
-                        rating_el = await card.query_selector(sel)
-                        if rating_el:
-                            rating_text = await rating_el.get_attribute("aria-label")
-                            if not rating_text:
-                                rating_text = await rating_el.inner_text()
-                            if rating_text and "star" in rating_text.lower():
-                                # Extract rating number
-                                rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                                if rating_match:
-                                    rating = rating_match.group(1)
-                                    break
-                    
-                    # Extract product URL
-                    url_el = await card.query_selector("h2 a")
-                    if not url_el:
-                        url_el = await card.query_selector("a")
-                    
-                    product_url = None
-                    if url_el:
-                        href = await url_el.get_attribute("href")
-                        if href:
-                            if href.startswith('/'):
-                                product_url = f"https://www.amazon.in{href}"
-                            else:
-                                product_url = href
-                    
-                    if title and price_text and product_url:
-                        # Clean price
-                        try:
-                            cleaned_price = price_text.replace("₹", "").replace(",", "").strip()
-                            price_numbers = re.findall(r'\d+', cleaned_price)
-                            if price_numbers:
-                                price = int(''.join(price_numbers))
-                            else:
-                                price = price_text
-                        except:
-                            price = price_text
-                        
-                        products.append({
-                            "title": title,
-                            "price": price,
-                            "url": product_url,
-                            "rating": rating,
-                            "site": "Amazon"
-                        })
-                        
-                except Exception as e:
+                    product = _build_product(record)
+                    if product:
+                        products.append(product)
+                except Exception:
+                    SWALLOWED_EXCEPTIONS.inc(site=SITE, location='build_product')
                     continue
-            
-            await browser.close()
             return products
             
         except Exception as e:
-            await browser.close()
+            # Reported so the caller can tell a failed scrape from an empty result
+            if report is not None:
+                report.error = str(e)
             return []
+
+def _build_product(record):
+    """Turn a raw extracted card record into a product dictionary"""
+    title = record.get('title')
+    if title:
+        title = title.strip()
+
+    price_text = record.get('price_text')
+
+    # Extract rating number from the first star label
+    rating = None
+    for candidate in record.get('ratings', []):
+        rating_text = candidate.get('label') or candidate.get('text')
+        if rating_text and "star" in rating_text.lower():
+            rating_match = re.search(r'(\d+\.?\d*)', rating_text)
+            if rating_match:
+                rating = rating_match.group(1)
+                break
+
+    product_url = absolute_url(record.get('href'), BASE_URL)
+
+    if not (title and price_text and product_url):
+        record_dropped(SITE, title, price_text, product_url)
+        return None
+
+    return {
+        "title": title,
+        "price": parse_price(price_text),
+        "url": product_url,
+        "rating": rating,
+        "site": "Amazon"
+    }
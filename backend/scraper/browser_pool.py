@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from playwright.async_api import async_playwright
+from .metrics import BROWSER_LAUNCH_SECONDS
+from .tracing import add_span, capture_config, current_trace
+
+logger = logging.getLogger(__name__)
+
+# Set user agent to avoid bot detection
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+class BrowserPool:
+    """
+    Process-wide Chromium instance shared by all scrapers
+
+    A single browser is launched once and hands out pages from isolated
+    browser contexts. Contexts are kept per site and recycled between
+    requests, together with their last page so consecutive scrapes of a
+    site skip page creation; the number of concurrently leased pages is
+    bounded.
+    """
+
+    def __init__(self, max_pages: int = 6, max_context_uses: int = 50, headless: bool = True,
+                 reuse_pages: bool = True):
+        """
+        Args:
+            max_pages: Maximum number of pages leased at the same time
+            max_context_uses: Number of leases after which a context is discarded
+            headless: Run Chromium without a visible window
+            reuse_pages: Keep a context's page open for its next lease instead of closing it
+        """
+        self.max_pages = max_pages
+        self.max_context_uses = max_context_uses
+        self.headless = headless
+        self.reuse_pages = reuse_pages
+        self._playwright = None
+        self._browser = None
+        self._start_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._idle_contexts: Dict[str, List] = {}
+        self._context_uses: Dict[int, int] = {}
+        # id(context) -> page kept open for the context's next lease
+        self._idle_pages: Dict[int, object] = {}
+        self.launches = 0
+        self.open_pages = 0
+        self.pages_reused = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self):
+        """Launch the shared browser if it is not running yet"""
+        if self.is_running:
+            return
+        async with self._start_lock:
+            if self.is_running:
+                return
+            # The previous browser crashed or was closed; drop its contexts
+            self._idle_contexts.clear()
+            self._context_uses.clear()
+            self._idle_pages.clear()
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            launch_start = time.perf_counter()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            BROWSER_LAUNCH_SECONDS.observe(time.perf_counter() - launch_start)
+            self.launches += 1
+
+    async def close(self):
+        """Close all contexts, the browser and the Playwright driver"""
+        async with self._start_lock:
+            for contexts in self._idle_contexts.values():
+                for context in contexts:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+            self._idle_contexts.clear()
+            self._context_uses.clear()
+            self._idle_pages.clear()
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _acquire_context(self, site: str):
+        idle = self._idle_contexts.get(site)
+        if idle:
+            return idle.pop()
+        context = await self._browser.new_context(user_agent=USER_AGENT)
+        self._context_uses[id(context)] = 0
+        return context
+
+    async def _lease_page(self, context):
+        page = self._idle_pages.pop(id(context), None)
+        if page is not None and not page.is_closed():
+            try:
+                # Drop the previous lease's request interception before handing it out again
+                await page.unroute_all(behavior='ignoreErrors')
+                self.pages_reused += 1
+                return page
+            except Exception:
+                pass
+        return await context.new_page()
+
+    async def _release_context(self, site: str, context, healthy: bool, page=None):
+        uses = self._context_uses.get(id(context), 0) + 1
+        self._context_uses[id(context)] = uses
+        if healthy and uses < self.max_context_uses and self.is_running:
+            if page is not None:
+                self._idle_pages[id(context)] = page
+            self._idle_contexts.setdefault(site, []).append(context)
+            return
+        self._context_uses.pop(id(context), None)
+        self._idle_pages.pop(id(context), None)
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def page(self, site: str = 'default'):
+        """
+        Lease a page from a recycled per-site browser context
+
+        Args:
+            site: Site name used to keep contexts (cookies, cache) apart
+
+        Yields:
+            A Playwright page without request routes, either new or kept open
+            from the context's previous lease (closed instead when page reuse
+            is off or the block was cancelled)
+        """
+        async with self._semaphore:
+            await self.start()
+            context = await self._acquire_context(site)
+            healthy = False
+            reusable = False
+            page = None
+            try:
+                page = await self._lease_page(context)
+                self.open_pages += 1
+                yield page
+                healthy = True
+                reusable = self.reuse_pages
+            except asyncio.CancelledError:
+                # The caller gave up (deadline, client disconnect); the context itself is fine
+                healthy = True
+                raise
+            finally:
+                if page is not None:
+                    self.open_pages -= 1
+                    if not reusable:
+                        try:
+                            await page.close()
+                        except Exception:
+                            healthy = False
+                        page = None
+                await self._release_context(site, context, healthy, page)
+
+    def stats(self) -> Dict[str, int]:
+        """Current pool usage"""
+        return {
+            'running': self.is_running,
+            'launches': self.launches,
+            'max_pages': self.max_pages,
+            'open_pages': self.open_pages,
+            'idle_pages': len(self._idle_pages),
+            'pages_reused': self.pages_reused,
+            'idle_contexts': sum(len(c) for c in self._idle_contexts.values()),
+        }
+
+@asynccontextmanager
+async def acquire_page(pool: Optional[BrowserPool], site: str, phases: Optional[Dict[str, float]] = None):
+    """
+    Lease a page from the given pool, or from a one-off browser when
+    no pool is passed (e.g. when a scraper is called directly from a script)
+
+    The time until the page is handed out is recorded as phases['page'].
+    Inside a traced request, slow leases are captured for diagnosis (see
+    tracing.CaptureConfig).
+    """
+    start = time.perf_counter()
+
+    def leased():
+        if phases is not None:
+            phases['page'] = round((time.perf_counter() - start) * 1000, 1)
+        add_span('page', start)
+
+    if pool is not None:
+        async with pool.page(site) as page:
+            leased()
+            async with _captured_if_slow(page, site):
+                yield page
+        return
+
+    temporary_pool = BrowserPool(max_pages=1)
+    try:
+        async with temporary_pool.page(site) as page:
+            leased()
+            async with _captured_if_slow(page, site):
+                yield page
+    finally:
+        await temporary_pool.close()
+
+@asynccontextmanager
+async def _captured_if_slow(page, site: str):
+    """Attach the page's HTML (and Playwright trace) to the request trace when the lease runs long"""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    recording = False
+    if capture_config.playwright_traces:
+        try:
+            await page.context.tracing.start(snapshots=True, screenshots=True)
+            recording = True
+        except Exception as e:
+            logger.debug("Could not start a Playwright trace: %s", e)
+    start = time.perf_counter()
+    cancelled = False
+    try:
+        yield
+    except asyncio.CancelledError:
+        # Nobody waits for a cancelled scrape; skip the snapshot and just stop recording
+        cancelled = True
+        raise
+    finally:
+        slow = not cancelled and (time.perf_counter() - start) * 1000 >= capture_config.slow_ms
+        try:
+            if slow and capture_config.html_snapshots:
+                html = await asyncio.wait_for(page.content(), 5)
+                trace.add_artifact(f"{site}-{len(trace.artifacts)}.html", html.encode())
+            if recording:
+                if slow:
+                    fd, path = tempfile.mkstemp(suffix='.zip', prefix=f'{site}-trace-')
+                    os.close(fd)
+                    await page.context.tracing.stop(path=path)
+                    trace.add_artifact(f"{site}-{len(trace.artifacts)}.zip", path=path)
+                else:
+                    await page.context.tracing.stop()
+        except Exception as e:
+            logger.debug("Could not capture slow %s page: %s", site, e)
@@ -0,0 +1,115 @@
+import re
+from typing import Any, Dict, List, Optional, Union
+
+# Runs inside the page and extracts every card in a single round trip.
+# Each field walks its selector list in order, exactly like the per-card
+# query_selector loops did, but without a CDP call per probe.
+EXTRACT_CARDS_JS = r"""
+({container, limit, spec}) => {
+    const PRICE_RE = /₹[\d,]+/;
+    const text = (el) => (el && el.innerText ? el.innerText : '');
+    const first = (card, selectors, accept) => {
+        for (const sel of selectors || []) {
+            let el;
+            try { el = card.querySelector(sel); } catch (e) { continue; }
+            if (!el) continue;
+            const value = text(el);
+            if (accept(value)) return [value, sel];
+        }
+        return [null, null];
+    };
+
+    const cards = Array.from(document.querySelectorAll(container)).slice(0, limit);
+    return cards.map((card) => {
+        let link = null;
+        for (const sel of spec.link_selectors || ['a']) {
+            link = card.querySelector(sel);
+            if (link) break;
+        }
+
+        const [title, titleSelector] = first(card, spec.title_selectors, (v) => v.trim().length > 0);
+        let textTitle = null;
+        if (!title && spec.title_text_fallback) {
+            const [minLen, maxLen] = spec.title_text_fallback;
+            for (const el of card.querySelectorAll('span, div, a')) {
+                const value = text(el);
+                if (value.length > minLen && value.length < maxLen) { textTitle = value.trim(); break; }
+            }
+        }
+
+        let [price, priceSelector] = first(card, spec.price_selectors, (v) => v.includes('₹'));
+        if (!price) {
+            const match = text(card).match(PRICE_RE);
+            if (match) price = match[0];
+        }
+        if (!price && spec.price_element_fallback) {
+            for (const el of card.querySelectorAll('*')) {
+                const value = text(el);
+                if (value.includes('₹') && value.length < 20) { price = value.trim(); break; }
+            }
+        }
+
+        const ratings = [];
+        for (const sel of spec.rating_selectors || []) {
+            let el;
+            try { el = card.querySelector(sel); } catch (e) { continue; }
+            if (el) ratings.push({text: text(el), label: el.getAttribute('aria-label'), selector: sel});
+        }
+
+        return {
+            href: link ? link.getAttribute('href') : null,
+            link_title: link ? link.getAttribute('title') : null,
+            title: title,
+            text_title: textTitle,
+            price_text: price,
+            ratings: ratings,
+            matched: {
+                title: titleSelector,
+                price: priceSelector,
+                rating: ratings.length ? ratings[0].selector : null,
+            },
+        };
+    });
+}
+"""
+
+async def extract_records(page, container_selector: str, spec: Dict[str, Any], max_results: int) -> List[Dict[str, Any]]:
+    """
+    Extract raw title/price/rating/url records for all product cards
+
+    Args:
+        page: Playwright page showing a search results page
+        container_selector: Selector matching one element per product card
+        spec: Site selector lists (link_selectors, title_selectors,
+            price_selectors, rating_selectors) and optional fallbacks
+            (title_text_fallback as [min_len, max_len], price_element_fallback)
+        max_results: Maximum number of cards to extract
+
+    Returns:
+        List of raw record dictionaries, one per card. Each record's
+        'matched' entry names the selector that satisfied each field.
+    """
+    return await page.evaluate(
+        EXTRACT_CARDS_JS,
+        {'container': container_selector, 'limit': max_results, 'spec': spec}
+    )
+
+def parse_price(price_text: str) -> Union[int, str]:
+    """Convert a price such as '₹1,23,456' to an int, keeping the raw text if it has no digits"""
+    try:
+        # Remove ₹ symbol and commas, then keep only the digits
+        cleaned_price = price_text.replace("₹", "").replace(",", "").strip()
+        price_numbers = re.findall(r'\d+', cleaned_price)
+        if price_numbers:
+            return int(''.join(price_numbers))
+    except Exception:
+        pass
+    return price_text
+
+def absolute_url(href: Optional[str], base: str) -> Optional[str]:
+    """Prefix site-relative links with the site origin"""
+    if not href:
+        return None
+    if href.startswith('/'):
+        return f"{base}{href}"
+    return href
@@ -1,206 +1,197 @@
-import asyncio
-from playwright.async_api import async_playwright
-import time
-import re
+from .browser_pool import BrowserPool, acquire_page
+from .extraction import extract_records, parse_price, absolute_url
+from .metrics import SWALLOWED_EXCEPTIONS, record_dropped
+from .http_fetch import FastPathConfig, HttpFetcher, record_source, scrape_over_http
+from .report import ScrapeReport, timed_phase
+from .resource_blocking import BlockingPolicy, install_request_blocking
+from .readiness import ReadinessStrategy, navigate_until_ready
+from .selector_stats import selector_stats
+from .structured_data import (
+    StructuredDataConfig, ResponseCapture, enough_products, products_from_page
+)
 
-async def scrape_flipkart(query: str, max_results: int = 20):
+SITE = 'flipkart'
+BASE_URL = "https://www.flipkart.com"
+
+# Product container selectors, raced against each other on the results page
+# (reordered at runtime by their recorded hit rates)
+CONTAINER_SELECTORS = [
+    "._1AtVbE",  # Your original
+    "[data-id]",  # Product containers often have data-id
+    "._13oc-S",   # Common product card class
+    "._4rR01T",   # Title containers
+    "[class*='product']",  # Any class containing 'product'
+    "div[data-id]",  # More specific data-id selector
+    "._2kHMtA",   # Another common product card class
+    "._1fQZEK",   # Product container
+    "._3pLy-c",   # Another product container
+    "div[class*='_1AtVbE']",  # Variations
+]
+
+# Extraction starts once the DOM is parsed and enough product cards are present,
+# instead of waiting for the network to go quiet
+READINESS = ReadinessStrategy(wait_until='domcontentloaded', min_cards=8)
+
+# Try a plain HTTP fetch of the server-rendered page before using a browser
+FAST_PATH = FastPathConfig(enabled=True, min_products=3)
+
+# Search results embedded in the page state and returned by the page-fetch API;
+# preferred over DOM scraping since they survive class-name churn
+STRUCTURED_DATA = StructuredDataConfig(
+    site_label="Flipkart",
+    url_base=BASE_URL,
+    state_globals=('__INITIAL_STATE__',),
+    state_script_ids=(),
+    api_url_patterns=('/api/4/page/fetch',),
+    title_keys=('titles.title', 'title'),
+    price_keys=('pricing.finalPrice.value', 'pricing.finalPrice', 'finalPrice'),
+    url_keys=('baseUrl', 'smartUrl'),
+    rating_keys=('rating.average',),
+)
+
+# Images, fonts, stylesheets and tracker hosts are not needed for extraction
+BLOCKING_POLICY = BlockingPolicy()
+
+# Fallback selectors for the fields of each product card, in priority order
+EXTRACTION_SPEC = {
+    "link_selectors": ["a"],
+    "title_selectors": ["._4rR01T", "a[title]", "._2WkVRV", "[class*='title']", "h2", "h3"],
+    # Last resort: any text that looks like a reasonable product name length
+    "title_text_fallback": [20, 100],
+    "price_selectors": [
+        "._30jeq3",  # Common price class
+        "._1_WHN1",  # Another price class
+        "[class*='price']",  # Any class containing 'price'
+        "._3I9_wc",  # Current price
+        "._25b18c",  # Price text
+        "span[class*='price']",  # Span with price class
+        "div[class*='price']",   # Div with price class
+        "._1vC4OE",  # Another price variant
+        "._2c7tJZ",  # Price container
+        "._4b5DiR",  # Another common price class
+        "._13fcjj",  # Price container
+        "._1fQZEK",  # Discounted price
+        "._3tbKJL",  # Original price
+        "._2rQ-NK",  # Price text
+        "._3auQ3N",  # Price element
+        "._1sfVt7",  # Price container
+        "._2Tpdn3",  # Price text
+        "._3HiVg0",  # Price element
+        "._2nE8_R",  # Price container
+    ],
+    # Last resort: any short element with a rupee symbol
+    "price_element_fallback": True,
+    "rating_selectors": ["._3LWZlK", "._1lRcqv", "[class*='rating']", "._3Ay6Sb", "._1i0wk8"],
+}
+
+async def scrape_flipkart(query: str, max_results: int = 20, pool: BrowserPool = None,
+                          report: ScrapeReport = None, http: HttpFetcher = None):
     """
     Scrape Flipkart for products based on search query
     
     Args:
         query: Search query string
         max_results: Maximum number of results to return
+        pool: Shared browser pool (a one-off browser is used when omitted)
+        report: Optional ScrapeReport filled in with scrape diagnostics
+        http: Shared HttpFetcher for the browserless fast path (skipped when omitted)
     
     Returns:
         List of product dictionaries
     """
-    url = f"https://www.flipkart.com/search?q={query.replace(' ', '+')}"
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)  # Headless for production API
-        page = await browser.new_page()
-        
-        # Set user agent to avoid bot detection
-        await page.set_extra_http_headers({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        
-        await page.goto(url)
+    url = f"{BASE_URL}/search?q={query.replace(' ', '+')}"
+    container_candidates = selector_stats.order(SITE, 'container', CONTAINER_SELECTORS)
+    spec = selector_stats.ordered_spec(SITE, EXTRACTION_SPEC)
+    phases = report.phases_ms if report is not None else None
+    
+    # Server-rendered results can be parsed without opening a browser page
+    with timed_phase(phases, 'http'):
+        fast_result = await scrape_over_http(http, SITE, url, FAST_PATH, container_candidates, spec,
+                                             max_results, _build_product, STRUCTURED_DATA)
+    if fast_result is not None:
+        products, source = fast_result
+        record_source(SITE, source, report)
+        return products
+    
+    async with acquire_page(pool, SITE, phases) as page:
+        requests = await install_request_blocking(page, SITE, BLOCKING_POLICY)
+        if report is not None:
+            report.requests = requests
         
-        # Wait for page to load and try multiple selectors
-        await page.wait_for_load_state('networkidle')
+        # Listen for the search API response while the page loads
+        capture = ResponseCapture(page, STRUCTURED_DATA)
         
-        # Try different possible selectors for product containers
-        selectors_to_try = [
-            "._1AtVbE",  # Your original
-            "[data-id]",  # Product containers often have data-id
-            "._13oc-S",   # Common product card class
-            "._4rR01T",   # Title containers
-            "[class*='product']",  # Any class containing 'product'
-            "div[data-id]",  # More specific data-id selector
-            "._2kHMtA",   # Another common product card class
-            "._1fQZEK",   # Product container
-            "._3pLy-c",   # Another product container
-            "div[class*='_1AtVbE']",  # Variations
-        ]
+        # Navigate and wait for whichever product container selector fills in first
+        container_selector, wait_ms, ready_ms = await navigate_until_ready(
+            page, SITE, url, container_candidates, READINESS, max_results, capture.ready, phases
+        )
+        if container_selector or not capture.ready.is_set():
+            selector_stats.record(SITE, 'container', container_candidates, container_selector)
+        if report is not None:
+            report.container_selector = container_selector
+            report.container_wait_ms = wait_ms
+            report.ready_ms = ready_ms
         
-        products = []
-        product_cards = []
+        # Prefer the JSON the page was built from over scraping its markup
+        with timed_phase(phases, 'extract'):
+            products = await products_from_page(page, capture, STRUCTURED_DATA, max_results)
+        if enough_products(products, STRUCTURED_DATA, max_results):
+            record_source(SITE, 'browser_json', report)
+            return products
+        record_source(SITE, 'browser', report)
         
-        for selector in selectors_to_try:
-            try:
-                await page.wait_for_selector(selector, timeout=5000)
-                product_cards = await page.query_selector_all(selector)
-                if product_cards:
-                    break
-            except:
-                continue
-        
-        if not product_cards:
-            await browser.close()
+        if not container_selector:
             return []
 
-        for i, card in enumerate(product_cards[:max_results]):  # Limit to max_results
+        # Pull every card's fields in a single round trip
+        with timed_phase(phases, 'extract'):
+            records = await extract_records(page, container_selector, spec, max_results)
+        selector_stats.record_extraction(SITE, spec, records)
+
+        products = []
+        for record in records:
             try:
-                # Extract product URL first
-                link_el = await card.query_selector("a")
-                url_partial = await link_el.get_attribute("href") if link_el else None
-                full_url = f"https://www.flipkart.com{url_partial}" if url_partial else None
-
-                # Extract product name from URL if available
-                title = None
-                if url_partial:
-                    try:
-                        # Flipkart URLs format: /product-name/p/product-id
-                        url_parts = url_partial.split('/')
-                        if len(url_parts) >= 2:
-                            # Get the product name part and clean it
-                            product_name_part = url_parts[1]
-                            # Replace dashes with spaces and capitalize
-                            title = product_name_part.replace('-', ' ').title()
-                    except Exception as e:
-                        pass
-
-                # Try multiple selectors for title as backup
-                if not title:
-                    title_selectors = ["._4rR01T", "a[title]", "._2WkVRV", "[class*='title']", "h2", "h3"]
-                    for sel in title_selectors:
-                        title_el = await card.query_selector(sel)
-                        if title_el:
-                            title = await title_el.inner_text()
-                            if title.strip():
-                                break
-
-                # Additional fallback: try to get title attribute from the link itself
-                if not title and link_el:
-                    try:
-                        title = await link_el.get_attribute("title")
-                    except Exception as e:
-                        pass
-
-                # Last resort: try to find any text that looks like a product name
-                if not title:
-                    try:
-                        # Look for longer text elements that might be product names
-                        text_elements = await card.query_selector_all("span, div, a")
-                        for elem in text_elements:
-                            text = await elem.inner_text()
-                            if text and len(text) > 20 and len(text) < 100:  # Reasonable product name length
-                                title = text.strip()
-                                break
-                    except Exception as e:
-                        pass
-                
-                # Try multiple selectors for price with more comprehensive list
-                price_text = None
-                price_selectors = [
-                    "._30jeq3",  # Common price class
-                    "._1_WHN1",  # Another price class
-                    "[class*='price']",  # Any class containing 'price'
-                    "._3I9_wc",  # Current price
-                    "._25b18c",  # Price text
-                    "span[class*='price']",  # Span with price class
-                    "div[class*='price']",   # Div with price class
-                    "._1vC4OE",  # Another price variant
-                    "._2c7tJZ",  # Price container
-                    "._4b5DiR",  # Another common price class
-                    "._13fcjj",  # Price container
-                    "._1fQZEK",  # Discounted price
-                    "._3tbKJL",  # Original price
-                    "._2rQ-NK",  # Price text
-                    "._3auQ3N",  # Price element
-                    "._1sfVt7",  # Price container
-                    "._2Tpdn3",  # Price text
-                    "._3HiVg0",  # Price element
-                    "._2nE8_R",  # Price container
-                ]
-                
-                for sel in price_selectors:
-                    try:
-                        price_el = await card.query_selector(sel)
-                        if price_el:
-                            price_text = await price_el.inner_text()
-                            if price_text and '₹' in price_text:
-                                break
-                    except Exception as e:
-                        continue
-                
-                # If still no price found, try to get all text and find price pattern
-                if not price_text:
-                    try:
-                        card_text = await card.inner_text()
-                        
-                        # Look for patterns like ₹1,23,456 or ₹12345
-                        price_matches = re.findall(r'₹[\d,]+', card_text)
-                        if price_matches:
-                            price_text = price_matches[0]
-                    except Exception as e:
-                        pass
-                
-                # Last resort: try to find any element with rupee symbol
-                if not price_text:
-                    try:
-                        all_elements = await card.query_selector_all("*")
-                        for elem in all_elements:
-                            text = await elem.inner_text()
-                            if text and '₹' in text and len(text) < 20:  # Reasonable price length
-                                price_text = text.strip()
-                                break
-                    except Exception as e:
-                        pass
-
-                # Try multiple selectors for rating
-                rating = None
-                rating_selectors = ["._3LWZlK", "._1lRcqv", "[class*='rating']", "._3Ay6Sb", "._3LWZlK", "._1i0wk8"]
-                for sel in rating_selectors:
-                    rating_el = await card.query_selector(sel)
-                    if rating_el:
-                        rating = await rating_el.inner_text()
-                        break
-
-                if title and price_text and full_url:
-                    # Clean price text
-                    try:
-                        # Remove ₹ symbol and commas, then convert to int
-                        cleaned_price = price_text.replace("₹", "").replace(",", "").strip()
-                        # Extract only numbers
-                        price_numbers = re.findall(r'\d+', cleaned_price)
-                        if price_numbers:
-                            price = int(''.join(price_numbers))
-                        else:
-                            price = price_text
-                    except:
-                        price = price_text
-
-                    products.append({
-                        "title": title,
-                        "price": price,
-                        "url": full_url,
-                        "rating": rating,
-                        "site": "Flipkart"
-                    })
-                    
-            except Exception as e:
+                product = _build_product(record)
+                if product:
+                    products.append(product)
+            except Exception:
+                SWALLOWED_EXCEPTIONS.inc(site=SITE, location='build_product')
                 continue
 
-        await browser.close()
         return products
+
+def _title_from_url(url_partial: str):
+    """Flipkart URLs format: /product-name/p/product-id"""
+    url_parts = url_partial.split('/')
+    if len(url_parts) >= 2:
+        # Replace dashes with spaces and capitalize
+        return url_parts[1].replace('-', ' ').title()
+    return None
+
+def _build_product(record):
+    """Turn a raw extracted card record into a product dictionary"""
+    url_partial = record.get('href')
+    full_url = absolute_url(url_partial, BASE_URL)
+
+    # Extract product name from URL if available, then fall back to the page text
+    title = _title_from_url(url_partial) if url_partial else None
+    if not title:
+        title = record.get('title') or record.get('link_title') or record.get('text_title')
+
+    price_text = record.get('price_text')
+
+    rating = None
+    if record.get('ratings'):
+        rating = record['ratings'][0]['text']
+
+    if not (title and price_text and full_url):
+        record_dropped(SITE, title, price_text, full_url)
+        return None
+
+    return {
+        "title": title,
+        "price": parse_price(price_text),
+        "url": full_url,
+        "rating": rating,
+        "site": "Flipkart"
+    }
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .browser_pool import USER_AGENT
+from .metrics import SWALLOWED_EXCEPTIONS
+from .report import ScrapeReport
+from .structured_data import StructuredDataConfig, enough_products, products_from_json, state_from_html
+from . import static_extraction
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional fast path dependency
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class FastPathConfig:
+    """Whether a site is first tried over plain HTTP, and what counts as enough results"""
+    enabled: bool = True
+    min_products: int = 3
+    # Total seconds the fetch may take; kept short so a site stalling plain HTTP
+    # clients leaves most of the scrape's budget to the browser fallback
+    timeout: float = 2.5
+
+class HttpFetcher:
+    """Shared HTTP client with pooled keep-alive connections for the browserless fast path"""
+
+    def __init__(self, max_connections: int = 20, timeout: float = 10.0):
+        """
+        Args:
+            max_connections: Maximum number of open connections across all sites
+            timeout: Per-request timeout in seconds
+        """
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._client = None
+
+    @property
+    def is_available(self) -> bool:
+        return httpx is not None and static_extraction.is_available()
+
+    @property
+    def can_probe(self) -> bool:
+        return httpx is not None
+
+    async def start(self):
+        if self._client is None and httpx is not None:
+            self._client = httpx.AsyncClient(
+                headers={
+                    'User-Agent': USER_AGENT,
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                    'Accept-Language': 'en-IN,en;q=0.9',
+                },
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_text(self, url: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Fetch a page body, or None on any non-200 response, network error or timeout
+
+        Args:
+            url: Page URL
+            timeout: Seconds the whole fetch may take (default: the client's per-phase timeout)
+        """
+        await self.start()
+        try:
+            response = await asyncio.wait_for(self._client.get(url), timeout)
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            logger.debug("HTTP fetch of %s failed: %s", url, e or type(e).__name__)
+            return None
+        if response.status_code != 200:
+            logger.debug("HTTP fetch of %s returned %s", url, response.status_code)
+            return None
+        return response.text
+
+    async def probe(self, url: str) -> int:
+        """
+        Lightweight reachability check
+
+        Returns:
+            HTTP status code of the response (network errors are raised)
+        """
+        await self.start()
+        async with self._client.stream('GET', url) as response:
+            # Only the status line and headers are needed
+            return response.status_code
+
+# Which path served each site since process start
+fast_path_stats: Dict[str, Dict[str, int]] = {}
+
+def record_source(site: str, source: str, report: Optional[ScrapeReport] = None):
+    """Count which path (http, browser, ...) served a scrape"""
+    counts = fast_path_stats.setdefault(site, {})
+    counts[source] = counts.get(source, 0) + 1
+    if report is not None:
+        report.source = source
+
+async def scrape_over_http(http: Optional[HttpFetcher], site: str, url: str, config: FastPathConfig,
+                           container_selectors: List[str], spec: Dict[str, Any], max_results: int,
+                           build_product: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                           structured: Optional[StructuredDataConfig] = None
+                           ) -> Optional[Tuple[List[Dict[str, Any]], str]]:
+    """
+    Try to scrape a search page without a browser
+
+    The page's embedded JSON state is used when it has enough products;
+    otherwise the HTML is parsed with the site's DOM selectors.
+
+    Args:
+        http: Shared HttpFetcher (the fast path is skipped when None)
+        site: Site name
+        url: Search results URL
+        config: The site's FastPathConfig
+        container_selectors: Product container candidates in priority order
+        spec: Site extraction spec
+        max_results: Maximum number of results
+        build_product: The site's record-to-product function
+        structured: The site's StructuredDataConfig, if it ships embedded state
+
+    Returns:
+        Tuple of (products, source) where source is 'http_json' or 'http', or
+        None when too few products were found so the caller falls back to the browser
+    """
+    if http is None or not config.enabled or not http.is_available:
+        return None
+
+    html = await http.get_text(url, config.timeout)
+    if not html:
+        _count_fallback(site)
+        return None
+
+    # Parsing is CPU-bound; keep it off the event loop
+    if structured is not None and structured.enabled:
+        try:
+            payloads = await asyncio.to_thread(state_from_html, html, structured)
+            products = products_from_json(payloads, structured, max_results)
+            if enough_products(products, structured, max_results):
+                return products, 'http_json'
+        except Exception as e:
+            SWALLOWED_EXCEPTIONS.inc(site=site, location='embedded_state')
+            logger.debug("Embedded state of %s could not be used: %s", url, e)
+
+    try:
+        _, records = await asyncio.to_thread(
+            static_extraction.extract_records_from_html, html, container_selectors, spec, max_results
+        )
+    except Exception as e:
+        SWALLOWED_EXCEPTIONS.inc(site=site, location='static_parse')
+        logger.debug("Static parse of %s failed: %s", url, e)
+        records = []
+    products = []
+    for record in records:
+        try:
+            product = build_product(record)
+            if product:
+                products.append(product)
+        except Exception:
+            SWALLOWED_EXCEPTIONS.inc(site=site, location='build_product')
+            continue
+
+    if len(products) < min(config.min_products, max_results):
+        _count_fallback(site)
+        return None
+    return products, 'http'
+
+def _count_fallback(site: str):
+    counts = fast_path_stats.setdefault(site, {})
+    counts['http_fallbacks'] = counts.get('http_fallbacks', 0) + 1
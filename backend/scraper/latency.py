@@ -0,0 +1,34 @@
+import math
+from collections import deque
+from typing import Dict, Optional
+
+class LatencyWindow:
+    """Rolling window of recent latency samples in milliseconds"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, value_ms: float):
+        self._samples.append(value_ms)
+        self.count += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Nearest-rank percentile (0-100) of the window, or None when empty"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            'samples': self.count,
+            'p50_ms': self.percentile(50),
+            'p90_ms': self.percentile(90),
+            'p99_ms': self.percentile(99),
+            'max_ms': max(self._samples) if self._samples else None,
+        }
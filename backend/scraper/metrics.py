@@ -0,0 +1,182 @@
+import math
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# Upper bounds in seconds; scrape phases range from a few ms (cached DOM reads) to a minute (slow navigations)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally per label set"""
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class Gauge(_Metric):
+    """
+    Current value read at scrape time
+
+    The value comes from a callback set with set_function, which returns a
+    number (no labels) or a dict of label-value tuples to numbers.
+    """
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], Union[float, Dict[LabelValues, float]]]] = None
+
+    def set_function(self, function: Callable[[], Union[float, Dict[LabelValues, float]]]):
+        self._function = function
+
+    def _samples(self) -> Iterator[str]:
+        if self._function is None:
+            return
+        values = self._function()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, optionally per label set"""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [per-bucket counts, sum]
+        self._series: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+
+    def _samples(self) -> Iterator[str]:
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(round(total, 6))}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+class MetricsRegistry:
+    """Process-wide set of metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+metrics = MetricsRegistry()
+
+BROWSER_LAUNCH_SECONDS = metrics.histogram(
+    'compareason_browser_launch_seconds', 'Time to launch the shared Chromium instance')
+SCRAPE_PHASE_SECONDS = metrics.histogram(
+    'compareason_scrape_phase_seconds',
+    'Time spent per scrape phase: http, page, navigate, ready, container, extract',
+    ('site', 'phase'))
+SCRAPE_SECONDS = metrics.histogram(
+    'compareason_scrape_seconds', 'Duration of completed site scrapes by outcome', ('site', 'outcome'))
+PRODUCTS_RETURNED = metrics.counter(
+    'compareason_products_returned_total', 'Products returned by scrapes', ('site', 'source'))
+PRODUCTS_DROPPED = metrics.counter(
+    'compareason_products_dropped_total', 'Product cards dropped for a missing field', ('site', 'reason'))
+SELECTOR_LOOKUPS = metrics.counter(
+    'compareason_selector_lookups_total', 'Selector probes by outcome (hit or miss)',
+    ('site', 'group', 'selector', 'result'))
+SWALLOWED_EXCEPTIONS = metrics.counter(
+    'compareason_swallowed_exceptions_total', 'Exceptions caught and skipped while building products',
+    ('site', 'location'))
+BROWSERS_OPEN = metrics.gauge('compareason_browsers_open', 'Running Chromium instances')
+PAGES_OPEN = metrics.gauge('compareason_pages_open', 'Browser pages leased to scrapers')
+PAGES_IDLE = metrics.gauge('compareason_pages_idle', 'Browser pages kept open for reuse')
+
+def record_dropped(site: str, title, price, url):
+    """Count a product card dropped for the first of its required fields that is missing"""
+    reason = 'missing_title' if not title else 'missing_price' if not price else 'missing_url'
+    PRODUCTS_DROPPED.inc(site=site, reason=reason)
+
+def observe_phases(site: str, report):
+    """Feed a finished scrape attempt's phase timings to the phase histogram"""
+    for phase, value_ms in report.phases_ms.items():
+        SCRAPE_PHASE_SECONDS.observe(value_ms / 1000, site=site, phase=phase)
+    if report.container_wait_ms is not None:
+        SCRAPE_PHASE_SECONDS.observe(report.container_wait_ms / 1000, site=site, phase='container')
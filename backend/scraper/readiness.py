@@ -0,0 +1,96 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .latency import LatencyWindow
+from .report import timed_phase
+from .tracing import add_span
+from .selector_race import wait_for_any_selector, first_matching_selector
+
+@dataclass(frozen=True)
+class ReadinessStrategy:
+    """
+    When a results page counts as ready for extraction
+
+    Navigation only waits for the given load state, then the page is
+    ready as soon as a product container selector matches at least
+    min_cards elements (capped at the number of results requested), or
+    matches fewer cards whose count has not changed for settle_ms (a
+    query with only a few results).
+    """
+    wait_until: str = 'domcontentloaded'
+    min_cards: int = 1
+    settle_ms: float = 500
+    timeout_ms: float = 10000
+    navigation_timeout_ms: float = 30000
+
+# Recent time-to-ready samples per site, measured from the start of navigation
+readiness_stats: Dict[str, LatencyWindow] = {}
+
+async def navigate_until_ready(page, site: str, url: str, container_selectors: List[str],
+                               strategy: ReadinessStrategy, max_results: int,
+                               ready_event: Optional[asyncio.Event] = None,
+                               phases: Optional[Dict[str, float]] = None
+                               ) -> Tuple[Optional[str], float, Optional[float]]:
+    """
+    Navigate to a results page and wait until product cards are in the DOM
+
+    Args:
+        page: Playwright page
+        site: Site name the time-to-ready is recorded under
+        url: Search results URL
+        container_selectors: Product container candidates in priority order
+        strategy: The site's ReadinessStrategy
+        max_results: Number of results requested
+        ready_event: Optional event that also ends the wait when set (e.g. the
+            search API response was captured before cards were rendered)
+        phases: Optional dict receiving 'navigate' and 'ready' durations in milliseconds
+
+    Returns:
+        Tuple of (winning container selector or None, container wait in
+        milliseconds, time-to-ready in milliseconds or None if never ready)
+    """
+    start_time = time.perf_counter()
+    with timed_phase(phases, 'navigate'):
+        await page.goto(url, wait_until=strategy.wait_until, timeout=strategy.navigation_timeout_ms)
+    ready_start = time.perf_counter()
+
+    min_count = max(1, min(strategy.min_cards, max_results))
+    race = asyncio.ensure_future(
+        wait_for_any_selector(page, container_selectors, strategy.timeout_ms, min_count, strategy.settle_ms)
+    )
+    try:
+        if ready_event is not None:
+            signal = asyncio.ensure_future(ready_event.wait())
+            try:
+                await asyncio.wait({race, signal}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                signal.cancel()
+            if not race.done():
+                now = time.perf_counter()
+                wait_ms = (now - ready_start) * 1000
+                ready_ms = (now - start_time) * 1000
+                readiness_stats.setdefault(site, LatencyWindow()).add(ready_ms)
+                # Cards may not be rendered yet; take whatever container is already there
+                winner = await first_matching_selector(page, container_selectors)
+                _record_ready_phase(phases, ready_start)
+                return winner, wait_ms, ready_ms
+        winner, wait_ms = await race
+    finally:
+        # Also when the scrape is cancelled while waiting
+        race.cancel()
+    if winner is None and min_count > 1:
+        # Still changing at the timeout; take whatever container is there
+        winner = await first_matching_selector(page, container_selectors)
+
+    ready_ms = None
+    if winner is not None:
+        ready_ms = (time.perf_counter() - start_time) * 1000
+        readiness_stats.setdefault(site, LatencyWindow()).add(ready_ms)
+    _record_ready_phase(phases, ready_start)
+    return winner, wait_ms, ready_ms
+
+def _record_ready_phase(phases: Optional[Dict[str, float]], ready_start: float):
+    add_span('ready', ready_start)
+    if phases is not None:
+        phases['ready'] = round((time.perf_counter() - ready_start) * 1000, 1)
@@ -1,170 +1,192 @@
-import asyncio
-from playwright.async_api import async_playwright
-import time
+from .browser_pool import BrowserPool, acquire_page
+from .extraction import extract_records, parse_price, absolute_url
+from .metrics import SWALLOWED_EXCEPTIONS, record_dropped
+from .http_fetch import FastPathConfig, HttpFetcher, record_source, scrape_over_http
+from .report import ScrapeReport, timed_phase
+from .resource_blocking import BlockingPolicy, install_request_blocking
+from .readiness import ReadinessStrategy, navigate_until_ready
+from .selector_stats import selector_stats
+from .structured_data import (
+    StructuredDataConfig, ResponseCapture, enough_products, products_from_page
+)
 import re
 
-async def scrape_reliance(query: str, max_results: int = 20):
+SITE = 'reliance'
+BASE_URL = "https://www.reliancedigital.in"
+
+# Product container selectors, raced against each other on the results page
+# (reordered at runtime by their recorded hit rates)
+CONTAINER_SELECTORS = [
+    ".sp__product",
+    ".product-item",
+    ".product-card",
+    "[data-testid='product-card']",
+    ".search-product-item"
+]
+
+# Extraction starts once the DOM is parsed and enough product cards are present,
+# instead of waiting for the network to go quiet
+READINESS = ReadinessStrategy(wait_until='domcontentloaded', min_cards=4, timeout_ms=15000)
+
+# Try a plain HTTP fetch of the server-rendered page before using a browser
+FAST_PATH = FastPathConfig(enabled=True, min_products=3)
+
+# Search results embedded in the page state and returned by the catalog API;
+# preferred over DOM scraping since they survive class-name churn
+STRUCTURED_DATA = StructuredDataConfig(
+    site_label="Reliance Digital",
+    url_base=BASE_URL,
+    state_globals=('__INITIAL_STATE__', '__PRELOADED_STATE__'),
+    state_script_ids=('__NEXT_DATA__',),
+    api_url_patterns=('/catalog/v1.0/products', '/api/service/application/catalog'),
+    title_keys=('name', 'title'),
+    price_keys=('price.effective', 'price.marked', 'sellingPrice', 'offerPrice', 'price'),
+    url_keys=('url', 'productUrl'),
+    rating_keys=('rating', 'averageRating'),
+)
+
+# Images, fonts, stylesheets and tracker hosts are not needed for extraction
+BLOCKING_POLICY = BlockingPolicy()
+
+# Fallback selectors for the fields of each product card, in priority order
+EXTRACTION_SPEC = {
+    "link_selectors": ["a"],
+    "title_selectors": [
+        ".sp__name",
+        ".product-title",
+        ".product-name",
+        "h3",
+        "h2",
+        ".title",
+        "a[title]"
+    ],
+    "price_selectors": [
+        ".sp__price",
+        ".price",
+        ".current-price",
+        ".offer-price",
+        ".sp__offer-price",
+        "[data-testid='price']"
+    ],
+    "rating_selectors": [
+        ".sp__rating",
+        ".rating",
+        ".star-rating",
+        "[data-testid='rating']"
+    ],
+}
+
+async def scrape_reliance(query: str, max_results: int = 20, pool: BrowserPool = None,
+                          report: ScrapeReport = None, http: HttpFetcher = None):
     """
     Scrape Reliance Digital for products based on search query
     
     Args:
         query: Search query string
         max_results: Maximum number of results to return
+        pool: Shared browser pool (a one-off browser is used when omitted)
+        report: Optional ScrapeReport filled in with scrape diagnostics
+        http: Shared HttpFetcher for the browserless fast path (skipped when omitted)
     
     Returns:
         List of product dictionaries
     """
-    url = f"https://www.reliancedigital.in/search?q={query.replace(' ', '%20')}"
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    url = f"{BASE_URL}/search?q={query.replace(' ', '%20')}"
+    container_candidates = selector_stats.order(SITE, 'container', CONTAINER_SELECTORS)
+    spec = selector_stats.ordered_spec(SITE, EXTRACTION_SPEC)
+    phases = report.phases_ms if report is not None else None
+    
+    # Server-rendered results can be parsed without opening a browser page
+    with timed_phase(phases, 'http'):
+        fast_result = await scrape_over_http(http, SITE, url, FAST_PATH, container_candidates, spec,
+                                             max_results, _build_product, STRUCTURED_DATA)
+    if fast_result is not None:
+        products, source = fast_result
+        record_source(SITE, source, report)
+        return products
+    
+    async with acquire_page(pool, SITE, phases) as page:
+        requests = await install_request_blocking(page, SITE, BLOCKING_POLICY)
+        if report is not None:
+            report.requests = requests
         
-        # Set user agent to avoid bot detection
-        await page.set_extra_http_headers({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # Listen for the search API response while the page loads
+        capture = ResponseCapture(page, STRUCTURED_DATA)
         
         try:
-            await page.goto(url, timeout=30000)
-            await page.wait_for_load_state('networkidle')
+            # Navigate and wait for whichever product container selector fills in first
+            container_selector, wait_ms, ready_ms = await navigate_until_ready(
+                page, SITE, url, container_candidates, READINESS, max_results, capture.ready, phases
+            )
+            if container_selector or not capture.ready.is_set():
+                selector_stats.record(SITE, 'container', container_candidates, container_selector)
+            if report is not None:
+                report.container_selector = container_selector
+                report.container_wait_ms = wait_ms
+                report.ready_ms = ready_ms
             
-            # Try different selectors for Reliance Digital product containers
-            selectors_to_try = [
-                ".sp__product",
-                ".product-item",
-                ".product-card",
-                "[data-testid='product-card']",
-                ".search-product-item"
-            ]
+            # Prefer the JSON the page was built from over scraping its markup
+            with timed_phase(phases, 'extract'):
+                products = await products_from_page(page, capture, STRUCTURED_DATA, max_results)
+            if enough_products(products, STRUCTURED_DATA, max_results):
+                record_source(SITE, 'browser_json', report)
+                return products
+            record_source(SITE, 'browser', report)
             
-            products = []
-            product_cards = []
-            
-            for selector in selectors_to_try:
-                try:
-                    await page.wait_for_selector(selector, timeout=5000)
-                    product_cards = await page.query_selector_all(selector)
-                    if product_cards:
-                        break
-                except:
-                    continue
-            
-            if not product_cards:
-                await browser.close()
+            if not container_selector:
                 return []
 
-            for i, card in enumerate(product_cards[:max_results]):
+            # Pull every card's fields in a single round trip
+            with timed_phase(phases, 'extract'):
+                records = await extract_records(page, container_selector, spec, max_results)
+            selector_stats.record_extraction(SITE, spec, records)
+
+            products = []
+            for record in records:
                 try:
-                    # Extract product title
-                    title = None
-                    title_selectors = [
-                        ".sp__name",
-                        ".product-title",
-                        ".product-name",
-                        "h3",
-                        "h2",
-                        ".title",
-                        "a[title]"
-                    ]
-                    
-                    for sel in title_selectors:
-                        title_el = await card.query_selector(sel)
-                        if title_el:
-                            title = await title_el.inner_text()
-                            if title and title.strip():
-                                title = title.strip()
-                                break
-                    
-                    # Try to get title from link attribute
-                    if not title:
-                        link_el = await card.query_selector("a")
-                        if link_el:
-                            title = await link_el.get_attribute("title")
-                    
-                    # Extract price
-                    price_text = None
-                    price_selectors = [
-                        ".sp__price",
-                        ".price",
-                        ".current-price",
-                        ".offer-price",
-                        ".sp__offer-price",
-                        "[data-testid='price']"
-                    ]
-                    
-                    for sel in price_selectors:
-                        price_el = await card.query_selector(sel)
-                        if price_el:
-                            price_text = await price_el.inner_text()
-                            if price_text and '₹' in price_text:
-                                break
-                    
-                    # If no price found, try regex on card text
-                    if not price_text:
-                        try:
-                            card_text = await card.inner_text()
-                            price_matches = re.findall(r'₹[\d,]+', card_text)
-                            if price_matches:
-                                price_text = price_matches[0]
-                        except:
-                            pass
-                    
-                    # Extract rating
-                    rating = None
-                    rating_selectors = [
-                        ".sp__rating",
-                        ".rating",
-                        ".star-rating",
-                        "[data-testid='rating']"
-                    ]
-                    
-                    for sel in rating_selectors:
-                        rating_el = await card.query_selector(sel)
-                        if rating_el:
-                            rating_text = await rating_el.inner_text()
-                            if rating_text:
-                                rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                                if rating_match:
-                                    rating = rating_match.group(1)
-                                    break
-                    
-                    # Extract product URL
-                    url_el = await card.query_selector("a")
-                    product_url = None
-                    if url_el:
-                        href = await url_el.get_attribute("href")
-                        if href:
-                            if href.startswith('/'):
-                                product_url = f"https://www.reliancedigital.in{href}"
-                            else:
-                                product_url = href
-                    
-                    if title and price_text and product_url:
-                        # Clean price
-                        try:
-                            cleaned_price = price_text.replace("₹", "").replace(",", "").strip()
-                            price_numbers = re.findall(r'\d+', cleaned_price)
-                            if price_numbers:
-                                price = int(''.join(price_numbers))
-                            else:
-                                price = price_text
-                        except:
-                            price = price_text
-                        
-                        products.append({
-                            "title": title,
-                            "price": price,
-                            "url": product_url,
-                            "rating": rating,
-                            "site": "Reliance Digital"
-                        })
-                        
-                except Exception as e:
+                    product = _build_product(record)
+                    if product:
+                        products.append(product)
+                except Exception:
+                    SWALLOWED_EXCEPTIONS.inc(site=SITE, location='build_product')
                     continue
-            
-            await browser.close()
             return products
             
         except Exception as e:
-            await browser.close()
+            capture.detach()
+            # Reported so the caller can tell a failed scrape from an empty result
+            if report is not None:
+                report.error = str(e)
             return []
+
+def _build_product(record):
+    """Turn a raw extracted card record into a product dictionary"""
+    title = record.get('title')
+    if title:
+        title = title.strip()
+    else:
+        # Try to get title from link attribute
+        title = record.get('link_title')
+
+    price_text = record.get('price_text')
+
+    rating = None
+    for candidate in record.get('ratings', []):
+        rating_match = re.search(r'(\d+\.?\d*)', candidate.get('text') or '')
+        if rating_match:
+            rating = rating_match.group(1)
+            break
+
+    product_url = absolute_url(record.get('href'), BASE_URL)
+
+    if not (title and price_text and product_url):
+        record_dropped(SITE, title, price_text, product_url)
+        return None
+
+    return {
+        "title": title,
+        "price": parse_price(price_text),
+        "url": product_url,
+        "rating": rating,
+        "site": "Reliance Digital"
+    }
@@ -0,0 +1,49 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, asdict
+from typing import Any, Dict, Optional
+from .resource_blocking import BlockingCounters
+from .tracing import span
+
+@dataclass
+class ScrapeReport:
+    """Diagnostics collected while scraping one site for one query"""
+    site: str
+    source: Optional[str] = None
+    queue_wait_ms: Optional[float] = None
+    container_selector: Optional[str] = None
+    container_wait_ms: Optional[float] = None
+    ready_ms: Optional[float] = None
+    requests: Optional[BlockingCounters] = None
+    # Milliseconds spent per phase: http, page, navigate, ready, extract
+    phases_ms: Dict[str, float] = field(default_factory=dict)
+    # Set when the scraper swallowed an exception and returned no products
+    error: Optional[str] = None
+    attempts: int = 1
+    hedged: bool = False
+    cached: bool = False
+    coalesced: bool = False
+
+    def merge_from(self, other: 'ScrapeReport'):
+        """Copy the diagnostics of a scrape run on behalf of this request"""
+        for f in fields(self):
+            if f.name not in ('site', 'cached', 'coalesced'):
+                setattr(self, f.name, getattr(other, f.name))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+@contextmanager
+def timed_phase(phases: Optional[Dict[str, float]], name: str):
+    """
+    Add the block's duration in milliseconds to phases[name] (no-op when phases is None)
+
+    The block is also recorded as a span when the scrape runs inside a traced request.
+    """
+    start = time.perf_counter()
+    try:
+        with span(name):
+            yield
+    finally:
+        if phases is not None:
+            phases[name] = round(phases.get(name, 0.0) + (time.perf_counter() - start) * 1000, 1)
@@ -0,0 +1,92 @@
+import fnmatch
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Tuple
+from urllib.parse import urlsplit
+
+# Third-party hosts that only serve ads, analytics and tracking beacons
+TRACKER_HOST_PATTERNS = (
+    "*doubleclick.net",
+    "*googlesyndication.com",
+    "*google-analytics.com",
+    "*googletagmanager.com",
+    "*googleadservices.com",
+    "*facebook.net",
+    "*facebook.com",
+    "*hotjar.com",
+    "*clarity.ms",
+    "*newrelic.com",
+    "*nr-data.net",
+    "*criteo.com",
+    "*criteo.net",
+    "*taboola.com",
+    "*moengage.com",
+    "*webengage.com",
+    "*branch.io",
+    "*appsflyer.com",
+)
+
+@dataclass(frozen=True)
+class BlockingPolicy:
+    """Request types and hosts a scraper page never needs to load"""
+    resource_types: FrozenSet[str] = frozenset({"image", "media", "font", "stylesheet"})
+    host_patterns: Tuple[str, ...] = TRACKER_HOST_PATTERNS
+    enabled: bool = True
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.resource_types:
+            return True
+        host = urlsplit(url).hostname or ""
+        return any(fnmatch.fnmatch(host, pattern) for pattern in self.host_patterns)
+
+@dataclass
+class BlockingCounters:
+    """Blocked vs allowed request counts for one site"""
+    blocked: int = 0
+    allowed: int = 0
+    blocked_by_type: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'blocked': self.blocked,
+            'allowed': self.allowed,
+            'blocked_by_type': dict(self.blocked_by_type),
+        }
+
+# Running totals per site since process start
+blocking_totals: Dict[str, BlockingCounters] = {}
+
+async def install_request_blocking(page, site: str, policy: BlockingPolicy) -> BlockingCounters:
+    """
+    Abort requests matching the site's policy before they leave the browser
+
+    Args:
+        page: Playwright page, before navigation
+        site: Site name the totals are recorded under
+        policy: The site's BlockingPolicy
+
+    Returns:
+        Counters for this page only (site totals are updated as well)
+    """
+    counters = BlockingCounters()
+    if not policy.enabled:
+        return counters
+    totals = blocking_totals.setdefault(site, BlockingCounters())
+
+    async def handle(route):
+        request = route.request
+        try:
+            if policy.should_block(request.resource_type, request.url):
+                for c in (counters, totals):
+                    c.blocked += 1
+                    c.blocked_by_type[request.resource_type] = c.blocked_by_type.get(request.resource_type, 0) + 1
+                await route.abort()
+            else:
+                counters.allowed += 1
+                totals.allowed += 1
+                await route.continue_()
+        except Exception:
+            # The page was closed while the request was in flight
+            pass
+
+    await page.route("**/*", handle)
+    return counters
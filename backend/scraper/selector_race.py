@@ -0,0 +1,93 @@
+import itertools
+import logging
+import time
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Returns the highest-priority selector matching at least minCount elements.
+# Invalid selectors are skipped instead of failing the whole race.
+FIRST_MATCHING_SELECTOR_JS = """
+({selectors, minCount}) => {
+    for (const sel of selectors) {
+        try {
+            if (document.querySelectorAll(sel).length >= minCount) return sel;
+        } catch (e) {}
+    }
+    return null;
+}
+"""
+
+# Like FIRST_MATCHING_SELECTOR_JS, but a selector with fewer than minCount
+# matches also wins once its count has stopped changing for settleMs. The
+# count seen on earlier polls is kept on window under the race's id.
+SETTLED_MATCHING_SELECTOR_JS = """
+({selectors, minCount, settleMs, raceId}) => {
+    const races = window.__selectorRaces || (window.__selectorRaces = {});
+    const state = races[raceId] || (races[raceId] = {selector: null, count: 0, since: 0});
+    let fallback = null, fallbackCount = 0;
+    for (const sel of selectors) {
+        let count = 0;
+        try {
+            count = document.querySelectorAll(sel).length;
+        } catch (e) {
+            continue;
+        }
+        if (count >= minCount) return sel;
+        if (count > 0 && fallback === null) {
+            fallback = sel;
+            fallbackCount = count;
+        }
+    }
+    const now = performance.now();
+    if (fallback !== state.selector || fallbackCount !== state.count) {
+        Object.assign(state, {selector: fallback, count: fallbackCount, since: now});
+        return null;
+    }
+    return fallback !== null && now - state.since >= settleMs ? fallback : null;
+}
+"""
+
+_race_ids = itertools.count()
+
+async def wait_for_any_selector(page, selectors: List[str], timeout_ms: float = 10000,
+                                min_count: int = 1, settle_ms: Optional[float] = None
+                                ) -> Tuple[Optional[str], float]:
+    """
+    Wait for any of the candidate selectors to appear, all at once
+
+    The candidates are polled together inside the page under one overall
+    deadline, so stale selectors no longer cost a timeout each. When
+    several match, the earliest one in the list wins.
+
+    Args:
+        page: Playwright page
+        selectors: Candidate selectors in priority order
+        timeout_ms: Overall deadline for the race in milliseconds
+        min_count: Number of matching elements a selector needs to win
+        settle_ms: If set, a selector with at least one but fewer than
+            min_count matches also wins once its count is unchanged for
+            this long (e.g. a query with only a few results)
+
+    Returns:
+        Tuple of (winning selector or None on timeout, elapsed milliseconds)
+    """
+    start_time = time.perf_counter()
+    winner = None
+    if settle_ms is None or min_count <= 1:
+        script, arg = FIRST_MATCHING_SELECTOR_JS, {'selectors': selectors, 'minCount': min_count}
+    else:
+        script = SETTLED_MATCHING_SELECTOR_JS
+        arg = {'selectors': selectors, 'minCount': min_count, 'settleMs': settle_ms,
+               'raceId': f"race-{next(_race_ids)}"}
+    try:
+        handle = await page.wait_for_function(script, arg=arg, timeout=timeout_ms, polling='raf')
+        winner = await handle.json_value()
+    except Exception as e:
+        logger.debug("No container selector matched within %sms: %s", timeout_ms, e)
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    return winner, elapsed_ms
+
+async def first_matching_selector(page, selectors: List[str], min_count: int = 1) -> Optional[str]:
+    """Check the candidates once, without waiting"""
+    return await page.evaluate(FIRST_MATCHING_SELECTOR_JS, {'selectors': selectors, 'minCount': min_count})
@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from .metrics import SELECTOR_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATS_PATH = os.environ.get(
+    'SELECTOR_STATS_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'selector_stats.json')
+)
+
+# Extraction spec keys that are tracked, and the stats group they map to
+SPEC_GROUPS = {
+    'title_selectors': 'title',
+    'price_selectors': 'price',
+    'rating_selectors': 'rating',
+}
+
+# Spec keys whose selectors are interchangeable and may be reordered. Price and
+# rating lists are priorities (e.g. the discounted price before the struck-out
+# MRP), so they keep their declared order and are only tracked.
+REORDERED_SPEC_KEYS = ('title_selectors',)
+
+class SelectorStats:
+    """
+    Per-site selector hit/miss table used to reorder fallback selectors
+
+    Candidates are ordered with the last winner first, followed by the
+    rest by smoothed hit rate (ties keep the hard-coded order). Only
+    interchangeable alternatives (containers, titles) are reordered; price
+    and rating hits are recorded but their lists keep the declared priority.
+    The table is persisted as JSON so the ordering survives restarts.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_STATS_PATH, save_interval: float = 30.0):
+        """
+        Args:
+            path: JSON file used for persistence (None keeps stats in memory only)
+            save_interval: Minimum seconds between automatic saves
+        """
+        self.path = path
+        self.save_interval = save_interval
+        # site -> group -> {'last_winner': str, 'selectors': {selector: {'hits': int, 'misses': int}}}
+        self._table: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.load()
+
+    def _group(self, site: str, group: str) -> Dict[str, Any]:
+        return self._table.setdefault(site, {}).setdefault(group, {'last_winner': None, 'selectors': {}})
+
+    def order(self, site: str, group: str, candidates: List[str]) -> List[str]:
+        """
+        Reorder candidate selectors so the most likely match is probed first
+
+        Args:
+            site: Site name
+            group: Selector group (container, title, price, rating)
+            candidates: Hard-coded selectors in their default priority order
+
+        Returns:
+            New list with the same selectors in adaptive order
+        """
+        entry = self._table.get(site, {}).get(group)
+        if not entry:
+            return list(candidates)
+
+        counts = entry['selectors']
+
+        def score(selector):
+            stats = counts.get(selector, {})
+            hits, misses = stats.get('hits', 0), stats.get('misses', 0)
+            # Laplace smoothing keeps untried selectors between good and dead ones
+            return -(hits + 1) / (hits + misses + 2)
+
+        ordered = sorted(candidates, key=score)
+        last_winner = entry.get('last_winner')
+        if last_winner in ordered:
+            ordered.remove(last_winner)
+            ordered.insert(0, last_winner)
+        return ordered
+
+    def record(self, site: str, group: str, tried: List[str], winner: Optional[str]):
+        """
+        Record one lookup: the winner gets a hit, every selector tried before it a miss
+
+        Args:
+            site: Site name
+            group: Selector group
+            tried: Selectors in the order they were probed
+            winner: Selector that matched, or None if none did
+        """
+        entry = self._group(site, group)
+        counts = entry['selectors']
+        for selector in tried:
+            stats = counts.setdefault(selector, {'hits': 0, 'misses': 0})
+            if selector == winner:
+                stats['hits'] += 1
+                entry['last_winner'] = winner
+                SELECTOR_LOOKUPS.inc(site=site, group=group, selector=selector, result='hit')
+                break
+            stats['misses'] += 1
+            SELECTOR_LOOKUPS.inc(site=site, group=group, selector=selector, result='miss')
+        self._dirty = True
+        self._maybe_save()
+
+    def ordered_spec(self, site: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of an extraction spec with its interchangeable selector lists reordered"""
+        ordered = dict(spec)
+        for key in REORDERED_SPEC_KEYS:
+            if key in spec:
+                ordered[key] = self.order(site, SPEC_GROUPS[key], spec[key])
+        return ordered
+
+    def record_extraction(self, site: str, spec: Dict[str, Any], records: Iterable[Dict[str, Any]]):
+        """
+        Record field selector hits from extracted card records
+
+        Args:
+            site: Site name
+            spec: Extraction spec the records were produced with
+            records: Raw records carrying the matched selector per field
+        """
+        for record in records:
+            matched = record.get('matched') or {}
+            for key, group in SPEC_GROUPS.items():
+                if key in spec:
+                    self.record(site, group, spec[key], matched.get(group))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Hit/miss counts and hit rates per site, group and selector"""
+        result = {}
+        for site, groups in self._table.items():
+            result[site] = {}
+            for group, entry in groups.items():
+                selectors = {}
+                for selector, stats in entry['selectors'].items():
+                    total = stats['hits'] + stats['misses']
+                    selectors[selector] = {
+                        'hits': stats['hits'],
+                        'misses': stats['misses'],
+                        'hit_rate': round(stats['hits'] / total, 3) if total else None
+                    }
+                result[site][group] = {'last_winner': entry.get('last_winner'), 'selectors': selectors}
+        return result
+
+    def load(self):
+        """Load persisted stats, starting empty if the file is missing or unreadable"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._table = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load selector stats from %s: %s", self.path, e)
+            self._table = {}
+
+    def save(self):
+        """Write the table to disk atomically"""
+        if not self.path or not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._table, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning("Could not save selector stats to %s: %s", self.path, e)
+        self._last_save = time.monotonic()
+
+    def _maybe_save(self):
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+# Shared instance used by all scrapers
+selector_stats = SelectorStats()
@@ -0,0 +1,110 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # pragma: no cover - optional fast path dependency
+    LexborHTMLParser = None
+
+PRICE_RE = re.compile(r'₹[\d,]+')
+
+def is_available() -> bool:
+    """Whether the static HTML parser is installed"""
+    return LexborHTMLParser is not None
+
+def _text(node) -> str:
+    # Closest static equivalent of innerText: text nodes joined by spaces
+    return node.text(deep=True, separator=' ', strip=True) if node is not None else ''
+
+def _query(node, selector: str):
+    try:
+        return node.css_first(selector)
+    except Exception:
+        # Selector not supported by the static parser
+        return None
+
+def _first(card, selectors, accept) -> Tuple[Optional[str], Optional[str]]:
+    for sel in selectors or []:
+        el = _query(card, sel)
+        if el is None:
+            continue
+        value = _text(el)
+        if accept(value):
+            return value, sel
+    return None, None
+
+def _card_record(card, spec: Dict[str, Any]) -> Dict[str, Any]:
+    link = None
+    for sel in spec.get('link_selectors') or ['a']:
+        link = _query(card, sel)
+        if link is not None:
+            break
+
+    title, title_selector = _first(card, spec.get('title_selectors'), lambda v: len(v.strip()) > 0)
+    text_title = None
+    if not title and spec.get('title_text_fallback'):
+        min_len, max_len = spec['title_text_fallback']
+        for el in card.css('span, div, a'):
+            value = _text(el)
+            if min_len < len(value) < max_len:
+                text_title = value.strip()
+                break
+
+    price, price_selector = _first(card, spec.get('price_selectors'), lambda v: '₹' in v)
+    if not price:
+        match = PRICE_RE.search(_text(card))
+        if match:
+            price = match.group(0)
+    if not price and spec.get('price_element_fallback'):
+        for el in card.css('*'):
+            value = _text(el)
+            if '₹' in value and len(value) < 20:
+                price = value.strip()
+                break
+
+    ratings = []
+    for sel in spec.get('rating_selectors') or []:
+        el = _query(card, sel)
+        if el is not None:
+            ratings.append({'text': _text(el), 'label': el.attributes.get('aria-label'), 'selector': sel})
+
+    return {
+        'href': link.attributes.get('href') if link is not None else None,
+        'link_title': link.attributes.get('title') if link is not None else None,
+        'title': title,
+        'text_title': text_title,
+        'price_text': price,
+        'ratings': ratings,
+        'matched': {
+            'title': title_selector,
+            'price': price_selector,
+            'rating': ratings[0]['selector'] if ratings else None,
+        },
+    }
+
+def extract_records_from_html(html: str, container_selectors: List[str], spec: Dict[str, Any],
+                              max_results: int) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Static counterpart of extraction.extract_records for server-rendered HTML
+
+    Uses the same container candidates and extraction spec as the browser
+    path and produces records in the same format.
+
+    Args:
+        html: Search results page HTML
+        container_selectors: Product container candidates in priority order
+        spec: Site extraction spec
+        max_results: Maximum number of cards to extract
+
+    Returns:
+        Tuple of (matching container selector or None, list of raw records)
+    """
+    tree = LexborHTMLParser(html)
+    for selector in container_selectors:
+        try:
+            cards = tree.css(selector)
+        except Exception:
+            continue
+        if cards:
+            return selector, [_card_record(card, spec) for card in cards[:max_results]]
+    return None, []
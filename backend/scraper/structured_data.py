@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .extraction import parse_price
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class StructuredDataConfig:
+    """
+    Where a site ships its search results as JSON, and how to read products from it
+
+    Key lists are tried in order on every object of the JSON tree and may be
+    dotted paths ('pricing.finalPrice.value'). An object counts as a product
+    when it has a title, a price and a URL.
+    """
+    site_label: str
+    url_base: str
+    enabled: bool = True
+    # window.<name> = {...} assignments and <script id="..."> JSON blobs
+    state_globals: Tuple[str, ...] = ('__INITIAL_STATE__',)
+    state_script_ids: Tuple[str, ...] = ('__NEXT_DATA__',)
+    # Substrings of XHR/fetch URLs that return search results
+    api_url_patterns: Tuple[str, ...] = ()
+    title_keys: Tuple[str, ...] = ('title', 'name', 'productName')
+    price_keys: Tuple[str, ...] = ('sellingPrice', 'finalPrice', 'price', 'offerPrice')
+    url_keys: Tuple[str, ...] = ('url', 'productUrl', 'slug')
+    rating_keys: Tuple[str, ...] = ('rating', 'averageRating')
+    min_products: int = 3
+
+def _lookup(obj: Dict[str, Any], path: str) -> Any:
+    for part in path.split('.'):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(part)
+    return obj
+
+def _first_value(obj: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        value = _lookup(obj, key)
+        if value not in (None, '', [], {}):
+            return value
+    return None
+
+def _walk(node: Any) -> Iterator[Dict[str, Any]]:
+    # Iterative depth-first walk; state blobs can be deeply nested
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            yield current
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+
+def _to_price(value: Any):
+    if isinstance(value, dict):
+        # e.g. {'value': 1299, 'currency': 'INR'} or {'effective': {'min': 1299}}
+        return _to_price(_first_value(value, ('value', 'amount', 'min', 'effective')))
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        price = parse_price(value)
+        return price if isinstance(price, int) else None
+    return None
+
+def _to_url(value: Any, url_base: str) -> Optional[str]:
+    if not isinstance(value, str) or not value:
+        return None
+    if value.startswith('http'):
+        return value
+    return f"{url_base}{value if value.startswith('/') else '/' + value}"
+
+def products_from_json(payloads: List[Any], config: StructuredDataConfig, max_results: int) -> List[Dict[str, Any]]:
+    """
+    Collect product dictionaries from parsed JSON documents
+
+    Args:
+        payloads: Parsed JSON documents (page state blobs, API responses)
+        config: The site's StructuredDataConfig
+        max_results: Maximum number of products
+
+    Returns:
+        Products in document order, de-duplicated by URL
+    """
+    products = []
+    seen_urls = set()
+    for payload in payloads:
+        for obj in _walk(payload):
+            title = _first_value(obj, config.title_keys)
+            if not isinstance(title, str):
+                continue
+            price = _to_price(_first_value(obj, config.price_keys))
+            url = _to_url(_first_value(obj, config.url_keys), config.url_base)
+            if price is None or not url or url in seen_urls:
+                continue
+            rating = _first_value(obj, config.rating_keys)
+            if isinstance(rating, dict):
+                rating = _first_value(rating, ('average', 'value', 'average_rating'))
+            seen_urls.add(url)
+            products.append({
+                "title": title.strip(),
+                "price": price,
+                "url": url,
+                "rating": str(rating) if isinstance(rating, (int, float, str)) and rating != '' else None,
+                "site": config.site_label
+            })
+            if len(products) >= max_results:
+                return products
+    return products
+
+def state_from_html(html: str, config: StructuredDataConfig) -> List[Any]:
+    """Parse the embedded state blobs named in config out of raw page HTML"""
+    decoder = json.JSONDecoder()
+    payloads = []
+    for name in config.state_globals:
+        match = re.search(r'window\.' + re.escape(name) + r'\s*=\s*', html)
+        if not match:
+            continue
+        try:
+            payload, _ = decoder.raw_decode(html, match.end())
+            payloads.append(payload)
+        except ValueError:
+            logger.debug("Could not decode window.%s", name)
+    for script_id in config.state_script_ids:
+        match = re.search(r'<script[^>]*id=["\']' + re.escape(script_id) + r'["\'][^>]*>(.*?)</script>', html, re.S)
+        if not match:
+            continue
+        try:
+            payloads.append(json.loads(match.group(1)))
+        except ValueError:
+            logger.debug("Could not decode script#%s", script_id)
+    return payloads
+
+# Reads the configured state globals and JSON script tags in one round trip
+READ_PAGE_STATE_JS = """
+({globals, scriptIds}) => {
+    const found = [];
+    for (const name of globals) {
+        if (window[name] !== undefined) found.push(window[name]);
+    }
+    for (const id of scriptIds) {
+        const el = document.getElementById(id);
+        if (el) {
+            try { found.push(JSON.parse(el.textContent)); } catch (e) {}
+        }
+    }
+    return found;
+}
+"""
+
+class ResponseCapture:
+    """
+    Collects JSON bodies of a page's search API responses
+
+    Attach before navigation. The ready event is set as soon as the first
+    matching response body has been read.
+    """
+
+    def __init__(self, page, config: StructuredDataConfig):
+        self.config = config
+        self.payloads: List[Any] = []
+        self.ready = asyncio.Event()
+        self._reads: List[asyncio.Task] = []
+        self._page = None
+        if config.enabled and config.api_url_patterns:
+            page.on('response', self._on_response)
+            self._page = page
+
+    def _on_response(self, response):
+        if any(pattern in response.url for pattern in self.config.api_url_patterns):
+            self._reads.append(asyncio.create_task(self._read(response)))
+
+    async def _read(self, response):
+        try:
+            self.payloads.append(await response.json())
+            self.ready.set()
+        except Exception as e:
+            logger.debug("Could not read JSON from %s: %s", response.url, e)
+
+    def detach(self):
+        """Stop listening, so a page kept for reuse does not feed this capture any more"""
+        if self._page is not None:
+            self._page.remove_listener('response', self._on_response)
+            self._page = None
+
+    async def settle(self, timeout: float = 1.0):
+        """Give body reads that are already in progress a moment to finish"""
+        pending = [task for task in self._reads if not task.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+
+async def products_from_page(page, capture: ResponseCapture, config: StructuredDataConfig,
+                             max_results: int) -> List[Dict[str, Any]]:
+    """
+    Products from captured API responses and the page's embedded state
+
+    Args:
+        page: Playwright page after navigation
+        capture: ResponseCapture attached before navigation
+        config: The site's StructuredDataConfig
+        max_results: Maximum number of products
+
+    Returns:
+        Products found (empty if the site ships no usable structured data)
+    """
+    if not config.enabled:
+        return []
+    await capture.settle()
+    capture.detach()
+    payloads = list(capture.payloads)
+    try:
+        payloads.extend(await page.evaluate(
+            READ_PAGE_STATE_JS,
+            {'globals': list(config.state_globals), 'scriptIds': list(config.state_script_ids)}
+        ))
+    except Exception as e:
+        logger.debug("Could not read embedded page state: %s", e)
+    return products_from_json(payloads, config, max_results)
+
+def enough_products(products: List[Dict[str, Any]], config: StructuredDataConfig, max_results: int) -> bool:
+    return len(products) >= min(config.min_products, max_results)
@@ -0,0 +1,163 @@
+import contextvars
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+@dataclass
+class CaptureConfig:
+    """
+    What is captured for slow requests
+
+    A request slower than slow_ms is written to the slow-request ring buffer
+    with its span tree. Pages are snapshotted while still open, so any page
+    lease longer than slow_ms (which makes its request slow too) keeps its
+    HTML, and with playwright_traces its Playwright trace.
+    """
+    slow_ms: float = float(os.environ.get('TRACE_SLOW_MS', 10000))
+    html_snapshots: bool = True
+    # Recording a trace costs DOM snapshots on every lease, so it is opt-in
+    playwright_traces: bool = os.environ.get('TRACE_PLAYWRIGHT', '') == '1'
+
+capture_config = CaptureConfig()
+
+@dataclass
+class Artifact:
+    """A file saved with a slow request: inline content, or a temporary file to move"""
+    name: str
+    content: Optional[bytes] = None
+    path: Optional[str] = None
+
+class Span:
+    """A timed step of a request, with attributes and child steps"""
+
+    def __init__(self, name: str, trace: 'Trace', start: Optional[float] = None, **attributes):
+        self.name = name
+        self.trace = trace
+        self.start = time.perf_counter() if start is None else start
+        self.end: Optional[float] = None
+        self.attributes: Dict[str, Any] = attributes
+        self.children: List['Span'] = []
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return round((end - self.start) * 1000, 1)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self, end: Optional[float] = None):
+        if self.end is None:
+            self.end = time.perf_counter() if end is None else end
+
+    def walk(self) -> Iterator['Span']:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        node = {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 1),
+            'duration_ms': self.duration_ms,
+        }
+        if self.end is None:
+            node['unfinished'] = True
+        if self.attributes:
+            node['attributes'] = self.attributes
+        if self.children:
+            node['children'] = [child.to_dict(origin) for child in sorted(self.children, key=lambda s: s.start)]
+        return node
+
+class Trace:
+    """The span tree of one request and the artifacts captured while it ran"""
+
+    def __init__(self, name: str, trace_id: Optional[str] = None, **attributes):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.started_at = time.time()
+        self.root = Span(name, self, **attributes)
+        self.artifacts: List[Artifact] = []
+
+    def add_artifact(self, name: str, content: Optional[bytes] = None, path: Optional[str] = None):
+        self.artifacts.append(Artifact(name, content, path))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'trace_id': self.trace_id, 'started_at': self.started_at,
+                'span': self.root.to_dict(self.root.start)}
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+
+def current_trace() -> Optional[Trace]:
+    """The trace of the request being handled, or None outside a traced request"""
+    span = _current_span.get()
+    return span.trace if span is not None else None
+
+def start_trace(name: str, trace_id: Optional[str] = None, **attributes) -> Tuple[Trace, contextvars.Token]:
+    """Begin a trace and make its root span current; pass the token to end_trace"""
+    trace = Trace(name, trace_id, **attributes)
+    return trace, _current_span.set(trace.root)
+
+def end_trace(trace: Trace, token: contextvars.Token):
+    trace.root.finish()
+    _current_span.reset(token)
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Time the block as a child of the current span (a no-op yielding None outside a trace)
+
+    Tasks created inside the block inherit it as their parent span.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent.trace, **attributes)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set(error=type(e).__name__)
+        raise
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes) -> Optional[Span]:
+    """
+    Open a child of parent (default: the current span) without making it current
+
+    For steps that outlive a single block, such as an async generator; finish
+    it explicitly and use activate() around the code that runs inside it.
+    """
+    parent = parent or _current_span.get()
+    if parent is None:
+        return None
+    child = Span(name, parent.trace, **attributes)
+    parent.children.append(child)
+    return child
+
+@contextmanager
+def activate(current: Optional[Span]) -> Iterator[Optional[Span]]:
+    """Make a span current for the block, e.g. so tasks created in it become its children"""
+    if current is None:
+        yield None
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        _current_span.reset(token)
+
+def add_span(name: str, start: float, end: Optional[float] = None, parent: Optional[Span] = None,
+             **attributes) -> Optional[Span]:
+    """Record a step that already happened (perf_counter start and end) under parent or the current span"""
+    child = start_span(name, parent, **attributes)
+    if child is not None:
+        child.start = start
+        child.finish(end)
+    return child
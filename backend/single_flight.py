@@ -0,0 +1,73 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls that share a key
+
+    The first caller for a key starts the work in its own task; callers
+    arriving while it runs await that same task. Waiters are shielded,
+    so cancelling one of them never cancels the shared work while others
+    still wait on it. Only when the last waiter is cancelled is the work
+    itself cancelled.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await the in-flight call for key, starting it with factory() if there is none
+
+        Args:
+            key: Deduplication key
+            factory: Zero-argument callable returning the coroutine to run
+
+        Returns:
+            The shared result (exceptions are raised to every waiter)
+        """
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.create_task(factory())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[key] == 1 and not task.done():
+                # Nobody else is waiting for this result any more
+                task.cancel()
+                self._forget(key, task)
+                self.cancelled += 1
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if task.done() and not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'in_flight': len(self._flights),
+            'started': self.started,
+            'coalesced': self.coalesced,
+            'cancelled': self.cancelled,
+        }
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Run the Compareason API with its scrapers pointed at the local fixture sites
+
+Usage:
+    python benchmarks/fixture_api.py --fixture-url http://127.0.0.1:8765 --port 8001
+"""
+
+import argparse
+import dataclasses
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fixture_sites import SCRAPER_MODULES
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API against the local fixture sites")
+    parser.add_argument('--fixture-url', required=True, help="Base URL of a running fixture_sites.py server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--log-level', default='warning')
+    parser.add_argument('--no-fast-path', action='store_true', help="Always scrape with the browser")
+    parser.add_argument('--no-rate-limits', action='store_true',
+                        help="Lift the per-site outbound rate limits, which only protect the live sites")
+    args = parser.parse_args()
+
+    # Before main is imported: the comparison service reads BASE_URL for its health probes
+    for site, module in SCRAPER_MODULES.items():
+        module.BASE_URL = f"{args.fixture_url.rstrip('/')}/{site}"
+        if args.no_fast_path:
+            module.FAST_PATH = dataclasses.replace(module.FAST_PATH, enabled=False)
+
+    if args.no_rate_limits:
+        import scrape_scheduler
+        for site in scrape_scheduler.DEFAULT_RATE_LIMITS:
+            scrape_scheduler.DEFAULT_RATE_LIMITS[site] = scrape_scheduler.RateLimit(rate=1000.0, burst=1000)
+
+    import uvicorn
+    from main import app
+    uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level)
+
+if __name__ == "__main__":
+    main()
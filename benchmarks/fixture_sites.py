@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Local fixture sites that mimic the Flipkart, Amazon and Reliance Digital search pages
+
+Serves synthetic (or recorded) search results with each site's markup from a
+local HTTP server, so scrapers can be benchmarked and load-tested without
+touching the live sites.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from scraper import flipkart, amazon, reliance
+
+SITES = ('flipkart', 'amazon', 'reliance')
+SCRAPER_MODULES = {'flipkart': flipkart, 'amazon': amazon, 'reliance': reliance}
+
+BRANDS = ['Samsung', 'Apple', 'OnePlus', 'Xiaomi', 'Sony', 'LG', 'Realme', 'Vivo', 'Oppo', 'Motorola']
+VARIANTS = ['128 GB', '256 GB', '8 GB RAM', 'Midnight Black', 'Ocean Blue', '5G', 'Pro', 'Max']
+
+@dataclass
+class FixtureConfig:
+    """What the fixture sites serve"""
+    # Product cards per search page
+    products: int = 24
+    # 'server': cards are in the HTML; 'client': a script renders them after client_delay_ms
+    render: str = 'server'
+    client_delay_ms: int = 150
+    # Server think time added to every search page
+    latency_ms: int = 0
+    # Embed the results as page state JSON (Flipkart and Reliance)
+    embed_state: bool = False
+    # Directory with recorded <site>.html pages served instead of synthetic ones
+    recorded_dir: Optional[str] = None
+
+def synthetic_products(query: str, count: int) -> List[Dict[str, object]]:
+    """Deterministic fake products for a query"""
+    seed = int(hashlib.sha1(query.encode()).hexdigest()[:8], 16)
+    products = []
+    for i in range(count):
+        n = seed + i * 7919
+        title = f"{BRANDS[n % len(BRANDS)]} {query.title()} {VARIANTS[n % len(VARIANTS)]} (Model {n % 1000})"
+        products.append({
+            'id': f"{n % 10 ** 10:010d}",
+            'title': title,
+            'slug': title.lower().replace(' ', '-').replace('(', '').replace(')', ''),
+            'price': 999 + n % 90000,
+            'rating': round(3 + (n % 20) / 10, 1),
+        })
+    return products
+
+def _rupees(price) -> str:
+    return f"₹{price:,}"
+
+def _flipkart_cards(products) -> str:
+    return ''.join(
+        f'<div class="_1AtVbE"><div class="_13oc-S" data-id="{p["id"]}">'
+        f'<a href="/{p["slug"]}/p/itm{p["id"]}" title="{p["title"]}"><img src="/static/{p["id"]}.jpg">'
+        f'<div class="_4rR01T">{p["title"]}</div><div class="_3LWZlK">{p["rating"]}</div>'
+        f'<div class="_30jeq3">{_rupees(p["price"])}</div></a></div></div>'
+        for p in products
+    )
+
+def _amazon_cards(products) -> str:
+    return ''.join(
+        f'<div data-component-type="s-search-result" data-asin="B{p["id"][:9]}" class="s-result-item">'
+        f'<img src="/static/{p["id"]}.jpg"><h2><a href="/dp/B{p["id"][:9]}"><span>{p["title"]}</span></a></h2>'
+        f'<span class="a-icon-alt">{p["rating"]} out of 5 stars</span>'
+        f'<span class="a-price"><span class="a-offscreen">{_rupees(p["price"])}</span>'
+        f'<span class="a-price-whole">{p["price"]:,}</span></span></div>'
+        for p in products
+    )
+
+def _reliance_cards(products) -> str:
+    return ''.join(
+        f'<div class="sp__product"><a href="/{p["slug"]}/p/{p["id"]}"><img src="/static/{p["id"]}.jpg">'
+        f'<p class="sp__name">{p["title"]}</p></a><span class="sp__price">{_rupees(p["price"])}</span>'
+        f'<span class="sp__rating">{p["rating"]}</span></div>'
+        for p in products
+    )
+
+def _flipkart_state(products) -> Dict[str, object]:
+    return {'pageDataV4': {'page': {'data': {'10003': [
+        {'widget': {'data': {'products': [{'productInfo': {'value': {
+            'titles': {'title': p['title']},
+            'pricing': {'finalPrice': {'value': p['price']}},
+            'baseUrl': f"/{p['slug']}/p/itm{p['id']}",
+            'rating': {'average': p['rating']},
+        }}}]}}} for p in products
+    ]}}}}
+
+def _reliance_state(products) -> Dict[str, object]:
+    return {'search': {'items': [
+        {'name': p['title'], 'price': {'effective': p['price']}, 'url': f"/{p['slug']}/p/{p['id']}",
+         'rating': p['rating']} for p in products
+    ]}}
+
+CARD_RENDERERS = {'flipkart': _flipkart_cards, 'amazon': _amazon_cards, 'reliance': _reliance_cards}
+STATE_RENDERERS = {'flipkart': _flipkart_state, 'reliance': _reliance_state}
+
+def search_page(site: str, query: str, config: FixtureConfig) -> str:
+    """Full HTML of a synthetic search results page"""
+    products = synthetic_products(query, config.products)
+    cards = CARD_RENDERERS[site](products)
+    state = ''
+    if config.embed_state and site in STATE_RENDERERS:
+        state = f'<script>window.__INITIAL_STATE__ = {json.dumps(STATE_RENDERERS[site](products))};</script>'
+    if config.render == 'client':
+        body = (
+            '<div id="results"></div><script>'
+            f'setTimeout(() => {{ document.getElementById("results").innerHTML = {json.dumps(cards)}; }}, '
+            f'{config.client_delay_ms});</script>'
+        )
+    else:
+        body = f'<div id="results">{cards}</div>'
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>{query} - {site} fixture</title>'
+        '<link rel="stylesheet" href="/static/site.css">'
+        '<script async src="https://www.googletagmanager.com/gtm.js"></script>'
+        f'{state}</head><body>{body}</body></html>'
+    )
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'FixtureSites/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = 'text/html; charset=utf-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fixture = self.server.fixture
+        parts = urlsplit(self.path)
+        segments = [s for s in parts.path.split('/') if s]
+        fixture.count(segments[0] if segments else 'root')
+        if not segments or segments[0] == 'static' or segments[0] not in SITES:
+            # Home page probes, stylesheets and images
+            self._send(200, b'', 'text/css' if parts.path.endswith('.css') else 'image/jpeg')
+            return
+        site = segments[0]
+        params = parse_qs(parts.query)
+        query = (params.get('q') or params.get('k') or [''])[0]
+        if len(segments) == 1 or not query:
+            self._send(200, f'<html><body>{site} fixture home</body></html>'.encode())
+            return
+        config = fixture.config
+        if config.latency_ms:
+            time.sleep(config.latency_ms / 1000)
+        recorded = os.path.join(config.recorded_dir, f'{site}.html') if config.recorded_dir else None
+        if recorded and os.path.exists(recorded):
+            with open(recorded, 'rb') as f:
+                self._send(200, f.read())
+            return
+        self._send(200, search_page(site, query, config).encode())
+
+class FixtureServer:
+    """Threaded local HTTP server for the fixture sites"""
+
+    def __init__(self, config: FixtureConfig = None, host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            config: FixtureConfig (default: 24 server-rendered products per page)
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+        """
+        self.config = config or FixtureConfig()
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fixture = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def site_url(self, site: str) -> str:
+        return f"{self.base_url}/{site}"
+
+    def count(self, kind: str):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def start(self) -> 'FixtureServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+@contextmanager
+def scrapers_pointed_at(server: FixtureServer):
+    """Temporarily send the three scrapers to the fixture sites instead of the live ones"""
+    originals = {site: module.BASE_URL for site, module in SCRAPER_MODULES.items()}
+    for site, module in SCRAPER_MODULES.items():
+        module.BASE_URL = server.site_url(site)
+    try:
+        yield
+    finally:
+        for site, module in SCRAPER_MODULES.items():
+            module.BASE_URL = originals[site]
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve the local fixture sites")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--products', type=int, default=24)
+    parser.add_argument('--render', choices=['server', 'client'], default='server')
+    parser.add_argument('--latency-ms', type=int, default=0)
+    parser.add_argument('--embed-state', action='store_true')
+    parser.add_argument('--recorded-dir')
+    args = parser.parse_args()
+    server = FixtureServer(FixtureConfig(products=args.products, render=args.render, latency_ms=args.latency_ms,
+                                         embed_state=args.embed_state, recorded_dir=args.recorded_dir),
+                           port=args.port)
+    print(f"Fixture sites on {server.base_url}/{{{','.join(SITES)}}}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
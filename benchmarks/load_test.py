@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of POST /compare against the local fixture sites
+
+Starts the fixture sites and the API (benchmarks/fixture_api.py) as
+subprocesses, then drives /compare with closed-loop clients at each
+concurrency level. Requests hit the result cache at the configured ratio:
+hits reuse a warmed query from the mix, misses add a unique suffix so they
+scrape. Reports throughput, latency percentiles, error, timeout and shed
+rates, and a per-second timeline of Chromium processes and RSS of the API.
+
+Usage:
+    python benchmarks/load_test.py --concurrency 1 4 16 32 --duration 30 --cache-hit-ratio 0.5
+    python benchmarks/load_test.py --url http://localhost:8000 --concurrency 8   # an already running API
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import IO, Any, Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from proc_stats import process_tree
+from scraper.latency import LatencyWindow
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+DEFAULT_QUERIES = ['iphone 15', 'samsung galaxy m14', 'sony headphones', 'dell laptop', 'nike shoes']
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+async def _wait_until_up(client: httpx.AsyncClient, url: str, process: subprocess.Popen = None,
+                         stderr: Optional[IO[bytes]] = None, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        if process is not None and process.poll() is not None:
+            tail = []
+            if stderr is not None:
+                stderr.seek(0)
+                tail = stderr.read().decode(errors='replace').strip().splitlines()[-5:]
+            raise RuntimeError(f"{url} exited with code {process.returncode}:\n" + '\n'.join(tail))
+        try:
+            if (await client.get(url, timeout=2.0)).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+        await asyncio.sleep(0.25)
+
+class Stack:
+    """The fixture sites and the API under test, as subprocesses"""
+
+    def __init__(self, args):
+        self.args = args
+        self.fixture_port = _free_port()
+        self.api_port = _free_port()
+        self.processes: List[subprocess.Popen] = []
+        # Each process's stderr, kept in a temporary file so a failed startup can be reported
+        self.stderr: Dict[subprocess.Popen, IO[bytes]] = {}
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.api_port}"
+
+    @property
+    def api_pid(self) -> int:
+        return self.processes[-1].pid
+
+    async def _spawn(self, client: httpx.AsyncClient, url: str, *command: str):
+        """Start a process and wait until url answers"""
+        stderr = tempfile.TemporaryFile()
+        process = subprocess.Popen([sys.executable, *command], cwd=BENCH_DIR,
+                                   stdout=subprocess.DEVNULL, stderr=stderr)
+        self.processes.append(process)
+        self.stderr[process] = stderr
+        await _wait_until_up(client, url, process, stderr)
+
+    async def start(self, client: httpx.AsyncClient):
+        args = self.args
+        fixture = ['fixture_sites.py', '--port', str(self.fixture_port), '--products', str(args.products),
+                   '--render', args.render, '--latency-ms', str(args.latency_ms)]
+        if args.embed_state:
+            fixture.append('--embed-state')
+        fixture_url = f"http://127.0.0.1:{self.fixture_port}"
+        await self._spawn(client, fixture_url, *fixture)
+
+        api = ['fixture_api.py', '--fixture-url', fixture_url, '--port', str(self.api_port)]
+        if args.no_fast_path:
+            api.append('--no-fast-path')
+        if args.no_rate_limits:
+            api.append('--no-rate-limits')
+        await self._spawn(client, self.api_url, *api)
+
+    def stop(self):
+        for process in reversed(self.processes):
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        for stderr in self.stderr.values():
+            stderr.close()
+        self.stderr.clear()
+
+class QueryMix:
+    """Picks queries so that roughly cache_hit_ratio of requests are served from the result cache"""
+
+    def __init__(self, queries: List[str], cache_hit_ratio: float, seed: int):
+        self.queries = queries
+        self.cache_hit_ratio = cache_hit_ratio
+        self._random = random.Random(seed)
+        self._unique = itertools.count()
+
+    def next(self) -> str:
+        query = self._random.choice(self.queries)
+        if self._random.random() < self.cache_hit_ratio:
+            return query
+        # A query nobody asked for before; the fixture sites answer any query
+        return f"{query} {next(self._unique)}"
+
+class LevelRecorder:
+    """Outcomes of one concurrency level"""
+
+    def __init__(self):
+        self.latency = LatencyWindow(size=1_000_000)
+        self.outcomes: Counter = Counter()
+        self.site_errors = 0
+        self.in_flight = 0
+        self.timeline: List[Dict[str, Any]] = []
+
+    @property
+    def completed(self) -> int:
+        return sum(self.outcomes.values())
+
+async def _one_request(client: httpx.AsyncClient, url: str, body: Dict[str, Any], timeout: float,
+                       recorder: LevelRecorder) -> float:
+    """Send one comparison and record its outcome; returns seconds to back off before the next"""
+    recorder.in_flight += 1
+    start = time.perf_counter()
+    try:
+        response = await client.post(url, json=body, timeout=timeout)
+    except httpx.TimeoutException:
+        recorder.outcomes['timeout'] += 1
+        return 0.0
+    except httpx.HTTPError:
+        recorder.outcomes['connection_error'] += 1
+        return 1.0
+    finally:
+        recorder.in_flight -= 1
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    if response.status_code == 200:
+        recorder.outcomes['ok'] += 1
+        recorder.latency.add(elapsed_ms)
+        sites = response.json().get('sites', {})
+        recorder.site_errors += sum(1 for site in sites.values() if site.get('status') == 'error')
+    elif response.status_code in (429, 503):
+        recorder.outcomes[f'shed_{response.status_code}'] += 1
+        # Honour Retry-After like a well-behaved client, capped so the level keeps pushing
+        return min(float(response.headers.get('Retry-After', 1)), 1.0)
+    else:
+        recorder.outcomes[f'http_{response.status_code}'] += 1
+    return 0.0
+
+async def _sample(recorder: LevelRecorder, api_pid: Optional[int], interval: float, started: float):
+    last_completed = 0
+    while True:
+        await asyncio.sleep(interval)
+        # Walking /proc takes a few milliseconds; keep it off the event loop
+        tree = await asyncio.to_thread(process_tree, api_pid or 1)
+        completed = recorder.completed
+        recorder.timeline.append({
+            't_s': round(time.perf_counter() - started, 1),
+            'completed': completed,
+            'rps': round((completed - last_completed) / interval, 1),
+            'in_flight': recorder.in_flight,
+            'errors': completed - recorder.outcomes['ok'],
+            'chromium_processes': sum(1 for p in tree if 'chrom' in p['name'].lower()),
+            'api_tree_rss_mb': round(sum(p['rss'] for p in tree) / 2 ** 20, 1) if api_pid else None,
+        })
+        last_completed = completed
+
+async def run_level(client: httpx.AsyncClient, api_url: str, concurrency: int, args, mix: QueryMix,
+                    api_pid: Optional[int]) -> Dict[str, Any]:
+    recorder = LevelRecorder()
+    url = f"{api_url}/compare"
+    started = time.perf_counter()
+    stop_at = started + args.duration
+
+    async def client_loop():
+        while time.perf_counter() < stop_at:
+            body = {'query': mix.next(), 'max_results_per_site': args.max_results}
+            if args.sites:
+                body['sites'] = args.sites
+            backoff = await _one_request(client, url, body, args.timeout, recorder)
+            if backoff:
+                await asyncio.sleep(backoff)
+
+    sampler = asyncio.create_task(_sample(recorder, api_pid, args.sample_interval, started))
+    try:
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    finally:
+        sampler.cancel()
+    elapsed = time.perf_counter() - started
+
+    completed = recorder.completed
+    ok = recorder.outcomes['ok']
+    shed = recorder.outcomes['shed_429'] + recorder.outcomes['shed_503']
+    latency = recorder.latency
+    return {
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'requests': completed,
+        'throughput_rps': round(ok / elapsed, 2),
+        'latency_ms': {
+            'p50': latency.percentile(50),
+            'p95': latency.percentile(95),
+            'p99': latency.percentile(99),
+            'max': latency.percentile(100),
+        },
+        'error_rate': round((completed - ok) / completed, 4) if completed else None,
+        'timeout_rate': round(recorder.outcomes['timeout'] / completed, 4) if completed else None,
+        'shed_rate': round(shed / completed, 4) if completed else None,
+        'outcomes': dict(recorder.outcomes),
+        'site_errors': recorder.site_errors,
+        'peak_chromium_processes': max((s['chromium_processes'] for s in recorder.timeline), default=0),
+        'timeline': recorder.timeline,
+    }
+
+async def warm_cache(client: httpx.AsyncClient, api_url: str, args):
+    """Scrape every query of the mix once so cache hits are hits from the first request"""
+    for query in args.queries:
+        body = {'query': query, 'max_results_per_site': args.max_results}
+        if args.sites:
+            body['sites'] = args.sites
+        try:
+            await client.post(f"{api_url}/compare", json=body, timeout=args.timeout)
+        except httpx.HTTPError:
+            pass
+
+def sustainable(levels: List[Dict[str, Any]], slo_ms: float, max_error_rate: float) -> Optional[Dict[str, Any]]:
+    """The highest-throughput level whose p95 latency and error rate stay within bounds"""
+    passing = [level for level in levels
+               if level['latency_ms']['p95'] is not None and level['latency_ms']['p95'] <= slo_ms
+               and level['error_rate'] is not None and level['error_rate'] <= max_error_rate]
+    if not passing:
+        return None
+    best = max(passing, key=lambda level: level['throughput_rps'])
+    return {'concurrency': best['concurrency'], 'throughput_rps': best['throughput_rps']}
+
+async def run(args) -> Dict[str, Any]:
+    result: Dict[str, Any] = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+    }
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 10)
+    stack = None if args.url else Stack(args)
+    async with httpx.AsyncClient(limits=limits) as client:
+        try:
+            if stack is not None:
+                await stack.start(client)
+            api_url = args.url or stack.api_url
+            api_pid = stack.api_pid if stack is not None else None
+            mix = QueryMix(args.queries, args.cache_hit_ratio, args.seed)
+            if args.cache_hit_ratio > 0:
+                await warm_cache(client, api_url, args)
+            levels = []
+            for concurrency in args.concurrency:
+                level = await run_level(client, api_url, concurrency, args, mix, api_pid)
+                levels.append(level)
+                print(f"c={concurrency:<4d} {level['throughput_rps']:>8.2f} req/s  "
+                      f"p50 {level['latency_ms']['p50'] or 0:>7.0f} ms  p95 {level['latency_ms']['p95'] or 0:>7.0f} ms  "
+                      f"p99 {level['latency_ms']['p99'] or 0:>7.0f} ms  errors {level['error_rate'] or 0:.1%}  "
+                      f"timeouts {level['timeout_rate'] or 0:.1%}  chromium {level['peak_chromium_processes']}")
+                if args.cooldown:
+                    await asyncio.sleep(args.cooldown)
+            result['levels'] = levels
+            result['sustainable'] = sustainable(levels, args.slo_ms, args.max_error_rate)
+            try:
+                result['server'] = {
+                    'scraper': (await client.get(f"{api_url}/scraper/stats")).json(),
+                    'admission': (await client.get(f"{api_url}/admission/stats")).json(),
+                }
+            except (httpx.HTTPError, ValueError):
+                pass
+        finally:
+            if stack is not None:
+                stack.stop()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test POST /compare against the local fixture sites")
+    parser.add_argument('--url', help="Test an already running API instead of starting one against the fixtures")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16],
+                        help="Concurrent clients per level, run in order")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds per concurrency level")
+    parser.add_argument('--cooldown', type=float, default=2.0, help="Seconds between levels")
+    parser.add_argument('--queries', nargs='+', default=DEFAULT_QUERIES, help="Query mix, picked uniformly")
+    parser.add_argument('--cache-hit-ratio', type=float, default=0.5,
+                        help="Fraction of requests repeating a warmed query")
+    parser.add_argument('--max-results', type=int, default=10)
+    parser.add_argument('--sites', nargs='+', choices=['flipkart', 'amazon', 'reliance'])
+    parser.add_argument('--timeout', type=float, default=60.0, help="Client timeout per request in seconds")
+    parser.add_argument('--sample-interval', type=float, default=1.0)
+    parser.add_argument('--slo-ms', type=float, default=10000.0, help="p95 latency a level must meet to count")
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--products', type=int, default=24, help="Product cards per fixture page")
+    parser.add_argument('--render', choices=['server', 'client'], default='server')
+    parser.add_argument('--latency-ms', type=int, default=200, help="Fixture server think time per search page")
+    parser.add_argument('--embed-state', action='store_true')
+    parser.add_argument('--no-fast-path', action='store_true', help="Make the API scrape every page with Chromium")
+    parser.add_argument('--no-rate-limits', action='store_true',
+                        help="Lift the API's per-site outbound rate limits to measure the box rather than the limits")
+    parser.add_argument('--output', help="JSON report path (default: benchmarks/results/load-<timestamp>.json)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    if result.get('sustainable'):
+        print(f"Sustainable: {result['sustainable']['throughput_rps']} req/s "
+              f"at concurrency {result['sustainable']['concurrency']}")
+    print(f"Report written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Process-tree memory and process counts read from /proc
+
+psutil is not a dependency, so this reads /proc directly; on platforms
+without it the samplers report None.
+"""
+
+import os
+import resource
+import threading
+from typing import Dict, List, Optional
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def _processes() -> Dict[int, Dict[str, object]]:
+    """pid -> {'ppid', 'name', 'rss'} of every visible process"""
+    processes = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The name is parenthesised and may itself contain spaces or parentheses
+        name = stat[stat.index('(') + 1:stat.rindex(')')]
+        rest = stat[stat.rindex(')') + 2:].split()
+        processes[int(entry)] = {'ppid': int(rest[1]), 'name': name, 'rss': int(rest[21]) * PAGE_SIZE}
+    return processes
+
+def process_tree(root_pid: Optional[int] = None) -> List[Dict[str, object]]:
+    """The root process and all of its descendants, or [] without /proc"""
+    if not os.path.isdir('/proc'):
+        return []
+    root_pid = root_pid or os.getpid()
+    processes = _processes()
+    children: Dict[int, List[int]] = {}
+    for pid, info in processes.items():
+        children.setdefault(info['ppid'], []).append(pid)
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        if pid in processes:
+            tree.append(dict(processes[pid], pid=pid))
+        stack.extend(children.get(pid, []))
+    return tree
+
+def tree_rss_bytes(root_pid: Optional[int] = None) -> Optional[int]:
+    """Resident memory of a process and its descendants (e.g. the Playwright driver and Chromium)"""
+    tree = process_tree(root_pid)
+    return sum(p['rss'] for p in tree) if tree else None
+
+def chromium_processes(root_pid: Optional[int] = None) -> int:
+    """Number of Chromium processes (browser, renderers, GPU, utilities) under a process"""
+    return sum(1 for p in process_tree(root_pid) if 'chrom' in p['name'].lower())
+
+def max_rss_bytes() -> Dict[str, int]:
+    """Peak RSS from getrusage: this process, and its largest waited-for child"""
+    # ru_maxrss is in kilobytes on Linux
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024,
+    }
+
+class TreeSampler:
+    """Background thread that tracks the peak process-tree RSS and Chromium process count"""
+
+    def __init__(self, interval: float = 0.05, root_pid: Optional[int] = None):
+        """
+        Args:
+            interval: Seconds between samples
+            root_pid: Process whose tree is sampled (default: this one)
+        """
+        self.interval = interval
+        self.root_pid = root_pid
+        self.peak_rss: Optional[int] = None
+        self.peak_chromium = 0
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        tree = process_tree(self.root_pid)
+        if not tree:
+            return
+        self.samples += 1
+        rss = sum(p['rss'] for p in tree)
+        self.peak_rss = rss if self.peak_rss is None else max(self.peak_rss, rss)
+        self.peak_chromium = max(self.peak_chromium,
+                                 sum(1 for p in tree if 'chrom' in p['name'].lower()))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self) -> 'TreeSampler':
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sample()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Offline scraper benchmark against the local fixture sites
+
+Runs each scraper several times against fixture_sites.py and writes a JSON
+report with per-phase timings (launch, page, navigate, ready, extract, http),
+browser protocol call counts, peak RSS and products per second.
+
+Usage:
+    python benchmarks/run_benchmark.py --mode browser --iterations 10
+    python benchmarks/run_benchmark.py --mode http --render server --embed-state
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import platform
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from fixture_sites import SCRAPER_MODULES, SITES, FixtureConfig, FixtureServer, scrapers_pointed_at
+from proc_stats import TreeSampler, max_rss_bytes
+from scraper.browser_pool import BrowserPool
+from scraper.flipkart import scrape_flipkart
+from scraper.amazon import scrape_amazon
+from scraper.reliance import scrape_reliance
+from scraper.http_fetch import HttpFetcher
+from scraper.latency import LatencyWindow
+from scraper.report import ScrapeReport
+
+SCRAPERS = {'flipkart': scrape_flipkart, 'amazon': scrape_amazon, 'reliance': scrape_reliance}
+DEFAULT_QUERIES = ['iphone 15', 'samsung galaxy m14', 'sony headphones', 'dell laptop']
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+class ProtocolCallCounter:
+    """
+    Counts the calls Playwright sends to its driver, by method name
+
+    Each call (goto, querySelectorAll, evaluate, ...) is one round trip to the
+    driver, which issues the Chrome DevTools Protocol commands behind it; this
+    is the closest per-scrape CDP cost visible from the Python client.
+    """
+
+    def __init__(self):
+        self.calls: Counter = Counter()
+
+    @contextmanager
+    def installed(self):
+        try:
+            from playwright._impl._connection import Connection
+        except ImportError:
+            yield self
+            return
+        original = Connection._send_message_to_server
+        calls = self.calls
+
+        def counting(connection, object, method, params, *args, **kwargs):
+            calls[method] += 1
+            return original(connection, object, method, params, *args, **kwargs)
+
+        Connection._send_message_to_server = counting
+        try:
+            yield self
+        finally:
+            Connection._send_message_to_server = original
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+@contextmanager
+def fast_path(enabled: bool):
+    """Switch the browserless fast path of all three scrapers on or off"""
+    originals = {site: module.FAST_PATH for site, module in SCRAPER_MODULES.items()}
+    for module in SCRAPER_MODULES.values():
+        module.FAST_PATH = dataclasses.replace(module.FAST_PATH, enabled=enabled)
+    try:
+        yield
+    finally:
+        for site, module in SCRAPER_MODULES.items():
+            module.FAST_PATH = originals[site]
+
+async def bench_site(site: str, queries: List[str], iterations: int, max_results: int,
+                     pool: Optional[BrowserPool], http: Optional[HttpFetcher],
+                     counter: ProtocolCallCounter) -> Dict[str, Any]:
+    """Scrape one site iterations times per query, one scrape at a time"""
+    scrape = SCRAPERS[site]
+    durations = LatencyWindow(size=10000)
+    phases: Dict[str, LatencyWindow] = {}
+    sources: Counter = Counter()
+    errors: List[str] = []
+    products_total = 0
+    calls_before = counter.total
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for query in queries:
+            report = ScrapeReport(site=site)
+            scrape_start = time.perf_counter()
+            try:
+                products = await scrape(query, max_results, pool=pool, report=report, http=http)
+            except Exception as e:
+                products = []
+                report.error = report.error or str(e)
+            durations.add(round((time.perf_counter() - scrape_start) * 1000, 1))
+            products_total += len(products)
+            sources[report.source or 'none'] += 1
+            if report.error:
+                errors.append(report.error.splitlines()[0][:200])
+            for name, value in report.phases_ms.items():
+                phases.setdefault(name, LatencyWindow(size=10000)).add(value)
+    elapsed = time.perf_counter() - started
+    scrapes = iterations * len(queries)
+    calls = counter.total - calls_before
+    return {
+        'scrapes': scrapes,
+        'products': products_total,
+        'products_per_scrape': round(products_total / scrapes, 2),
+        'products_per_second': round(products_total / elapsed, 2) if elapsed else None,
+        'elapsed_s': round(elapsed, 3),
+        'scrape': durations.summary(),
+        'phases': {name: window.summary() for name, window in sorted(phases.items())},
+        'protocol_calls': calls,
+        'protocol_calls_per_scrape': round(calls / scrapes, 1),
+        'sources': dict(sources),
+        'errors': len(errors),
+        'first_errors': errors[:3],
+    }
+
+async def run(args) -> Dict[str, Any]:
+    config = FixtureConfig(products=args.products, render=args.render, client_delay_ms=args.client_delay_ms,
+                           latency_ms=args.latency_ms, embed_state=args.embed_state,
+                           recorded_dir=args.recorded_dir)
+    counter = ProtocolCallCounter()
+    sampler = TreeSampler()
+    browser = args.mode == 'browser'
+    pool = BrowserPool(max_pages=1) if browser else None
+    http = None if browser else HttpFetcher()
+    result: Dict[str, Any] = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'mode': args.mode,
+        'fixture': dataclasses.asdict(config),
+        'queries': args.queries,
+        'iterations': args.iterations,
+        'max_results': args.max_results,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+    }
+
+    with FixtureServer(config) as server, scrapers_pointed_at(server), fast_path(not browser), \
+            counter.installed():
+        sampler.start()
+        try:
+            if pool is not None:
+                launch_start = time.perf_counter()
+                try:
+                    await pool.start()
+                except Exception as e:
+                    result['error'] = f"Browser launch failed: {str(e).splitlines()[0]}"
+                    return result
+                result['launch_ms'] = round((time.perf_counter() - launch_start) * 1000, 1)
+                result['launch_protocol_calls'] = counter.total
+
+            sites = {}
+            for site in args.sites:
+                sites[site] = await bench_site(site, args.queries, args.iterations, args.max_results,
+                                               pool, http, counter)
+            result['sites'] = sites
+            scrapes = sum(s['scrapes'] for s in sites.values())
+            products = sum(s['products'] for s in sites.values())
+            elapsed = sum(s['elapsed_s'] for s in sites.values())
+            result['totals'] = {
+                'scrapes': scrapes,
+                'products': products,
+                'products_per_second': round(products / elapsed, 2) if elapsed else None,
+                'protocol_calls': counter.total,
+                'protocol_calls_by_method': dict(counter.calls.most_common()),
+                'fixture_requests': dict(server.requests),
+            }
+            if pool is not None:
+                result['pool'] = pool.stats()
+        finally:
+            if pool is not None:
+                await pool.close()
+            if http is not None:
+                await http.close()
+            sampler.stop()
+            rusage = max_rss_bytes()
+            result['memory'] = {
+                'peak_tree_rss_mb': round(sampler.peak_rss / 2 ** 20, 1) if sampler.peak_rss else None,
+                'peak_chromium_processes': sampler.peak_chromium,
+                'max_rss_self_mb': round(rusage['self'] / 2 ** 20, 1),
+                'max_rss_children_mb': round(rusage['children'] / 2 ** 20, 1),
+            }
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against local fixture sites")
+    parser.add_argument('--mode', choices=['browser', 'http'], default='browser',
+                        help="browser: Playwright with the fast path off; http: browserless fast path")
+    parser.add_argument('--sites', nargs='+', choices=SITES, default=list(SITES))
+    parser.add_argument('--queries', nargs='+', default=DEFAULT_QUERIES)
+    parser.add_argument('--iterations', type=int, default=3, help="Passes over the query list per site")
+    parser.add_argument('--max-results', type=int, default=20)
+    parser.add_argument('--products', type=int, default=24, help="Product cards per fixture page")
+    parser.add_argument('--render', choices=['server', 'client'], default='server')
+    parser.add_argument('--client-delay-ms', type=int, default=150)
+    parser.add_argument('--latency-ms', type=int, default=0, help="Fixture server think time per search page")
+    parser.add_argument('--embed-state', action='store_true', help="Embed results as page state JSON")
+    parser.add_argument('--recorded-dir', help="Serve <site>.html pages from this directory")
+    parser.add_argument('--output', help="JSON report path (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{args.mode}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    if 'error' in result:
+        print(result['error'])
+    for site, stats in result.get('sites', {}).items():
+        print(f"{site:10s} {stats['products_per_second']:>8} products/s  "
+              f"p50 {stats['scrape']['p50_ms']:.0f} ms  "
+              f"{stats['protocol_calls_per_scrape']} calls/scrape  {stats['errors']} errors")
+    print(f"Report written to {output}")
+    sys.exit(1 if 'error' in result else 0)
+
+if __name__ == "__main__":
+    main()
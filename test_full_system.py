@@ -144,6 +144,9 @@ async def main():
     await test_site_status()
     await performance_test()
     
+    # Release the shared browser pool
+    await comparison_service.close()
+    
     print("\n🎉 Test Suite Completed!")
     print("=" * 60)
     print("Next steps:")
@@ -0,0 +1,20 @@
+import os
+import sys
+import pytest
+
+# The backend modules import each other as top-level modules, as when run from backend/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+@pytest.fixture
+def make_service():
+    """Factory for a ComparisonService whose sites are scraped by stub coroutines, with no rate limits"""
+    from comparison_service import ComparisonService
+    from scrape_scheduler import RateLimit
+
+    def make(scrapers, **kwargs):
+        kwargs.setdefault('rate_limits', {site: RateLimit(rate=1000, burst=1000) for site in scrapers})
+        service = ComparisonService(**kwargs)
+        service.scrapers = dict(scrapers)
+        return service
+
+    return make
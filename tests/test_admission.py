@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from admission import AdmissionController, OverloadedError
+
+def test_admits_up_to_the_in_flight_limit_then_queues_fifo():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=2, max_wait=1)
+        order = []
+
+        async def request(name):
+            async with admission.admit():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(request(name) for name in 'abc'))
+        return order, admission.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ['a', 'b', 'c']
+    assert stats['admitted'] == 3
+    assert stats['in_flight'] == 0 and stats['queued'] == 0
+
+def test_full_queue_is_shed_with_429():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=1, max_wait=1)
+        holder = await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError) as shed:
+            await admission.acquire()
+        holder.release()
+        (await waiter).release()
+        return shed.value, admission
+
+    error, admission = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.retry_after >= 1
+    assert admission.rejected_queue_full == 1
+    assert admission.in_flight == 0
+
+def test_wait_timeout_is_shed_with_503():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=4, max_wait=0.02)
+        holder = await admission.acquire()
+        with pytest.raises(OverloadedError) as shed:
+            await admission.acquire()
+        queued = admission.queued
+        holder.release()
+        return shed.value, queued, admission
+
+    error, queued, admission = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert queued == 0
+    assert admission.rejected_wait_timeout == 1
+    assert admission.in_flight == 0
+
+def test_exempt_requests_bypass_admission():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=0)
+        holder = await admission.acquire()
+        async with admission.admit(exempt=True) as slot:
+            assert slot is None
+        holder.release()
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert admission.exempted == 1
+    assert admission.in_flight == 0
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=4, max_wait=1)
+        holder = await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        queued = admission.queued
+        holder.release()
+        holder.release()
+        return queued, admission
+
+    queued, admission = asyncio.run(scenario())
+    assert queued == 0
+    assert admission.in_flight == 0
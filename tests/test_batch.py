@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+
+@pytest.mark.parametrize('concurrency, max_concurrent_scrapes', [(2, 6), (50, 3), (None, 3)])
+def test_batch_runs_at_most_min_of_concurrency_and_scheduler_limit(make_service, concurrency,
+                                                                   max_concurrent_scrapes):
+    running = peak = 0
+
+    async def scraper(query, max_results, **kwargs):
+        await asyncio.sleep(0.02)
+        return []
+
+    async def scenario():
+        service = make_service({'amazon': scraper}, max_concurrent_scrapes=max_concurrent_scrapes)
+        compare_products = service.compare_products
+
+        async def counting_compare_products(*args, **kwargs):
+            # Queries in flight at the batch level, whether or not their scrapes got a slot yet
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                return await compare_products(*args, **kwargs)
+            finally:
+                running -= 1
+
+        service.compare_products = counting_compare_products
+        events = [event async for event in service.compare_batch_stream(
+            [f'query {i}' for i in range(8)] + ['QUERY 0'], sites=['amazon'], concurrency=concurrency
+        )]
+        return events
+
+    events = asyncio.run(scenario())
+    summary = events[-1]
+    assert summary['event'] == 'summary'
+    assert summary['unique_queries'] == 8
+    assert len(events) == 9
+    assert peak == min(concurrency or max_concurrent_scrapes, max_concurrent_scrapes)
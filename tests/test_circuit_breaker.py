@@ -0,0 +1,57 @@
+import asyncio
+import time
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+def test_opens_after_threshold_failures_in_window():
+    breaker = CircuitBreaker(failure_threshold=3, window=60, cooldown=30)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+    assert 29 < breaker.retry_after() <= 30
+
+def test_failures_outside_the_window_do_not_count():
+    breaker = CircuitBreaker(failure_threshold=2, window=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+
+def test_coalesced_timeout_counts_as_one_failure(make_service):
+    async def slow(query, max_results, **kwargs):
+        await asyncio.sleep(1)
+        return []
+
+    async def scenario():
+        service = make_service({'amazon': slow})
+        await asyncio.gather(*(service.compare_products('phone', sites=['amazon'], deadline=0.1)
+                               for _ in range(3)))
+        await asyncio.sleep(0.01)
+        return service
+
+    service = asyncio.run(scenario())
+    assert service.breakers['amazon'].snapshot()['recent_failures'] == 1
+    assert service.health.sites['amazon'].outcomes[-1] == (False, 'scrape')
+    assert len(service.health.sites['amazon'].outcomes) == 1
@@ -0,0 +1,79 @@
+import asyncio
+from disconnect import CancelOnDisconnectMiddleware, disconnect_stats
+
+def make_app(duration: float, events: list):
+    async def app(scope, receive, send):
+        try:
+            await asyncio.sleep(duration)
+        except asyncio.CancelledError:
+            events.append('cancelled')
+            raise
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'done'})
+        events.append('finished')
+    return app
+
+def make_receive(disconnect_after: float):
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(disconnect_after)
+        return {'type': 'http.disconnect'}
+    return receive
+
+def run(path: str, duration: float, disconnect_after: float):
+    events, sent = [], []
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = CancelOnDisconnectMiddleware(make_app(duration, events))
+    scope = {'type': 'http', 'method': 'GET', 'path': path}
+    asyncio.run(middleware(scope, make_receive(disconnect_after), send))
+    return events, sent
+
+def test_handler_is_cancelled_when_the_client_disconnects():
+    before = disconnect_stats['requests_cancelled']
+    events, sent = run('/compare/phone', duration=1, disconnect_after=0.02)
+    assert events == ['cancelled']
+    assert sent == []
+    assert disconnect_stats['requests_cancelled'] == before + 1
+
+def test_finished_requests_are_not_cancelled():
+    before = disconnect_stats['requests_cancelled']
+    events, sent = run('/compare/phone', duration=0.01, disconnect_after=1)
+    assert events == ['finished']
+    assert sent[0]['status'] == 200
+    assert disconnect_stats['requests_cancelled'] == before
+
+def test_other_paths_are_passed_through():
+    events, _ = run('/health', duration=0.01, disconnect_after=0.001)
+    assert events == ['finished']
+
+def test_disconnect_after_the_response_is_not_a_cancel():
+    # Like uvicorn: receive() reports http.disconnect as soon as the last body is sent
+    events, response_done = [], asyncio.Event()
+
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'chunk', 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        # Stands in for a BackgroundTask such as an admission slot release
+        await asyncio.sleep(0.05)
+        events.append('background')
+
+    async def receive():
+        await response_done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.body' and not message.get('more_body', False):
+            response_done.set()
+
+    before = disconnect_stats['requests_cancelled']
+    middleware = CancelOnDisconnectMiddleware(app)
+    asyncio.run(middleware({'type': 'http', 'method': 'GET', 'path': '/compare/stream/phone'}, receive, send))
+    assert events == ['background']
+    assert disconnect_stats['requests_cancelled'] == before
@@ -0,0 +1,48 @@
+import asyncio
+from health_prober import HealthProber
+
+class FakeHttp:
+    """Answers probes with a fixed status code per URL, or hangs for None"""
+    can_probe = True
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    async def probe(self, url):
+        status = self.responses[url]
+        if status is None:
+            await asyncio.sleep(3600)
+        if isinstance(status, Exception):
+            raise status
+        return status
+
+def make_prober(responses, **kwargs):
+    return HealthProber(FakeHttp(responses), {site: site for site in responses}, **kwargs)
+
+def test_probe_round_sets_each_site_status():
+    prober = make_prober({'up': 200, 'walled': 403, 'down': 503, 'hung': None, 'refused': OSError('refused')},
+                         probe_timeout=0.05)
+    asyncio.run(prober.probe_all())
+    assert prober.statuses() == {
+        'up': 'online', 'walled': 'online', 'down': 'offline', 'hung': 'offline', 'refused': 'offline'
+    }
+    assert prober.rounds == 1
+    assert prober.sites['hung'].last_probe['error'].startswith('No response within')
+
+def test_sites_start_unknown():
+    assert make_prober({'site': 200}).statuses() == {'site': 'unknown'}
+
+def test_failed_scrapes_degrade_a_reachable_site():
+    prober = make_prober({'site': 200}, degraded_error_rate=0.25)
+    asyncio.run(prober.probe_all())
+    prober.record_scrape('site', 'success', 800)
+    prober.record_scrape('site', 'empty', 900)
+    assert prober.status('site') == 'degraded'
+    assert prober.sites['site'].last_error == 'empty'
+    assert prober.sites['site'].scrape_latency.count == 2
+
+def test_a_scrape_success_after_a_failed_probe_is_not_offline():
+    prober = make_prober({'site': 503}, degraded_error_rate=0.9)
+    asyncio.run(prober.probe_all())
+    prober.record_scrape('site', 'success', 800)
+    assert prober.status('site') == 'online'
@@ -0,0 +1,92 @@
+import asyncio
+import time
+from retry_policy import RetryPolicy
+
+PRODUCT = {'title': 'Phone', 'price': 100, 'url': 'https://example.com/p', 'site': 'amazon'}
+
+def prime_latency(service, site: str, latency_ms: float, samples: int = 5):
+    for _ in range(samples):
+        service.health.sites[site].scrape_latency.add(latency_ms)
+
+def test_queued_attempts_are_not_hedged(make_service):
+    starts = []
+
+    async def scraper(query, max_results, **kwargs):
+        starts.append((query, time.monotonic()))
+        await asyncio.sleep(0.2)
+        return [PRODUCT]
+
+    async def scenario():
+        service = make_service({'amazon': scraper}, max_concurrent_scrapes=1, retry_policies={
+            'amazon': RetryPolicy(hedge_min_samples=1, min_hedge_delay=0.01)
+        })
+        # Hedge once an attempt has been scraping for 250 ms
+        prime_latency(service, 'amazon', 250)
+        await asyncio.gather(service.search_site('amazon', 'first'), service.search_site('amazon', 'second'))
+        return service
+
+    service = asyncio.run(scenario())
+    # The second query queued 200 ms behind the first and then scraped for 200 ms: never slow
+    assert [query for query, _ in starts] == ['first', 'second']
+    assert service.hedges_started == 0
+
+def test_slow_attempt_is_hedged_and_the_backup_can_win(make_service):
+    calls = 0
+
+    async def scraper(query, max_results, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(1 if calls == 1 else 0.01)
+        return [dict(PRODUCT, title=f'call {calls}')]
+
+    async def scenario():
+        service = make_service({'amazon': scraper}, max_concurrent_scrapes=2, retry_policies={
+            'amazon': RetryPolicy(hedge_min_samples=1, min_hedge_delay=0.01)
+        })
+        prime_latency(service, 'amazon', 50)
+        started = time.monotonic()
+        products = await service.search_site('amazon', 'phone')
+        return service, products, time.monotonic() - started
+
+    service, products, elapsed = asyncio.run(scenario())
+    assert products[0]['title'] == 'call 2'
+    assert elapsed < 0.5
+    assert service.retry_stats() == {'retries': 0, 'hedges_started': 1, 'hedges_won': 1}
+
+def test_transient_failures_are_retried(make_service):
+    calls = 0
+
+    async def scraper(query, max_results, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError('net::ERR_CONNECTION_RESET')
+        return [PRODUCT]
+
+    async def scenario():
+        service = make_service({'amazon': scraper}, retry_policies={
+            'amazon': RetryPolicy(base_delay=0.01, max_delay=0.01, hedge=False)
+        })
+        products = await service.search_site('amazon', 'phone')
+        return service, products
+
+    service, products = asyncio.run(scenario())
+    assert products == [PRODUCT]
+    assert service.retries == 1
+    assert service.breakers['amazon'].snapshot()['recent_failures'] == 0
+
+def test_permanent_failures_are_not_retried(make_service):
+    async def scraper(query, max_results, **kwargs):
+        raise ValueError('unexpected page layout')
+
+    async def scenario():
+        service = make_service({'amazon': scraper}, retry_policies={'amazon': RetryPolicy(hedge=False)})
+        try:
+            await service.search_site('amazon', 'phone')
+        except ValueError:
+            pass
+        return service
+
+    service = asyncio.run(scenario())
+    assert service.retries == 0
+    assert service.breakers['amazon'].snapshot()['recent_failures'] == 1
@@ -0,0 +1,37 @@
+import asyncio
+import time
+import httpx
+from scraper.http_fetch import FastPathConfig, HttpFetcher, fast_path_stats, scrape_over_http
+
+def fetcher_for(handler) -> HttpFetcher:
+    http = HttpFetcher()
+    http._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return http
+
+def test_stalled_fast_path_falls_back_within_its_timeout():
+    async def stall(request):
+        await asyncio.sleep(5)
+        return httpx.Response(200, text='<html></html>')
+
+    async def scenario():
+        http = fetcher_for(stall)
+        started = time.monotonic()
+        result = await scrape_over_http(http, 'stalled', 'https://example.com/search', FastPathConfig(timeout=0.1),
+                                        ['.card'], {}, 10, lambda record: record)
+        await http.close()
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(scenario())
+    assert result is None
+    assert elapsed < 1
+    assert fast_path_stats['stalled']['http_fallbacks'] == 1
+
+def test_get_text_returns_the_body():
+    async def scenario():
+        http = fetcher_for(lambda request: httpx.Response(200, text='ok'))
+        try:
+            return await http.get_text('https://example.com/', timeout=1)
+        finally:
+            await http.close()
+
+    assert asyncio.run(scenario()) == 'ok'
@@ -0,0 +1,34 @@
+import asyncio
+from job_manager import JobManager
+
+class FakeService:
+    async def compare_products(self, query, *args, **kwargs):
+        return {'query': query}
+
+def test_oldest_finished_jobs_are_evicted_beyond_max_finished():
+    async def scenario():
+        jobs = JobManager(FakeService(), max_workers=1, max_finished=2)
+        await jobs.start()
+        submitted = []
+        for query in ('a', 'b', 'c', 'd'):
+            submitted.append(jobs.submit(query))
+            await jobs._queue.join()
+        await jobs.close()
+        return jobs, submitted
+
+    jobs, submitted = asyncio.run(scenario())
+    assert [jobs.get(job.id) is not None for job in submitted] == [False, False, True, True]
+    stats = jobs.stats()
+    assert stats['max_finished'] == 2
+    assert stats['evicted'] == 2
+    assert stats['jobs'] == {'completed': 2}
+
+def test_queued_and_running_jobs_are_never_evicted():
+    async def scenario():
+        jobs = JobManager(FakeService(), max_workers=1, max_finished=0)
+        queued = [jobs.submit(query) for query in ('a', 'b')]
+        return jobs, queued
+
+    jobs, queued = asyncio.run(scenario())
+    assert all(jobs.get(job.id) is job for job in queued)
+    assert jobs.stats()['evicted'] == 0
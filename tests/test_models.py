@@ -0,0 +1,17 @@
+import pytest
+from pydantic import ValidationError
+from models import BatchComparisonRequest, ComparisonRequest, SearchRequest
+
+def test_null_max_results_means_the_default():
+    assert SearchRequest(query='phone', max_results=None).max_results == 20
+    assert ComparisonRequest(query='phone', max_results_per_site=None).max_results_per_site == 10
+    assert BatchComparisonRequest(queries=['phone'], max_results_per_site=None).max_results_per_site == 10
+
+def test_explicit_max_results_is_kept():
+    assert SearchRequest(query='phone', max_results=5).max_results == 5
+    assert ComparisonRequest.model_validate({'query': 'phone', 'max_results_per_site': 3}).max_results_per_site == 3
+
+def test_batch_concurrency_must_be_positive():
+    with pytest.raises(ValidationError):
+        BatchComparisonRequest(queries=['phone'], concurrency=0)
+    assert BatchComparisonRequest(queries=['phone'], concurrency=4).concurrency == 4
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+import main
+from profiler import LoopProfiler, ProfilerBusyError
+
+def blocking_sleep():
+    time.sleep(0.15)
+
+def test_stall_is_attributed_to_the_blocking_function():
+    async def scenario():
+        profiler = LoopProfiler()
+        profile = asyncio.create_task(profiler.profile(seconds=0.5, interval=0.002))
+        await asyncio.sleep(0.1)
+        blocking_sleep()
+        return await profile
+
+    report = asyncio.run(scenario())
+    assert report['stalls']['count'] == 1
+    stall = report['stalls']['longest'][0]
+    assert 120 <= stall['duration_ms'] <= 250
+    assert stall['stack'].endswith('test_profiler.py:blocking_sleep')
+    assert report['event_loop_lag']['max_ms'] >= 120
+    assert 'test_profiler.py:blocking_sleep' in report['collapsed']
+
+def test_one_profile_at_a_time():
+    async def scenario():
+        profiler = LoopProfiler()
+        first = asyncio.create_task(profiler.profile(seconds=0.1))
+        await asyncio.sleep(0)
+        with pytest.raises(ProfilerBusyError):
+            await profiler.profile(seconds=0.1)
+        await first
+        return profiler
+
+    profiler = asyncio.run(scenario())
+    assert not profiler.running and profiler.profiles == 1
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'ADMIN_TOKEN', 'secret-token')
+    monkeypatch.setattr(main, 'ADMIN_ALLOW_LOOPBACK', False)
+    # No lifespan: the endpoint needs neither the browser pool nor the job workers
+    return TestClient(main.app)
+
+def test_profile_endpoint_requires_the_admin_token(client):
+    assert client.post('/admin/profile?seconds=0.1').status_code == 403
+    assert client.post('/admin/profile?seconds=0.1', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    response = client.post('/admin/profile?seconds=0.1', headers={'X-Admin-Token': 'secret-token'})
+    assert response.status_code == 200
+    assert response.json()['samples'] > 0
+
+def test_slow_traces_require_the_admin_token(client):
+    assert client.get('/traces/slow').status_code == 403
+    assert client.get('/traces/slow', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    response = client.get('/traces/slow', headers={'X-Admin-Token': 'secret-token'})
+    assert response.status_code == 200
+    assert 'traces' in response.json()
+
+def test_admin_endpoints_are_disabled_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(main, 'ADMIN_TOKEN', '')
+    response = client.post('/admin/profile?seconds=0.1', headers={'X-Admin-Token': ''})
+    assert response.status_code == 403
+    assert 'disabled' in response.json()['detail']
+
+def test_collapsed_format(client):
+    response = client.post('/admin/profile?seconds=0.1&format=collapsed', headers={'X-Admin-Token': 'secret-token'})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in response.text.strip().splitlines())
+
+def test_profile_window_is_bounded(client):
+    response = client.post('/admin/profile?seconds=120', headers={'X-Admin-Token': 'secret-token'})
+    assert response.status_code == 422
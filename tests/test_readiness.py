@@ -0,0 +1,77 @@
+import asyncio
+import time
+import pytest
+from scraper.readiness import ReadinessStrategy, navigate_until_ready
+
+class FakePage:
+    """Just enough of a Playwright page: slow navigation and a container wait that never ends"""
+
+    def __init__(self, navigate_s: float = 0.05):
+        self.navigate_s = navigate_s
+        self.waits = []
+        self.wait_cancelled = False
+
+    async def goto(self, url, wait_until=None, timeout=None):
+        await asyncio.sleep(self.navigate_s)
+
+    async def wait_for_function(self, script, arg=None, timeout=None, polling=None):
+        self.waits.append(arg)
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            self.wait_cancelled = True
+            raise
+
+    async def evaluate(self, script, arg=None):
+        return arg['selectors'][0]
+
+STRATEGY = ReadinessStrategy(min_cards=8, settle_ms=250)
+
+def test_container_race_gets_the_settle_window():
+    async def scenario():
+        page = FakePage()
+        task = asyncio.create_task(navigate_until_ready(page, 'site', 'url', ['.card'], STRATEGY, 20))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return page
+
+    page = asyncio.run(scenario())
+    assert page.waits[0]['minCount'] == 8
+    assert page.waits[0]['settleMs'] == 250
+
+def test_ready_event_reports_the_container_wait_not_time_to_ready():
+    async def scenario():
+        page = FakePage(navigate_s=0.2)
+        ready = asyncio.Event()
+        task = asyncio.create_task(
+            navigate_until_ready(page, 'site', 'url', ['.card'], STRATEGY, 20, ready_event=ready)
+        )
+        await asyncio.sleep(0.25)
+        ready.set()
+        result = await task
+        await asyncio.sleep(0)
+        return page, result
+
+    page, (winner, wait_ms, ready_ms) = asyncio.run(scenario())
+    assert winner == '.card'
+    assert ready_ms >= 200
+    assert wait_ms < 150
+    assert page.wait_cancelled
+
+def test_cancelling_the_scrape_cancels_the_container_wait():
+    async def scenario():
+        page = FakePage()
+        ready = asyncio.Event()
+        task = asyncio.create_task(
+            navigate_until_ready(page, 'site', 'url', ['.card'], STRATEGY, 20, ready_event=ready)
+        )
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        return page
+
+    assert asyncio.run(scenario()).wait_cancelled
@@ -0,0 +1,107 @@
+import asyncio
+import time
+import pytest
+from scrape_scheduler import RateLimit, ScrapeScheduler
+
+FAST = RateLimit(rate=1000, burst=1000)
+
+@pytest.mark.parametrize('rate, burst', [(0, 3), (-1, 3), (1, 0)])
+def test_invalid_rate_limits_are_refused(rate, burst):
+    with pytest.raises(ValueError):
+        RateLimit(rate=rate, burst=burst)
+
+def test_invalid_concurrency_is_refused():
+    with pytest.raises(ValueError):
+        ScrapeScheduler(max_concurrency=0)
+
+def test_global_concurrency_cap():
+    async def scenario():
+        scheduler = ScrapeScheduler(max_concurrency=2, rate_limits={'a': FAST, 'b': FAST})
+        running = peak = 0
+
+        async def scrape(site):
+            nonlocal running, peak
+            async with scheduler.slot(site):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(scrape(site) for site in 'abababab'))
+        return peak, scheduler.stats()
+
+    peak, stats = asyncio.run(scenario())
+    assert peak == 2
+    assert stats['active'] == 0 and stats['queued'] == 0
+
+def test_rate_limit_spaces_out_scrapes_after_the_burst():
+    async def scenario():
+        scheduler = ScrapeScheduler(max_concurrency=10, rate_limits={'a': RateLimit(rate=20, burst=2)})
+        granted = []
+
+        async def scrape():
+            async with scheduler.slot('a'):
+                granted.append(time.monotonic())
+
+        started = time.monotonic()
+        await asyncio.gather(*(scrape() for _ in range(4)))
+        return [at - started for at in granted]
+
+    offsets = asyncio.run(scenario())
+    assert offsets[1] < 0.02
+    # Two more tokens at 20 per second take about 0.1 s
+    assert offsets[3] >= 0.09
+
+def test_sites_take_turns():
+    async def scenario():
+        scheduler = ScrapeScheduler(max_concurrency=1, rate_limits={'a': FAST, 'b': FAST, 'c': FAST})
+        release = asyncio.Event()
+        order = []
+
+        async def hold():
+            async with scheduler.slot('c'):
+                await release.wait()
+
+        async def scrape(site):
+            async with scheduler.slot(site):
+                order.append(site)
+                await asyncio.sleep(0)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        # A burst for a queued ahead of b does not make b wait for all of it
+        scrapes = [asyncio.create_task(scrape(site)) for site in 'aaabbb']
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, *scrapes)
+        return order
+
+    assert asyncio.run(scenario()) == ['a', 'b', 'a', 'b', 'a', 'b']
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = ScrapeScheduler(max_concurrency=1, rate_limits={'a': FAST})
+        release = asyncio.Event()
+
+        async def hold():
+            async with scheduler.slot('a'):
+                await release.wait()
+
+        async def wait():
+            async with scheduler.slot('a'):
+                pass
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(wait())
+        await asyncio.sleep(0.01)
+        queued = scheduler.stats()['queued']
+        waiter.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await holder
+        return queued, scheduler.stats()
+
+    queued, stats = asyncio.run(scenario())
+    assert queued == 1
+    assert stats['active'] == 0 and stats['queued'] == 0
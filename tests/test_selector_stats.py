@@ -0,0 +1,23 @@
+from scraper.selector_stats import SelectorStats
+
+SPEC = {
+    'title_selectors': ['.title', 'h2'],
+    'price_selectors': ['.discounted', '.mrp'],
+}
+
+def test_last_winner_is_tried_first():
+    stats = SelectorStats(path=None)
+    stats.record('site', 'container', ['.a', '.b'], '.b')
+    assert stats.order('site', 'container', ['.a', '.b']) == ['.b', '.a']
+
+def test_title_selectors_are_reordered():
+    stats = SelectorStats(path=None)
+    stats.record_extraction('site', SPEC, [{'matched': {'title': 'h2'}}])
+    assert stats.ordered_spec('site', SPEC)['title_selectors'] == ['h2', '.title']
+
+def test_price_selectors_keep_their_priority():
+    stats = SelectorStats(path=None)
+    # A card without a discount only matches the MRP selector
+    stats.record_extraction('site', SPEC, [{'matched': {'price': '.mrp'}}] * 5)
+    assert stats.ordered_spec('site', SPEC)['price_selectors'] == ['.discounted', '.mrp']
+    assert stats.snapshot()['site']['price']['selectors']['.mrp']['hits'] == 5
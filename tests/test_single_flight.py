@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_run():
+    async def scenario():
+        flights = SingleFlight()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return 'result'
+
+        results = await asyncio.gather(*(flights.run('key', work) for _ in range(5)))
+        return results, runs, flights.stats()
+
+    results, runs, stats = asyncio.run(scenario())
+    assert results == ['result'] * 5
+    assert runs == 1
+    assert stats == {'in_flight': 0, 'started': 1, 'coalesced': 4, 'cancelled': 0}
+
+def test_exceptions_reach_every_waiter():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError('boom')
+
+        return await asyncio.gather(*(flights.run('key', work) for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+
+def test_cancelling_one_waiter_keeps_the_run_for_the_others():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return 'result'
+
+        first = asyncio.create_task(flights.run('key', work))
+        second = asyncio.create_task(flights.run('key', work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, flights.stats()
+
+    result, stats = asyncio.run(scenario())
+    assert result == 'result'
+    assert stats['cancelled'] == 0
+
+def test_cancelling_the_last_waiter_cancels_the_run():
+    async def scenario():
+        flights = SingleFlight()
+        finished = False
+
+        async def work():
+            nonlocal finished
+            await asyncio.sleep(0.05)
+            finished = True
+
+        waiter = asyncio.create_task(flights.run('key', work))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0.06)
+        return finished, 'key' in flights, flights.stats()
+
+    finished, in_flight, stats = asyncio.run(scenario())
+    assert not finished
+    assert not in_flight
+    assert stats['cancelled'] == 1